@@ -3,7 +3,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
+import asyncio
 
 from core.config import settings
 from core.security_middleware import (
@@ -21,10 +23,52 @@ from core.api_gateway import (
     APIKeyMiddleware,
 )
 from sqlalchemy import text
-from models.database import init_db, engine
+from models.database import init_db, engine, SessionLocal
+from services.batch_dispatcher import BatchDispatcher
+from services.geo_index import packer_index
+from services.order_pool import order_pool
+from services.packer_locations import packer_locations
+from services.order_trails import order_trails
+from services.pricing_rules import pricing_rules
+from services.road_network import load_road_network
 from api.routes import auth, orders, users, packers, tracking, admin, analytics
 
 
+async def run_periodically(name: str, interval_seconds: float, job):
+    """
+    Run a blocking job in the threadpool every interval until cancelled.
+    
+    Args:
+        name: Job name used in log messages
+        interval_seconds: Delay between runs
+        job: Callable taking a database session
+    """
+    def run_with_session():
+        db = SessionLocal()
+        try:
+            return job(db)
+        finally:
+            db.close()
+    
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(run_with_session)
+        except Exception as e:
+            print(f"{name} warning: {e}")
+
+
+async def load_road_graph():
+    """Load the prebuilt road network in the threadpool, keeping haversine on failure."""
+    try:
+        provider = await run_in_threadpool(
+            load_road_network, settings.ROAD_GRAPH_PATH, settings.ROAD_GRAPH_MAX_SNAP_KM
+        )
+        print(f"✅ Road network loaded ({len(provider.network)} nodes)")
+    except Exception as e:
+        print(f"Road network warning: {e} (using haversine distances)")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -41,6 +85,22 @@ async def lifespan(app: FastAPI):
         "ALTER TABLE orders ADD COLUMN IF NOT EXISTS delivery_otp VARCHAR(6)",
         "ALTER TABLE orders ADD COLUMN IF NOT EXISTS receiver_name VARCHAR",
         "ALTER TABLE orders ADD COLUMN IF NOT EXISTS receiver_phone VARCHAR",
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS pickup_lat NUMERIC(10, 8)",
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS pickup_lng NUMERIC(11, 8)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_pickup_lat ON orders (pickup_lat)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_pickup_lng ON orders (pickup_lng)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_status_pickup ON orders (status, pickup_lat, pickup_lng)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_status_created ON orders (status, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_tracking_events_order_id_id ON tracking_events (order_id, id)",
+        "ALTER TABLE packers ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()",
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS pricing_version INTEGER",
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS items JSON",
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS surge_multiplier NUMERIC(4, 2)",
+        "UPDATE orders SET pickup_lat = (pickup_location->>'lat')::numeric, "
+        "pickup_lng = (pickup_location->>'lng')::numeric WHERE pickup_lat IS NULL",
+        # Only succeeds when the cube and earthdistance extensions are installed
+        "CREATE INDEX IF NOT EXISTS ix_packers_earth_location ON packers "
+        "USING gist (ll_to_earth(lat::float8, lng::float8))",
     ]
     for query in migration_queries:
         try:
@@ -59,9 +119,62 @@ async def lifespan(app: FastAPI):
     print("✅ Security: Rate limiting (60 req/min)")
     print("✅ Security: HSTS + CSP + COOP + CORP")
     
+    db = SessionLocal()
+    try:
+        pricing_rules.load(db)
+        print(f"✅ Pricing ruleset v{pricing_rules.current().version}")
+    except Exception as e:
+        print(f"Pricing rules warning: {e} (using built-in rules)")
+    finally:
+        db.close()
+    
+    background_jobs = [
+        asyncio.create_task(run_periodically(
+            "Pricing reload", settings.PRICING_RULES_RELOAD_SECONDS, pricing_rules.load
+        )),
+        asyncio.create_task(run_periodically(
+            "Location flush", settings.PACKER_LOCATION_FLUSH_SECONDS, packer_locations.flush
+        )),
+        asyncio.create_task(run_periodically(
+            "Trail flush", settings.ORDER_TRAIL_FLUSH_SECONDS, order_trails.flush
+        )),
+    ]
+    if settings.ORDER_POOL_ENABLED:
+        background_jobs.append(asyncio.create_task(run_periodically(
+            "Order pool reconcile", settings.ORDER_POOL_RECONCILE_SECONDS, order_pool.reconcile
+        )))
+    if settings.SURGE_PRICING_ENABLED:
+        # Surge supply counts come from the packer index, which dispatch alone may not load
+        background_jobs.append(asyncio.create_task(run_periodically(
+            "Packer index refresh", settings.PACKER_INDEX_REFRESH_SECONDS, packer_index.ensure_fresh
+        )))
+    if settings.ROAD_GRAPH_PATH:
+        # Distances stay haversine until the prebuilt hierarchy has loaded
+        background_jobs.append(asyncio.create_task(load_road_graph()))
+    if settings.BATCH_DISPATCH_ENABLED:
+        background_jobs.append(asyncio.create_task(run_periodically(
+            "Batch dispatch", settings.BATCH_DISPATCH_INTERVAL_SECONDS, BatchDispatcher.run
+        )))
+        print(f"✅ Batch dispatch every {settings.BATCH_DISPATCH_INTERVAL_SECONDS}s")
+    
     yield
     
     # Shutdown
+    for job in background_jobs:
+        job.cancel()
+    
+    def flush_locations():
+        db = SessionLocal()
+        try:
+            packer_locations.flush(db)
+            order_trails.flush(db)
+        finally:
+            db.close()
+    
+    try:
+        await run_in_threadpool(flush_locations)
+    except Exception as e:
+        print(f"Location flush warning: {e}")
     print("🛑 Shutting down PackNow")
 
 
@@ -104,8 +217,12 @@ app.add_middleware(BotDetectionMiddleware)
 # 5. Kong Gateway: SQL injection detection
 app.add_middleware(SQLInjectionDetectionMiddleware)
 
-# 6. Kong Gateway: Request body size limit (1MB)
-app.add_middleware(RequestSizeLimitMiddleware, max_size_bytes=1_048_576)
+# 6. Kong Gateway: Request body size limit (1MB, more for bulk estimates)
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_size_bytes=1_048_576,
+    path_limits={f"{settings.API_V1_PREFIX}/orders/estimate/batch": settings.ESTIMATE_BATCH_MAX_BYTES}
+)
 
 # 7. Kong Gateway: IP blacklisting (auto-ban after 10 rate limit violations)
 app.add_middleware(IPBlacklistMiddleware, ban_threshold=10, ban_duration_hours=24)
@@ -132,6 +249,7 @@ app.add_middleware(
     expose_headers=[
         "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset",
         "X-Request-ID", "X-Gateway", "X-Login-Attempts-Remaining",
+        "X-Next-Cursor",
     ],
     max_age=600,
 )
@@ -10,15 +10,29 @@ from models.user import User
 from models.order import Order
 from models.packer import Packer
 from models.tracking import TrackingEvent
+from models.pricing import PricingRuleset
 from schemas.admin import (
     DashboardStats,
     UserListItem,
     PackerListItem,
     OrderListItem,
+    BatchDispatchResult,
+    EstimateCacheStats,
+    PricingRulesetCreate,
+    PricingRulesetResponse,
+    PricingSimulationRequest,
+    PricingSimulationResult,
 )
 from schemas.order import OrderResponse, OrderStatusUpdate
 from api.deps import get_current_admin
-from core.constants import OrderStatus
+from core.constants import OrderStatus, MATERIAL_TYPES
+from services.batch_dispatcher import BatchDispatcher
+from services.estimate_cache import estimate_cache
+from services.pricing_rules import pricing_rules
+from services.repricing import RepricingSimulator
+from services.live_orders import publish_order_added, publish_order_removed, ORDER_CLAIMED, ORDER_CANCELLED
+from services.tracking_stream import publish_order_update
+from services.tracking_projection import TrackingProjection
 
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -160,6 +174,7 @@ def admin_update_order_status(
             detail="Order not found"
         )
     
+    was_live = order.status == OrderStatus.CREATED
     order.status = status_update.status
     
     # Create tracking event for admin override
@@ -169,8 +184,124 @@ def admin_update_order_status(
         message=f"Order status updated to {status_update.status} by admin."
     )
     db.add(tracking_event)
+    TrackingProjection.apply(db, order, tracking_event)
     
     db.commit()
     db.refresh(order)
+    publish_order_update(order, tracking_event)
+    
+    # Keep packers' live feeds in step with the override
+    is_live = order.status == OrderStatus.CREATED
+    if is_live and not was_live:
+        publish_order_added(order)
+    elif was_live and not is_live:
+        publish_order_removed(
+            order, ORDER_CANCELLED if order.status == OrderStatus.CANCELLED else ORDER_CLAIMED
+        )
     
     return order
+
+
+@router.post("/dispatch/batch", response_model=BatchDispatchResult)
+def run_batch_dispatch(
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Assign all waiting orders to packers now using batch matching."""
+    return BatchDispatcher.run(db)
+
+
+@router.get("/estimate-cache", response_model=EstimateCacheStats)
+def get_estimate_cache_stats(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get hit and miss counts of the material and price estimate cache."""
+    return estimate_cache.stats()
+
+
+@router.delete("/estimate-cache", response_model=EstimateCacheStats)
+def clear_estimate_cache(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Empty the estimate cache, e.g. after changing material costs in code."""
+    estimate_cache.clear()
+    return estimate_cache.stats()
+
+
+def _check_materials(material_costs):
+    """Reject unit costs for materials that do not exist."""
+    unknown = sorted(set(material_costs or {}) - set(MATERIAL_TYPES))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown materials: {', '.join(unknown)}"
+        )
+
+
+@router.get("/pricing/rulesets", response_model=List[PricingRulesetResponse])
+def get_pricing_rulesets(
+    limit: int = Query(20, ge=1, le=100),
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get published pricing rulesets, newest (the one in force) first."""
+    return db.query(PricingRuleset).order_by(PricingRuleset.version.desc()).limit(limit).all()
+
+
+@router.post("/pricing/rulesets", response_model=PricingRulesetResponse, status_code=status.HTTP_201_CREATED)
+def publish_pricing_ruleset(
+    ruleset: PricingRulesetCreate,
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Publish a new pricing ruleset version.
+    
+    It is in force in this process at once and in every other process
+    within PRICING_RULES_RELOAD_SECONDS. Fields not given, material costs
+    included, keep their values from the current version.
+    """
+    _check_materials(ruleset.material_costs)
+    
+    return pricing_rules.publish(
+        db,
+        base_packing_fee=ruleset.base_packing_fee,
+        price_per_km=ruleset.price_per_km,
+        urgent_multiplier=ruleset.urgent_multiplier,
+        category_multipliers=ruleset.category_multipliers,
+        material_costs=ruleset.material_costs,
+        note=ruleset.note,
+        created_by=current_admin.id
+    )
+
+
+@router.post("/pricing/simulate", response_model=PricingSimulationResult)
+def simulate_pricing(
+    candidate: PricingSimulationRequest,
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Reprice past orders under candidate rules without publishing them.
+    
+    The candidate is built exactly as publishing the same changes would
+    build it. Revenue is compared with the prices the orders were placed
+    at, for all non-cancelled orders in the date range.
+    """
+    _check_materials(candidate.material_costs)
+    if candidate.start_date and candidate.end_date and candidate.end_date < candidate.start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date is before start_date"
+        )
+    
+    rules = pricing_rules.build_candidate(
+        db,
+        base_packing_fee=candidate.base_packing_fee,
+        price_per_km=candidate.price_per_km,
+        urgent_multiplier=candidate.urgent_multiplier,
+        category_multipliers=candidate.category_multipliers,
+        material_costs=candidate.material_costs
+    )
+    result = RepricingSimulator.simulate(db, rules, candidate.start_date, candidate.end_date)
+    return {"base_version": rules.version, **result}
@@ -1,8 +1,14 @@
 """Order management routes."""
+import json
 import random
 import string
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from models.database import get_db
@@ -22,15 +28,46 @@ from schemas.order import (
 from api.deps import get_current_user, get_current_packer
 from services.material_estimator import MaterialEstimator
 from services.pricing_engine import PricingEngine
+from services.estimate_cache import estimate_cache, quantize_many
+from services.pricing_rules import pricing_rules
+from services.price_quotes import PriceQuotes
 from services.dispatcher import Dispatcher
+from services.dispatch_queue import DispatchQueue
+from services.live_orders import publish_order_added, publish_order_removed, ORDER_CANCELLED
+from services.tracking_stream import publish_order_update
+from services.tracking_projection import TrackingProjection
 from services.inventory import InventoryManager
+from services.packer_locations import packer_locations
+from services.surge_pricing import surge_pricing
 from services.email import email_service
+from core.config import settings
 from core.constants import OrderStatus
+from core.http_cache import check_not_modified, make_etag
 
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
+def _estimate_order_materials(
+    request: Union[MaterialEstimateRequest, PriceEstimateRequest, OrderCreate]
+) -> Tuple[Dict[str, float], str, Optional[Dict[str, int]]]:
+    """Materials, box size and, for multi-item requests, box counts of a request."""
+    if request.items:
+        materials, boxes = MaterialEstimator.estimate_multi_item_materials(
+            request.category,
+            [item.model_dump() for item in request.items],
+            request.fragility_level
+        )
+        return materials, list(boxes)[-1] if boxes else "small", boxes
+    
+    materials, box_size = estimate_cache.materials(
+        category=request.category,
+        dimensions=request.item_dimensions.model_dump(),
+        fragility=request.fragility_level
+    )
+    return materials, box_size, None
+
+
 @router.post("/estimate/materials", response_model=MaterialEstimateResponse)
 def estimate_materials(request: MaterialEstimateRequest):
     """
@@ -42,20 +79,17 @@ def estimate_materials(request: MaterialEstimateRequest):
     Returns:
         Estimated materials and cost
     """
-    dimensions_dict = request.item_dimensions.dict()
+    materials, box_size, boxes = _estimate_order_materials(request)
     
-    materials, box_size = MaterialEstimator.estimate_materials(
-        category=request.category,
-        dimensions=dimensions_dict,
-        fragility=request.fragility_level
+    material_cost = MaterialEstimator.calculate_material_cost(
+        materials, pricing_rules.current().material_costs
     )
     
-    material_cost = MaterialEstimator.calculate_material_cost(materials)
-    
     return {
         "materials": materials,
         "material_cost": material_cost,
-        "estimated_box_size": box_size
+        "estimated_box_size": box_size,
+        "boxes": boxes
     }
 
 
@@ -64,36 +98,199 @@ def estimate_price(request: PriceEstimateRequest):
     """
     Estimate price for an order.
     
+    The response carries a signed quote token. Creating the order with it
+    and the same inputs before it expires keeps this price and skips
+    estimating again.
+    
     Args:
         request: Price estimation request
         
     Returns:
-        Price breakdown
+        Price breakdown and quote token
     """
-    dimensions_dict = request.item_dimensions.dict()
-    
     # Get materials first
-    materials, _ = MaterialEstimator.estimate_materials(
-        category=request.category,
-        dimensions=dimensions_dict,
-        fragility=request.fragility_level
-    )
+    materials, _, _ = _estimate_order_materials(request)
     
     # Calculate price
-    price_breakdown = PricingEngine.calculate_price(
+    price_breakdown = estimate_cache.price(
         category=request.category,
         materials=materials,
         distance_km=request.distance_km,
-        urgency=request.urgency
+        urgency=request.urgency,
+        surge_multiplier=_surge_at(request.pickup_location)
     )
     
-    return price_breakdown
+    quote_token, quote_expires_at = PriceQuotes.issue(request, materials, price_breakdown)
+    return {**price_breakdown, "quote_token": quote_token, "quote_expires_at": quote_expires_at}
+
+
+def _surge_at(location) -> float:
+    """Surge multiplier at a pickup location; 1.0 without one."""
+    if location is None:
+        return 1.0
+    return surge_pricing.multiplier(location.lat, location.lng)
+
+
+# Result lines sent per chunk of a batch estimate response
+_BATCH_CHUNK_LINES = 1000
+
+
+class _Batch:
+    """Validated lines of a batch estimate request."""
+    
+    def __init__(self, lines: List[bytes]):
+        self.size = len(lines)
+        self.items: List[PriceEstimateRequest] = []
+        self.positions: List[int] = []
+        self.multi_item: Dict[int, PriceEstimateRequest] = {}
+        self.errors = {}
+        for index, line in enumerate(lines):
+            try:
+                item = PriceEstimateRequest.model_validate_json(line)
+            except ValidationError as e:
+                self.errors[index] = e.errors(include_url=False, include_context=False, include_input=False)
+                continue
+            if item.items:
+                self.multi_item[index] = item
+            else:
+                self.items.append(item)
+                self.positions.append(index)
+        # Items of multi-item lines, counting quantities; each is bin packed
+        self.packed_items = sum(
+            entry.quantity for item in self.multi_item.values() for entry in item.items
+        )
+    
+    @property
+    def total_items(self) -> int:
+        return len(self.items) + self.packed_items
+
+
+def _estimate_lines(batch: _Batch) -> Iterator[str]:
+    """Estimate and serialize a validated batch of NDJSON estimate requests."""
+    items, positions, multi_item, errors = batch.items, batch.positions, batch.multi_item, batch.errors
+    
+    results = {}
+    rules = pricing_rules.current()
+    # Multi-item orders are bin packed one by one
+    for index, item in multi_item.items():
+        materials, box_size, boxes = _estimate_order_materials(item)
+        results[index] = {
+            "materials": materials,
+            "estimated_box_size": box_size,
+            "boxes": boxes,
+            **estimate_cache.price(
+                item.category, materials, item.distance_km, item.urgency, rules, _surge_at(item.pickup_location)
+            ),
+        }
+    
+    if items:
+        categories = [item.category for item in items]
+        # Quantized like single estimates (see estimate_cache) so results match
+        dimensions = np.array([
+            (item.item_dimensions.length, item.item_dimensions.width, item.item_dimensions.height)
+            for item in items
+        ], dtype=np.float64)
+        distances = np.array([item.distance_km for item in items], dtype=np.float64)
+        materials, box_sizes, material_costs = MaterialEstimator.estimate_materials_many(
+            categories,
+            quantize_many(dimensions, settings.ESTIMATE_DIMENSION_STEP_CM),
+            [item.fragility_level for item in items],
+            rules.material_costs
+        )
+        prices = PricingEngine.calculate_prices(
+            categories,
+            material_costs,
+            quantize_many(distances, settings.ESTIMATE_DISTANCE_STEP_KM),
+            [item.urgency for item in items],
+            rules,
+            np.array([_surge_at(item.pickup_location) for item in items], dtype=np.float64)
+        )
+        columns = {name: values.tolist() for name, values in prices.items()}
+        for row, index in enumerate(positions):
+            results[index] = {
+                "materials": materials[row],
+                "estimated_box_size": box_sizes[row],
+                **{name: values[row] for name, values in columns.items()},
+                "pricing_version": rules.version,
+            }
+    
+    chunk = []
+    for index in range(batch.size):
+        if index in errors:
+            line = {"index": index, "error": errors[index]}
+        else:
+            line = {"index": index, **results[index]}
+        chunk.append(json.dumps(line, separators=(",", ":")))
+        if len(chunk) == _BATCH_CHUNK_LINES:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+@router.post("/estimate/batch")
+async def estimate_batch(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Estimate materials and prices for many items in one request.
+    
+    The body is NDJSON: one price estimate request per line, with the same
+    fields as /estimate/price. The response is NDJSON with one line per
+    non-empty input line, in order, carrying its index and either the materials,
+    box size and price breakdown or the validation errors for that line.
+    All valid items are estimated in one vectorized pass and give the same
+    results as the single-item endpoints.
+    
+    Args:
+        request: Incoming request with an NDJSON body
+        current_user: Authenticated user
+        
+    Returns:
+        application/x-ndjson response
+        
+    Raises:
+        HTTPException: If the body, the number of items (counting each item
+            of a multi-item line) or the number of items to bin pack is over
+            the limit
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > settings.ESTIMATE_BATCH_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Request body too large. Maximum size: {settings.ESTIMATE_BATCH_MAX_BYTES // 1024}KB"
+            )
+    
+    lines = [line for line in bytes(body).splitlines() if line.strip()]
+    # Every line is at least one item, so too many lines fail before validating
+    if len(lines) > settings.ESTIMATE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ESTIMATE_BATCH_MAX_ITEMS} items per batch"
+        )
+    
+    batch = await run_in_threadpool(_Batch, lines)
+    if batch.total_items > settings.ESTIMATE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ESTIMATE_BATCH_MAX_ITEMS} items per batch"
+        )
+    if batch.packed_items > settings.ESTIMATE_BATCH_MAX_PACKED_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ESTIMATE_BATCH_MAX_PACKED_ITEMS} items of multi-item orders per batch"
+        )
+    
+    # A sync iterator, so the estimate runs in the threadpool as it streams
+    return StreamingResponse(_estimate_lines(batch), media_type="application/x-ndjson")
 
 
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_order(
     order_data: OrderCreate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -102,28 +299,33 @@ def create_order(
     
     Args:
         order_data: Order creation data
-        background_tasks: Background task manager
         current_user: Authenticated user
         db: Database session
         
     Returns:
         Created order
     """
-    # Estimate materials
-    dimensions_dict = order_data.item_dimensions.dict()
-    materials, _ = MaterialEstimator.estimate_materials(
-        category=order_data.category,
-        dimensions=dimensions_dict,
-        fragility=order_data.fragility_level
-    )
-    
-    # Calculate initial price (distance will be updated after packer assignment)
-    price_breakdown = PricingEngine.calculate_price(
-        category=order_data.category,
-        materials=materials,
-        distance_km=order_data.distance_km,  # Initial estimate distance
-        urgency=order_data.urgency
-    )
+    # A valid quote for the same inputs already holds the materials and price
+    quote = PriceQuotes.redeem(order_data.quote_token, order_data) if order_data.quote_token else None
+    if quote is not None:
+        materials = quote["materials"]
+        surge_multiplier = quote["surge_multiplier"]
+        price_breakdown = quote
+    else:
+        # Estimate materials
+        materials, _, _ = _estimate_order_materials(order_data)
+        
+        # Surge is fixed when the order is placed; repricing reuses it
+        surge_multiplier = _surge_at(order_data.pickup_location)
+        
+        # Calculate initial price (distance will be updated after packer assignment)
+        price_breakdown = estimate_cache.price(
+            category=order_data.category,
+            materials=materials,
+            distance_km=order_data.distance_km,  # Initial estimate distance
+            urgency=order_data.urgency,
+            surge_multiplier=surge_multiplier
+        )
     
     # Generate 6-digit OTP
     otp = ''.join(random.choices(string.digits, k=6))
@@ -133,13 +335,18 @@ def create_order(
         user_id=current_user.id,
         status=OrderStatus.CREATED,
         category=order_data.category,
-        item_dimensions=dimensions_dict,
+        item_dimensions=order_data.item_dimensions.model_dump(),
+        items=[item.model_dump() for item in order_data.items] if order_data.items else None,
         fragility_level=order_data.fragility_level,
         urgency=order_data.urgency,
         materials_required=materials,
         price=price_breakdown["final_price"],
+        pricing_version=price_breakdown["pricing_version"],
+        surge_multiplier=surge_multiplier,
         distance_km=order_data.distance_km,  # Store the actual delivery distance calculated by frontend
         pickup_location=order_data.pickup_location.dict(),
+        pickup_lat=order_data.pickup_location.lat,
+        pickup_lng=order_data.pickup_location.lng,
         dropoff_location=order_data.dropoff_location.dict() if order_data.dropoff_location else None,
         receiver_name=order_data.receiver_name,
         receiver_phone=order_data.receiver_phone,
@@ -157,7 +364,14 @@ def create_order(
         message="Your order has been placed successfully. Looking for a nearby packer..."
     )
     db.add(tracking_event)
+    TrackingProjection.apply(db, new_order, tracking_event)
+    
+    # Auto-dispatch: the worker pool picks the order up from the queue.
+    # Otherwise (Gig Working Model) orders wait in the pool to be accepted manually by a packer.
+    if settings.DISPATCH_WORKER_ENABLED:
+        DispatchQueue.enqueue(db, new_order.id)
     db.commit()
+    publish_order_added(new_order)
     
     # Send Email Confirmation
     if current_user.email:
@@ -178,77 +392,27 @@ def create_order(
             html_content=html_content
         )
     
-    # Gig Working Model: Orders wait in the pool to be accepted manually by a packer.
-    # background_tasks.add_task(dispatch_packer, new_order.id, db)
-    
     return new_order
 
 
-def dispatch_packer(order_id: int, db: Session):
-    """
-    Background task to assign packer to order.
-    
-    Args:
-        order_id: Order ID
-        db: Database session
-    """
-    order = db.query(Order).filter(Order.id == order_id).first()
-    
-    if not order:
-        return
-    
-    # Find nearest packer
-    result = Dispatcher.find_nearest_packer(
-        db=db,
-        order_location=order.pickup_location,
-        required_materials=order.materials_required
-    )
-    
-    if result:
-        packer, distance = result
-        
-        # Update order with packer and distance
-        order.packer_id = packer.id
-        order.distance_km = distance
-        order.status = OrderStatus.PACKER_ASSIGNED
-        
-        # Recalculate price with actual distance
-        price_breakdown = PricingEngine.calculate_price(
-            category=order.category,
-            materials=order.materials_required,
-            distance_km=distance,
-            urgency=order.urgency
-        )
-        order.price = price_breakdown["final_price"]
-        
-        # Deduct inventory
-        updated_inventory = Dispatcher.deduct_inventory(packer, order.materials_required)
-        InventoryManager.update_packer_inventory(db, packer, updated_inventory)
-        
-        # Create tracking event for packer assignment
-        tracking_event = TrackingEvent(
-            order_id=order.id,
-            status=OrderStatus.PACKER_ASSIGNED,
-            message=f"Packer {packer.name} has been assigned to your order. They are {distance} km away.",
-            packer_lat=packer.lat,
-            packer_lng=packer.lng
-        )
-        db.add(tracking_event)
-        
-        db.commit()
-
-
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(
     order_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get order details.
     
+    Returns 304 when If-None-Match matches the current ETag; only the
+    owner and version columns are read in that case.
+    
     Args:
         order_id: Order ID
+        request: Incoming request
+        response: Response used to set the ETag
         current_user: Authenticated user
         db: Database session
         
@@ -258,7 +422,7 @@ def get_order(
     Raises:
         HTTPException: If order not found or unauthorized
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = db.query(Order.user_id, Order.status, Order.updated_at).filter(Order.id == order_id).first()
     
     if not order:
         raise HTTPException(
@@ -272,24 +436,46 @@ def get_order(
             detail="Not authorized to access this order"
         )
     
-    return order
+    not_modified = check_not_modified(
+        request, response, make_etag("order", order_id, order.status, order.updated_at)
+    )
+    if not_modified:
+        return not_modified
+    
+    return db.query(Order).filter(Order.id == order_id).first()
 
 
 @router.get("", response_model=List[OrderResponse])
 def get_user_orders(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get all orders for current user.
     
+    The ETag comes from one aggregate query over the user's orders, so an
+    unchanged list is answered with 304 without loading any rows.
+    
     Args:
+        request: Incoming request
+        response: Response used to set the ETag
         current_user: Authenticated user
         db: Database session
         
     Returns:
         List of orders
     """
+    count, last_id, last_updated = db.query(
+        func.count(Order.id), func.max(Order.id), func.max(Order.updated_at)
+    ).filter(Order.user_id == current_user.id).one()
+    not_modified = check_not_modified(
+        request, response, make_etag("orders", current_user.id, count, last_id, last_updated)
+    )
+    if not_modified:
+        return not_modified
+    
     orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
     return orders
 
@@ -342,17 +528,20 @@ def update_order_status(
     
     # Create tracking event
     packer = db.query(Packer).filter(Packer.id == current_packer.id).first()
+    packer_lat, packer_lng = packer_locations.position(packer) if packer else (None, None)
     tracking_event = TrackingEvent(
         order_id=order.id,
         status=status_update.status,
         message=status_messages.get(status_update.status, f"Order status updated to {status_update.status}"),
-        packer_lat=packer.lat if packer else None,
-        packer_lng=packer.lng if packer else None
+        packer_lat=packer_lat,
+        packer_lng=packer_lng
     )
     db.add(tracking_event)
+    TrackingProjection.apply(db, order, tracking_event)
     
     db.commit()
     db.refresh(order)
+    publish_order_update(order, tracking_event)
     
     # Email Trigger for Delivery OTP when packer is on the way
     if status_update.status == OrderStatus.ON_THE_WAY and order.user.email:
@@ -416,6 +605,8 @@ def cancel_order(
             detail="Cannot cancel completed or already cancelled order"
         )
     
+    was_live = order.status == OrderStatus.CREATED
+    
     # Return inventory to packer if assigned
     if order.packer_id:
         packer = db.query(Packer).filter(Packer.id == order.packer_id).first()
@@ -424,7 +615,11 @@ def cancel_order(
             InventoryManager.update_packer_inventory(db, packer, updated_inventory)
     
     order.status = OrderStatus.CANCELLED
+    TrackingProjection.apply(db, order)
     db.commit()
+    if was_live:
+        publish_order_removed(order, ORDER_CANCELLED)
+    publish_order_update(order)
 
 
 from pydantic import BaseModel
@@ -474,16 +669,19 @@ def verify_delivery_otp(
     
     # Create tracking event
     packer = db.query(Packer).filter(Packer.id == current_packer.id).first()
+    packer_lat, packer_lng = packer_locations.position(packer) if packer else (None, None)
     tracking_event = TrackingEvent(
         order_id=order.id,
         status=OrderStatus.COMPLETED,
         message="Order successfully completed. Dropoff verified via OTP.",
-        packer_lat=packer.lat if packer else None,
-        packer_lng=packer.lng if packer else None
+        packer_lat=packer_lat,
+        packer_lng=packer_lng
     )
     db.add(tracking_event)
+    TrackingProjection.apply(db, order, tracking_event)
     
     db.commit()
     db.refresh(order)
+    publish_order_update(order, tracking_event)
     
     return order
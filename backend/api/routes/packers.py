@@ -1,18 +1,43 @@
 """Packer management routes."""
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from models.database import get_db
 from models.packer import Packer
 from models.order import Order
-from schemas.packer import PackerResponse, PackerLocationUpdate, PackerAvailabilityUpdate
+from schemas.packer import (
+    PackerResponse,
+    PackerLocationUpdate,
+    PackerAvailabilityUpdate,
+    LocationPingBatch,
+    LocationPingResult,
+)
 from schemas.order import OrderResponse
 from api.deps import get_current_packer
+from core.config import settings
 from core.constants import OrderStatus
+from core.http_cache import check_not_modified, make_etag
 from services.dispatcher import Dispatcher
-from services.pricing_engine import PricingEngine
 from services.inventory import InventoryManager
+from services.geo_index import packer_index
+from services.packer_locations import packer_locations
+from services.order_trails import order_trails
+from services.live_orders import (
+    LiveOrderFeed,
+    InvalidCursor,
+    SORT_BY_AGE,
+    SORT_BY_DISTANCE,
+    ORDER_ADDED,
+    ORDER_CLAIMED,
+    cell_topics_for_radius,
+    order_matches_packer,
+    publish_order_removed,
+)
+from services.event_broker import broker
+from services.tracking_stream import publish_order_update, publish_packer_location
+from services.tracking_projection import TrackingProjection
+from core.streaming import event_stream_response, format_sse, heartbeat
 from models.tracking import TrackingEvent
 
 router = APIRouter(prefix="/packers", tags=["Packers"])
@@ -41,6 +66,12 @@ def update_packer_location(
     """
     Update packer location.
     
+    Writes through to the database. The fix joins the packer's trail only
+    if it carries its device time: a server timestamp could be later than
+    fixes still buffered on the device, which would then be dropped. Apps
+    reporting frequent GPS fixes should use POST /packers/me/locations
+    instead.
+    
     Args:
         location_update: New location data
         current_packer: Authenticated packer
@@ -51,13 +82,68 @@ def update_packer_location(
     """
     current_packer.lat = location_update.lat
     current_packer.lng = location_update.lng
-    
     db.commit()
     db.refresh(current_packer)
     
+    if location_update.recorded_at is not None:
+        accepted, _ = packer_locations.record(
+            current_packer.id, [(location_update.recorded_at, location_update.lat, location_update.lng)]
+        )
+        order_trails.extend(current_packer.id, accepted)
+    else:
+        # An older unsaved fix must not overwrite this position on the next flush
+        packer_locations.discard_unsaved(current_packer.id)
+    packer_index.sync(current_packer)
+    publish_packer_location(current_packer)
+    
     return current_packer
 
 
+@router.post("/me/locations", response_model=LocationPingResult, status_code=status.HTTP_202_ACCEPTED)
+def report_packer_locations(
+    batch: LocationPingBatch,
+    current_packer: Packer = Depends(get_current_packer),
+    db: Session = Depends(get_db)
+):
+    """
+    Report a batch of GPS fixes.
+    
+    Fixes are kept in memory and the latest one is written to the database
+    every PACKER_LOCATION_FLUSH_SECONDS, so packers can report as often as
+    their GPS allows. Dispatch and order tracking see the newest fix at once.
+    Fixes no newer than the last one received are ignored.
+    
+    Args:
+        batch: GPS fixes, in any order
+        current_packer: Authenticated packer
+        db: Database session
+        
+    Returns:
+        Number of fixes accepted and the packer's latest position
+    """
+    if len(batch.pings) > settings.PACKER_LOCATION_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PACKER_LOCATION_MAX_BATCH} fixes per upload"
+        )
+    
+    accepted, latest = packer_locations.record(
+        current_packer.id,
+        [(ping.recorded_at, ping.lat, ping.lng) for ping in batch.pings]
+    )
+    if accepted:
+        packer_index.move(current_packer.id, latest.lat, latest.lng)
+        order_trails.extend(current_packer.id, accepted)
+        publish_packer_location(current_packer)
+    
+    return {
+        "accepted": len(accepted),
+        "lat": latest.lat,
+        "lng": latest.lng,
+        "recorded_at": latest.recorded_at,
+    }
+
+
 @router.patch("/me/availability", response_model=PackerResponse)
 def update_packer_availability(
     availability_update: PackerAvailabilityUpdate,
@@ -79,6 +165,7 @@ def update_packer_availability(
     
     db.commit()
     db.refresh(current_packer)
+    packer_index.sync(current_packer)
     
     return current_packer
 
@@ -107,28 +194,105 @@ def get_packer_orders(
 
 @router.get("/live-orders", response_model=List[OrderResponse])
 def get_live_orders(
+    response: Response,
+    radius_km: Optional[float] = Query(None, gt=0, le=settings.LIVE_ORDERS_MAX_RADIUS_KM),
+    sort: str = Query(SORT_BY_AGE, pattern=f"^({SORT_BY_AGE}|{SORT_BY_DISTANCE})$"),
+    limit: int = Query(settings.LIVE_ORDERS_PAGE_SIZE, ge=1, le=settings.LIVE_ORDERS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, max_length=200),
     current_packer: Packer = Depends(get_current_packer),
     db: Session = Depends(get_db)
 ):
     """
-    Get all live/unassigned orders nearby (Gig Economy Model).
+    Get live/unassigned orders nearby (Gig Economy Model).
+    
+    Only orders within the radius that the packer has the inventory for are
+    listed, newest first (sort=age) or nearest first (sort=distance). When
+    more orders are available, the X-Next-Cursor response header holds the
+    cursor for the next page.
+    
+    Args:
+        response: Response used to set the pagination header
+        radius_km: Search radius (defaults to DEFAULT_PACKER_SEARCH_RADIUS_KM)
+        sort: "age" or "distance"
+        limit: Page size
+        cursor: X-Next-Cursor value from the previous page
+        current_packer: Authenticated packer
+        db: Database session
+        
+    Returns:
+        List of orders
     """
     if not current_packer.available:
         return []
 
-    # Get all unassigned orders
-    orders = db.query(Order).filter(
-        Order.status == OrderStatus.CREATED
-    ).order_by(Order.created_at.desc()).all()
+    try:
+        orders, next_cursor = LiveOrderFeed.page(
+            db,
+            current_packer,
+            radius_km=radius_km or settings.DEFAULT_PACKER_SEARCH_RADIUS_KM,
+            sort=sort,
+            limit=limit,
+            cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
+
+
+@router.get("/live-orders/stream")
+def stream_live_orders(
+    radius_km: Optional[float] = Query(None, gt=0, le=settings.LIVE_ORDERS_MAX_RADIUS_KM),
+    current_packer: Packer = Depends(get_current_packer),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream changes to the packer's live order feed as server-sent events.
+    
+    Sends order_added for new orders within the radius that the packer has
+    the inventory for, and order_claimed / order_cancelled when an order
+    leaves the pool. A resync event means events were dropped and the feed
+    should be refetched. Location and inventory are read once, when the
+    stream opens; reconnect after they change.
+    
+    Args:
+        radius_km: Search radius (defaults to DEFAULT_PACKER_SEARCH_RADIUS_KM)
+        current_packer: Authenticated packer
+        db: Database session
+        
+    Returns:
+        text/event-stream response
+    """
+    if not current_packer.available:
+        raise HTTPException(status_code=400, detail="You must be online to receive live orders")
+    
+    lat, lng = packer_locations.position(current_packer)
+    inventory = dict(current_packer.inventory or {})
+    radius = radius_km or settings.DEFAULT_PACKER_SEARCH_RADIUS_KM
     
-    # Filter out orders where packer doesn't have enough inventory
-    valid_orders = []
-    for order in orders:
-        if Dispatcher.check_inventory_sufficient(current_packer.inventory, order.materials_required):
-            # Optional: Calculate distance and only include if within radius
-            valid_orders.append(order)
-            
-    return valid_orders
+    # The stream never touches the database, so give the connection back now
+    db.close()
+    
+    async def events():
+        subscription = broker.subscribe(cell_topics_for_radius(lat, lng, radius))
+        try:
+            yield format_sse("ready", {"radius_km": radius})
+            while True:
+                event = await subscription.get(settings.STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield heartbeat()
+                    continue
+                if event["type"] == ORDER_ADDED and not order_matches_packer(
+                    event["order"], lat, lng, radius, inventory
+                ):
+                    continue
+                yield format_sse(event["type"], event)
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return event_stream_response(events())
 
 
 @router.post("/orders/{order_id}/accept", response_model=OrderResponse)
@@ -139,26 +303,37 @@ def accept_order(
 ):
     """
     Accept an unassigned live order.
+    
+    The order is claimed with a single conditional UPDATE before any other
+    work, so when several packers race for the same order exactly one wins
+    and the others get a 409 straight away.
     """
     if not current_packer.available:
         raise HTTPException(status_code=400, detail="You must be online to accept orders")
 
-    order = db.query(Order).filter(Order.id == order_id).first()
-    
-    if not order:
+    if not Dispatcher.claim_order(db, order_id, current_packer.id):
+        db.rollback()
+        if db.query(Order.id).filter(Order.id == order_id).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found"
+            )
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
-        
-    if order.status != OrderStatus.CREATED:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_409_CONFLICT,
             detail="This order has already been accepted or cancelled"
         )
+
+    # The claim is not committed yet, so any failure below releases the order.
+    # Lock the packer row too, so two orders accepted by the same packer at
+    # once cannot both spend the same inventory.
+    order = db.query(Order).filter(Order.id == order_id).populate_existing().one()
+    db.query(Packer).filter(
+        Packer.id == current_packer.id
+    ).with_for_update().populate_existing().one()
         
     # Check inventory
     if not Dispatcher.check_inventory_sufficient(current_packer.inventory, order.materials_required):
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You do not have sufficient inventory to accept this order"
@@ -166,7 +341,7 @@ def accept_order(
         
     # Calculate true delivery distance (Pickup to Dropoff) for pricing
     if order.dropoff_location and "lat" in order.dropoff_location and "lng" in order.dropoff_location:
-        delivery_distance = Dispatcher.haversine_distance(
+        delivery_distance = Dispatcher.route_distance(
             order.pickup_location["lat"], order.pickup_location["lng"],
             order.dropoff_location["lat"], order.dropoff_location["lng"]
         )
@@ -174,54 +349,54 @@ def accept_order(
     else:
         delivery_distance = 5.0 # Fallback if dropoff missing
         
-    # Set the order distance to the delivery distance
-    order.distance_km = delivery_distance
+    # Charge for the delivery distance; an order priced at it keeps its price
+    Dispatcher.reprice(order, delivery_distance)
     
     # Calculate dispatch distance (Packer to Pickup) just for the tracking event notification
+    packer_lat, packer_lng = packer_locations.position(current_packer)
     dispatch_distance = Dispatcher.haversine_distance(
-        float(current_packer.lat), float(current_packer.lng), 
+        packer_lat, packer_lng,
         order.pickup_location["lat"], order.pickup_location["lng"]
     )
     
-    # Update order with packer
-    order.packer_id = current_packer.id
-    order.status = OrderStatus.PACKER_ASSIGNED
-    
-    # Recalculate price with actual delivery distance
-    price_breakdown = PricingEngine.calculate_price(
-        category=order.category,
-        materials=order.materials_required,
-        distance_km=delivery_distance,
-        urgency=order.urgency
-    )
-    order.price = price_breakdown["final_price"]
-    
-    # Deduct inventory
-    updated_inventory = Dispatcher.deduct_inventory(current_packer, order.materials_required)
-    InventoryManager.update_packer_inventory(db, current_packer, updated_inventory)
-    
     # Create tracking event
     tracking_event = TrackingEvent(
         order_id=order.id,
         status=OrderStatus.PACKER_ASSIGNED,
         message=f"Packer {current_packer.name} has accepted your order and is {dispatch_distance} km away.",
-        packer_lat=current_packer.lat,
-        packer_lng=current_packer.lng
+        packer_lat=packer_lat,
+        packer_lng=packer_lng
     )
     db.add(tracking_event)
-    db.commit()
+    TrackingProjection.apply(db, order, tracking_event, packer=current_packer)
+    
+    # Deduct inventory (commits the claim, price, tracking event and projection together)
+    updated_inventory = Dispatcher.deduct_inventory(current_packer, order.materials_required)
+    InventoryManager.update_packer_inventory(db, current_packer, updated_inventory)
     db.refresh(order)
+    publish_order_removed(order, ORDER_CLAIMED)
+    publish_order_update(order, tracking_event, packer=current_packer)
     
     return order
 
 
 @router.get("/{packer_id}", response_model=PackerResponse)
-def get_packer(packer_id: int, db: Session = Depends(get_db)):
+def get_packer(
+    packer_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """
     Get packer details by ID.
     
+    Returns 304 when If-None-Match matches the ETag built from the
+    packer's updated_at, without loading the row.
+    
     Args:
         packer_id: Packer ID
+        request: Incoming request
+        response: Response used to set the ETag
         db: Database session
         
     Returns:
@@ -230,12 +405,16 @@ def get_packer(packer_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If packer not found
     """
-    packer = db.query(Packer).filter(Packer.id == packer_id).first()
+    version = db.query(Packer.updated_at).filter(Packer.id == packer_id).first()
     
-    if not packer:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Packer not found"
         )
     
-    return packer
+    not_modified = check_not_modified(request, response, make_etag("packer", packer_id, version.updated_at))
+    if not_modified:
+        return not_modified
+    
+    return db.query(Packer).filter(Packer.id == packer_id).first()
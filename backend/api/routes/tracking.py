@@ -1,30 +1,77 @@
 """Order tracking routes."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from models.database import get_db
+from models.database import get_db, SessionLocal
 from models.user import User
 from models.order import Order
-from models.packer import Packer
-from models.tracking import TrackingEvent
-from schemas.tracking import TrackingTimelineResponse, TrackingEventResponse
+from models.tracking import OrderTracking
+from models.trail import OrderTrail
+from schemas.tracking import TrackingTimelineResponse, OrderTrailResponse
 from api.deps import get_current_user
+from core.config import settings
+from core.http_cache import check_not_modified, make_etag
+from core.streaming import event_stream_response, format_sse, heartbeat
+from services.event_broker import broker
+from services.tracking_stream import (
+    build_timeline,
+    order_topic,
+    packer_topic,
+    timeline_version,
+    ACTIVE_STATUSES,
+    FINAL_STATUSES,
+    PACKER_LOCATION,
+)
+from services.packer_locations import packer_locations
+from services.order_trails import decode_points, simplify
+from services.tracking_projection import TrackingProjection
 
 
 router = APIRouter(prefix="/orders", tags=["Tracking"])
 
 
+def _check_can_track(order, current_user: User) -> None:
+    """Raise 404/403 unless the order exists and belongs to the current user."""
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    if order.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to track this order"
+        )
+
+
 @router.get("/{order_id}/tracking", response_model=TrackingTimelineResponse)
 def get_order_tracking(
     order_id: int,
+    request: Request,
+    response: Response,
+    after_id: Optional[int] = Query(None, ge=0, description="next_cursor from the previous response"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get full tracking timeline for an order.
+    Get the tracking timeline for an order.
+    
+    Pass the previous response's next_cursor as after_id to receive only
+    events added since; status and packer fields are always current.
+    
+    Served from the order's tracking read model with one primary-key read.
+    Orders without one (placed before it existed and not changed since)
+    fall back to reading the order, its events and the packer, with the
+    ETag checked before any events are loaded.
     
     Args:
         order_id: Order ID
+        request: Incoming request
+        response: Response used to set the ETag
+        after_id: Only return events with a greater ID
         current_user: Authenticated user
         db: Database session
         
@@ -34,49 +81,170 @@ def get_order_tracking(
     Raises:
         HTTPException: If order not found or unauthorized
     """
+    projection = db.get(OrderTracking, order_id)
+    if projection is not None:
+        _check_can_track(projection, current_user)
+        version = (
+            projection.current_status, projection.updated_at, projection.last_event_id,
+            projection.packer_id, projection.packer_lat, projection.packer_lng,
+        )
+    else:
+        version = timeline_version(db, order_id)
+        _check_can_track(version, current_user)
+    
+    # Fixes not yet written back move the packer without touching the row
+    packer_id = projection.packer_id if projection is not None else version.packer_id
+    fix = packer_locations.latest(packer_id) if packer_id else None
+    not_modified = check_not_modified(
+        request, response,
+        make_etag("tracking", order_id, after_id, *version, fix.recorded_at if fix else None)
+    )
+    if not_modified:
+        return not_modified
+    
+    if projection is not None:
+        return TrackingProjection.timeline(db, projection, after_id)
     order = db.query(Order).filter(Order.id == order_id).first()
+    return build_timeline(db, order, after_id)
+
+
+@router.get("/{order_id}/tracking/trail", response_model=OrderTrailResponse)
+def get_order_trail(
+    order_id: int,
+    request: Request,
+    response: Response,
+    tolerance_m: Optional[float] = Query(None, ge=0, le=10000, description="Coarsest detail to keep, in metres"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the route the packer has taken on an order.
     
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
+    Trails are stored simplified to ORDER_TRAIL_TOLERANCE_M and are up to
+    ORDER_TRAIL_FLUSH_SECONDS behind the packer. A larger tolerance returns
+    fewer points, e.g. for a small map.
     
-    if order.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to track this order"
-        )
+    Args:
+        order_id: Order ID
+        request: Incoming request
+        response: Response used to set the ETag
+        tolerance_m: Simplification tolerance; defaults to the stored one
+        current_user: Authenticated user
+        db: Database session
+        
+    Returns:
+        Trail points, oldest first
+        
+    Raises:
+        HTTPException: If order not found or unauthorized
+    """
+    version = db.query(
+        Order.user_id, OrderTrail.updated_at, OrderTrail.point_count
+    ).outerjoin(OrderTrail, OrderTrail.order_id == Order.id).filter(Order.id == order_id).first()
+    _check_can_track(version, current_user)
+    
+    tolerance = max(tolerance_m or 0.0, settings.ORDER_TRAIL_TOLERANCE_M)
+    not_modified = check_not_modified(
+        request, response,
+        make_etag("trail", order_id, tolerance, version.updated_at, version.point_count)
+    )
+    if not_modified:
+        return not_modified
     
-    # Get tracking events in chronological order
-    events = db.query(TrackingEvent).filter(
-        TrackingEvent.order_id == order_id
-    ).order_by(TrackingEvent.created_at.asc()).all()
-    
-    # Get packer info if assigned
-    packer_name = None
-    packer_phone = None
-    packer_rating = None
-    packer_lat = None
-    packer_lng = None
-    
-    if order.packer_id:
-        packer = db.query(Packer).filter(Packer.id == order.packer_id).first()
-        if packer:
-            packer_name = packer.name
-            packer_phone = packer.phone
-            packer_rating = float(packer.rating)
-            packer_lat = float(packer.lat)
-            packer_lng = float(packer.lng)
+    data = db.query(OrderTrail.points).filter(OrderTrail.order_id == order_id).scalar()
+    points = decode_points(data) if data else []
+    if tolerance > settings.ORDER_TRAIL_TOLERANCE_M:
+        points = [points[i] for i in simplify(points, tolerance)]
     
     return {
-        "order_id": order.id,
-        "current_status": order.status,
-        "packer_name": packer_name,
-        "packer_phone": packer_phone,
-        "packer_rating": packer_rating,
-        "packer_lat": packer_lat,
-        "packer_lng": packer_lng,
-        "delivery_otp": order.delivery_otp,
-        "events": events
+        "order_id": order_id,
+        "tolerance_m": tolerance,
+        "points": [
+            {"lat": point.lat, "lng": point.lng, "recorded_at": point.recorded_at}
+            for point in points
+        ],
     }
+
+
+@router.get("/{order_id}/tracking/stream")
+def stream_order_tracking(
+    order_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream an order's tracking timeline as server-sent events.
+    
+    Sends the full timeline once as a timeline event, then order_update
+    events carrying only what changed (new status, the new tracking event
+    and, on assignment, the packer's details) and packer_location events
+    while the packer is on the job. The stream ends once the order is
+    completed or cancelled. Authorization is checked when the stream opens.
+    
+    Args:
+        order_id: Order ID
+        current_user: Authenticated user
+        db: Database session
+        
+    Returns:
+        text/event-stream response
+        
+    Raises:
+        HTTPException: If order not found or unauthorized
+    """
+    _check_can_track(db.query(Order.user_id).filter(Order.id == order_id).first(), current_user)
+    
+    # Only the snapshot below reads the database, so give the connection back now
+    db.close()
+    
+    def load_timeline():
+        session = SessionLocal()
+        try:
+            projection = session.get(OrderTracking, order_id)
+            if projection is not None:
+                timeline = TrackingProjection.timeline(session, projection)
+                packer_id = projection.packer_id
+            else:
+                order = session.query(Order).filter(Order.id == order_id).one()
+                timeline = build_timeline(session, order)
+                packer_id = order.packer_id
+            return TrackingTimelineResponse.model_validate(timeline).model_dump(mode="json"), packer_id
+        finally:
+            session.close()
+    
+    def follow(subscription, packer_id):
+        topics = [order_topic(order_id)]
+        if packer_id is not None:
+            topics.append(packer_topic(packer_id))
+        broker.resubscribe(subscription, topics)
+    
+    async def events():
+        # Subscribe before taking the snapshot so no update falls in between;
+        # one that races the snapshot is at worst sent twice
+        subscription = broker.subscribe([order_topic(order_id)])
+        try:
+            timeline, packer_id = await run_in_threadpool(load_timeline)
+            follow(subscription, packer_id)
+            yield format_sse("timeline", timeline)
+            current_status = timeline["current_status"]
+            if current_status in FINAL_STATUSES:
+                return
+            while True:
+                event = await subscription.get(settings.STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield heartbeat()
+                    continue
+                # The packer's position is only shared while they work on this order
+                if event["type"] == PACKER_LOCATION and current_status not in ACTIVE_STATUSES:
+                    continue
+                if event.get("packer_id") not in (None, packer_id):
+                    packer_id = event["packer_id"]
+                    follow(subscription, packer_id)
+                current_status = event.get("current_status", current_status)
+                yield format_sse(event["type"], event)
+                if current_status in FINAL_STATUSES:
+                    return
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return event_stream_response(events())
@@ -0,0 +1,83 @@
+"""
+Benchmark 3D bin packing of multi-item orders.
+
+Packs orders of random household items and reports the time per order,
+the boxes used and how full they are, next to the one-box-per-item count
+of single-item estimates.
+
+Usage (from the backend directory):
+    python -m benchmarks.bin_packing --items 500 --budget-ms 100
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark_packnow.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from services.bin_packing import box_dimensions, count_boxes, pack_items
+
+
+def _orders(items: int, rng: np.random.Generator):
+    """Item dimensions in cm for a few kinds of order."""
+    return {
+        "small goods": rng.uniform(3, 15, (items, 3)),
+        "house shifting": np.concatenate([
+            rng.uniform(3, 12, (items * 7 // 10, 3)),
+            rng.uniform(10, 30, (items * 24 // 100, 3)),
+            rng.uniform(25, 48, (items - items * 7 // 10 - items * 24 // 100, 3)),
+        ]),
+        "books": np.tile([[24.0, 17.0, 4.0]], (items, 1)) + rng.uniform(0, 0.5, (items, 3)),
+        "cartons": np.tile([[30.0, 20.0, 15.0]], (items, 1)),
+        # Many sizes at once: free space fragments most
+        "mixed 1-40 cm": rng.uniform(1, 40, (items, 3)),
+        "mixed 1-50 cm": rng.uniform(1, 50, (items, 3)),
+    }
+
+
+def _timed(fn, repeat: int) -> float:
+    """Best wall-clock time of several runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(items: int = 500, budget_ms: float = 100.0, repeat: int = 5, seed: int = 42) -> bool:
+    """Print results for each kind of order; False if any is over budget."""
+    volumes = {name: float(np.prod(dims)) for name, dims in box_dimensions().items()}
+    largest = max(volumes.values())
+
+    print(f"{'order':>15} {'items':>6} {'ms':>8} {'boxes':>6} {'fill':>6} {'min':>5} {'1/item':>7}")
+    within_budget = True
+    for name, dimensions in _orders(items, np.random.default_rng(seed)).items():
+        dimensions = dimensions.tolist()
+        elapsed = _timed(lambda: pack_items(dimensions), repeat)
+        packed = pack_items(dimensions)
+
+        item_volume = float(np.prod(dimensions, axis=1).sum())
+        box_volume = sum(volumes[box.size] for box in packed)
+        print(
+            f"{name:>15} {len(dimensions):>6} {elapsed:>8.1f} {len(packed):>6} "
+            f"{item_volume / box_volume:>6.1%} {int(np.ceil(item_volume / largest)):>5} {len(dimensions):>7}"
+        )
+        print(f"{'':>15} {count_boxes(packed)}")
+        within_budget = within_budget and elapsed <= budget_ms
+
+    print(f"{'within' if within_budget else 'OVER'} the {budget_ms:.0f} ms budget")
+    return within_budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark 3D bin packing")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.items, args.budget_ms, args.repeat) else 1)
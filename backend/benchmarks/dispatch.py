@@ -0,0 +1,237 @@
+"""
+Benchmark dispatch against a synthetic city.
+
+Builds a fresh database with a synthetic city, then drives
+Dispatcher.find_nearest_packer and the live-order/accept routes and reports
+p50/p95/p99 latency and queries per call as JSON.
+
+Usage (from the backend directory):
+    python -m benchmarks.dispatch --packers-per-km2 5 --output results.json
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark_packnow.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from core.config import settings
+from core.constants import OrderStatus
+from models.database import Base
+from models.order import Order
+from models.packer import Packer
+from services.dispatcher import Dispatcher
+from services.geo_index import packer_index
+from services.order_pool import order_pool
+from services.live_orders import SORT_BY_AGE
+from api.routes.packers import get_live_orders, accept_order
+from benchmarks.synthetic_city import CityConfig, INVENTORY_PROFILES, populate
+
+
+class QueryCounter:
+    """Counts statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+class Recorder:
+    """Latency and query samples for one benchmarked operation."""
+
+    def __init__(self, counter: QueryCounter):
+        self.counter = counter
+        self.latencies_ms: List[float] = []
+        self.queries: List[int] = []
+        self.errors = 0
+
+    def measure(self, fn: Callable):
+        """Run fn once, recording its latency and query count."""
+        queries_before = self.counter.count
+        start = time.perf_counter()
+        try:
+            return fn()
+        except HTTPException:
+            self.errors += 1
+            return None
+        finally:
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+            self.queries.append(self.counter.count - queries_before)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.latencies_ms:
+            return {"calls": 0, "errors": self.errors}
+        latencies = np.array(self.latencies_ms)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            "calls": len(self.latencies_ms),
+            "errors": self.errors,
+            "mean_ms": round(float(latencies.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(latencies.max()), 3),
+            "queries_per_call": round(float(np.mean(self.queries)), 2),
+        }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    config: CityConfig,
+    samples: int = 200,
+    database_url: Optional[str] = None,
+) -> Dict:
+    """
+    Build a synthetic city and benchmark the dispatch paths against it.
+
+    Args:
+        config: City parameters
+        samples: Calls per benchmarked operation
+        database_url: Database to build the city in (defaults to a new
+            SQLite file in a temporary directory)
+
+    Returns:
+        Benchmark report
+    """
+    workdir = None
+    if database_url is None:
+        workdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{workdir.name}/dispatch_benchmark.db"
+
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db: Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    rng = random.Random(config.seed)
+
+    try:
+        setup_started = time.perf_counter()
+        ids = populate(db, config)
+        setup_ms = (time.perf_counter() - setup_started) * 1000
+
+        packer_index.clear()
+        order_pool.clear()
+        counter = QueryCounter(engine)
+        nearest = Recorder(counter)
+        live = Recorder(counter)
+        accept = Recorder(counter)
+
+        order_ids = rng.sample(ids["order_ids"], min(samples, len(ids["order_ids"])))
+        for order_id in order_ids:
+            order = db.get(Order, order_id)
+            nearest.measure(lambda: Dispatcher.find_nearest_packer(
+                db, order.pickup_location, order.materials_required
+            ))
+
+        online_ids = [
+            packer_id for (packer_id,) in
+            db.query(Packer.id).filter(Packer.available == True).all()
+        ]
+        packer_ids = rng.sample(online_ids, min(samples, len(online_ids)))
+        for packer_id in packer_ids:
+            packer = db.get(Packer, packer_id)
+            live_orders = live.measure(lambda: get_live_orders(
+                response=Response(), radius_km=None, sort=SORT_BY_AGE,
+                limit=settings.LIVE_ORDERS_PAGE_SIZE, cursor=None, current_packer=packer, db=db
+            ))
+
+            # Accept the newest live order, as a packer tapping the top of the feed would
+            if live_orders:
+                accept.measure(lambda: accept_order(
+                    order_id=live_orders[0].id, current_packer=packer, db=db
+                ))
+            db.expire_all()
+
+        remaining = db.query(Order).filter(Order.status == OrderStatus.CREATED).count()
+    finally:
+        db.close()
+        engine.dispose()
+        packer_index.clear()
+        order_pool.clear()
+        if workdir is not None:
+            workdir.cleanup()
+
+    return {
+        "benchmark": "dispatch",
+        "git_commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "packer_index_enabled": settings.PACKER_INDEX_ENABLED,
+        "order_pool_enabled": settings.ORDER_POOL_ENABLED,
+        "search_radius_km": settings.DEFAULT_PACKER_SEARCH_RADIUS_KM,
+        "city": config.to_dict(),
+        "setup_ms": round(setup_ms, 1),
+        "orders_left_unassigned": remaining,
+        "results": {
+            "find_nearest_packer": nearest.summary(),
+            "get_live_orders": live.summary(),
+            "accept_order": accept.summary(),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dispatch against a synthetic city")
+    defaults = CityConfig()
+    parser.add_argument("--radius-km", type=float, default=defaults.radius_km)
+    parser.add_argument("--packers-per-km2", type=float, default=defaults.packers_per_km2)
+    parser.add_argument("--online-ratio", type=float, default=defaults.online_ratio)
+    parser.add_argument("--inventory", choices=sorted(INVENTORY_PROFILES), default=defaults.inventory_profile)
+    parser.add_argument("--orders-per-minute", type=float, default=defaults.orders_per_minute)
+    parser.add_argument("--duration-minutes", type=float, default=defaults.duration_minutes)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--samples", type=int, default=200, help="Calls per operation")
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--no-index", action="store_true", help="Disable the in-memory packer index")
+    parser.add_argument("--no-pool", action="store_true", help="Disable the in-memory order pool")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.no_index:
+        settings.PACKER_INDEX_ENABLED = False
+    if args.no_pool:
+        settings.ORDER_POOL_ENABLED = False
+
+    config = CityConfig(
+        radius_km=args.radius_km,
+        packers_per_km2=args.packers_per_km2,
+        online_ratio=args.online_ratio,
+        inventory_profile=args.inventory,
+        orders_per_minute=args.orders_per_minute,
+        duration_minutes=args.duration_minutes,
+        seed=args.seed,
+    )
+    report = run(config, samples=args.samples, database_url=args.database_url)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark scalar vs vectorized haversine distance.
+
+Usage (from the backend directory):
+    python -m benchmarks.haversine
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark_packnow.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import numpy as np
+
+from core.config import settings
+from services.dispatcher import Dispatcher
+
+
+def _timed(fn, repeat: int = 5) -> float:
+    """Best wall-clock time of several runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes=(10_000, 100_000), seed: int = 42) -> None:
+    """Print timings for each candidate count."""
+    rng = random.Random(seed)
+    origin = (19.0760, 72.8777)
+    radius = settings.DEFAULT_PACKER_SEARCH_RADIUS_KM
+
+    print(f"{'candidates':>10} {'scalar ms':>10} {'vector ms':>10} {'prefilter ms':>13} {'in radius':>10}")
+    for size in sizes:
+        # Candidates spread over a ~100 km square around the origin
+        lats = np.array([origin[0] + rng.uniform(-0.5, 0.5) for _ in range(size)])
+        lngs = np.array([origin[1] + rng.uniform(-0.5, 0.5) for _ in range(size)])
+        lat_list, lng_list = lats.tolist(), lngs.tolist()
+
+        scalar_ms = _timed(lambda: [
+            Dispatcher.haversine_distance(lat, lng, *origin)
+            for lat, lng in zip(lat_list, lng_list)
+        ], repeat=1)
+        vector_ms = _timed(lambda: Dispatcher.haversine_many(origin, lats, lngs))
+        prefilter_ms = _timed(lambda: Dispatcher.haversine_many(origin, lats, lngs, radius_km=radius))
+        in_radius = int(np.count_nonzero(Dispatcher.haversine_many(origin, lats, lngs) <= radius))
+
+        print(f"{size:>10} {scalar_ms:>10.2f} {vector_ms:>10.2f} {prefilter_ms:>13.2f} {in_radius:>10}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""
+Benchmark the historical repricing simulator.
+
+Fills a throwaway SQLite database with synthetic past orders, then reprices
+all of them under candidate rules and reports the throughput and peak
+memory of the run.
+
+Usage (from the backend directory):
+    python -m benchmarks.repricing --orders 1000000 --budget-s 10
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark_packnow.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import argparse
+import json
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.constants import OrderStatus, PackagingCategory
+from models.database import Base
+from models.order import Order
+# Tables and mappers orders refer to
+from models.packer import Packer
+from models.tracking import TrackingEvent
+from models.user import User
+from services.material_estimator import MaterialEstimator
+from services.pricing_rules import pricing_rules
+from services.repricing import RepricingSimulator
+
+
+INSERT_BATCH = 20000
+
+
+def _fill(engine, orders: int, rng: np.random.Generator) -> None:
+    """Insert synthetic orders with materials from real estimates."""
+    categories = [category.value for category in PackagingCategory]
+    material_lists = []
+    for category in categories:
+        for side in (10, 25, 45, 70):
+            materials, _ = MaterialEstimator.estimate_materials(
+                category, {"length": side, "width": side * 0.8, "height": side * 0.5, "weight": 1}, "medium"
+            )
+            material_lists.append((category, materials))
+
+    start = datetime(2025, 1, 1)
+    table = Order.__table__
+    with engine.begin() as connection:
+        for offset in range(0, orders, INSERT_BATCH):
+            size = min(INSERT_BATCH, orders - offset)
+            kinds = rng.integers(0, len(material_lists), size)
+            distances = np.round(rng.gamma(2.0, 4.0, size), 2)
+            days = rng.integers(0, 365, size)
+            surges = np.where(rng.random(size) < 0.2, np.round(rng.uniform(1.0, 2.0, size), 2), 1.0)
+            prices = np.round(rng.uniform(100, 2000, size), 2)
+            connection.execute(table.insert(), [
+                {
+                    "user_id": 1,
+                    "status": OrderStatus.CANCELLED if kind % 17 == 0 else OrderStatus.COMPLETED,
+                    "category": material_lists[kind][0],
+                    "urgency": "urgent" if kind % 5 == 0 else "normal",
+                    "item_dimensions": {},
+                    "materials_required": material_lists[kind][1],
+                    "price": float(price),
+                    "distance_km": float(distance),
+                    "surge_multiplier": float(surge),
+                    "pickup_location": {},
+                    "created_at": start + timedelta(days=int(day)),
+                }
+                for kind, distance, day, surge, price in zip(
+                    kinds.tolist(), distances, days.tolist(), surges, prices
+                )
+            ])
+
+
+def run(orders: int = 1000000, budget_s: float = 10.0, seed: int = 42) -> bool:
+    """Print the simulator's throughput; False if it is over budget."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/repricing.db")
+        Base.metadata.create_all(bind=engine)
+        start = time.perf_counter()
+        _fill(engine, orders, np.random.default_rng(seed))
+        print(f"Inserted {orders} orders in {time.perf_counter() - start:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        rules = pricing_rules.build_candidate(db, price_per_km=12.0, category_multipliers={"electronics": 1.4})
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result = RepricingSimulator.simulate(db, rules)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        db.close()
+        engine.dispose()
+
+    elapsed = result["elapsed_seconds"]
+    print(f"Repriced {result['orders']} orders in {elapsed:.2f}s ({result['orders'] / elapsed:,.0f} orders/s)")
+    print(f"Peak RSS grew by {(rss_after - rss_before) / 1024:.0f} MB")
+    print(json.dumps({key: result[key] for key in ("current_revenue", "candidate_revenue", "delta_percent")}))
+    print(json.dumps(result["by_distance_band"], indent=1))
+
+    within_budget = elapsed <= budget_s
+    print(f"{'within' if within_budget else 'OVER'} the {budget_s:.0f} s budget")
+    return within_budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the repricing simulator")
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--budget-s", type=float, default=10.0)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.orders, args.budget_s) else 1)
@@ -0,0 +1,162 @@
+"""Synthetic city generator for dispatch benchmarks."""
+from typing import Dict, List
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+import math
+import random
+
+from sqlalchemy.orm import Session
+
+from core.constants import (
+    OrderStatus,
+    PackagingCategory,
+    FragilityLevel,
+    UrgencyLevel,
+    MATERIAL_TYPES,
+)
+from models.user import User
+from models.packer import Packer
+from models.order import Order
+from services.material_estimator import MaterialEstimator
+from services.pricing_engine import PricingEngine
+
+
+# Inventory profiles: (probability a material is stocked, (min, max) quantity)
+INVENTORY_PROFILES = {
+    "full": (1.0, (50, 200)),
+    "mixed": (0.7, (5, 120)),
+    "sparse": (0.35, (0, 40)),
+}
+
+
+@dataclass
+class CityConfig:
+    """Parameters of a synthetic city."""
+    center_lat: float = 19.0760
+    center_lng: float = 72.8777
+    radius_km: float = 15.0
+    packers_per_km2: float = 2.0
+    online_ratio: float = 0.8
+    inventory_profile: str = "mixed"
+    orders_per_minute: float = 20.0
+    duration_minutes: float = 60.0
+    seed: int = 42
+
+    @property
+    def area_km2(self) -> float:
+        return math.pi * self.radius_km ** 2
+
+    @property
+    def packer_count(self) -> int:
+        return max(1, int(self.packers_per_km2 * self.area_km2))
+
+    @property
+    def order_count(self) -> int:
+        return max(1, int(self.orders_per_minute * self.duration_minutes))
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["packer_count"] = self.packer_count
+        data["order_count"] = self.order_count
+        return data
+
+
+def random_point(rng: random.Random, config: CityConfig) -> Dict[str, float]:
+    """Uniform random point inside the city disc."""
+    distance = config.radius_km * math.sqrt(rng.random())
+    bearing = rng.uniform(0, 2 * math.pi)
+    dlat = distance * math.cos(bearing) / 111.32
+    dlng = distance * math.sin(bearing) / (111.32 * math.cos(math.radians(config.center_lat)))
+    return {"lat": config.center_lat + dlat, "lng": config.center_lng + dlng}
+
+
+def random_inventory(rng: random.Random, profile: str) -> Dict[str, int]:
+    """Inventory drawn from one of INVENTORY_PROFILES."""
+    stock_probability, (low, high) = INVENTORY_PROFILES[profile]
+    return {
+        name: rng.randint(low, high)
+        for name in MATERIAL_TYPES
+        if rng.random() < stock_probability
+    }
+
+
+def populate(db: Session, config: CityConfig) -> Dict[str, List[int]]:
+    """
+    Fill a database with a synthetic city.
+
+    Args:
+        db: Database session (tables must already exist)
+        config: City parameters
+
+    Returns:
+        IDs of the created packers and orders
+    """
+    rng = random.Random(config.seed)
+
+    user = User(name="Benchmark Customer", phone="+910000000000", password_hash="x")
+    db.add(user)
+    db.flush()
+
+    packers = []
+    for i in range(config.packer_count):
+        point = random_point(rng, config)
+        packers.append(Packer(
+            name=f"Packer {i}",
+            phone=f"+91{7000000000 + i}",
+            password_hash="x",
+            lat=round(point["lat"], 8),
+            lng=round(point["lng"], 8),
+            inventory=random_inventory(rng, config.inventory_profile),
+            available=rng.random() < config.online_ratio,
+            rating=rng.choice([3.5, 4.0, 4.2, 4.5, 4.8, 5.0]),
+        ))
+    db.add_all(packers)
+
+    # Orders arrive as a Poisson process over the configured window
+    started = datetime.now(timezone.utc) - timedelta(minutes=config.duration_minutes)
+    created_at = started
+    categories = list(PackagingCategory)
+    orders = []
+    for _ in range(config.order_count):
+        created_at += timedelta(minutes=rng.expovariate(config.orders_per_minute))
+        pickup = random_point(rng, config)
+        dropoff = random_point(rng, config)
+        category = rng.choice(categories)
+        fragility = rng.choice(list(FragilityLevel))
+        urgency = UrgencyLevel.URGENT if rng.random() < 0.2 else UrgencyLevel.NORMAL
+        dimensions = {
+            "length": rng.uniform(10, 60),
+            "width": rng.uniform(10, 50),
+            "height": rng.uniform(5, 40),
+            "weight": rng.uniform(0.5, 20),
+        }
+        materials, _ = MaterialEstimator.estimate_materials(category, dimensions, fragility)
+        price = PricingEngine.calculate_price(category, materials, 5.0, urgency)["final_price"]
+
+        orders.append(Order(
+            user_id=user.id,
+            status=OrderStatus.CREATED,
+            category=category.value,
+            item_dimensions=dimensions,
+            fragility_level=fragility.value,
+            urgency=urgency.value,
+            materials_required=materials,
+            price=price,
+            distance_km=5.0,
+            pickup_location={**pickup, "address": "Synthetic pickup"},
+            pickup_lat=round(pickup["lat"], 8),
+            pickup_lng=round(pickup["lng"], 8),
+            dropoff_location={**dropoff, "address": "Synthetic dropoff"},
+            receiver_name="Receiver",
+            receiver_phone="+910000000001",
+            delivery_otp="123456",
+            created_at=created_at,
+            updated_at=created_at,
+        ))
+    db.add_all(orders)
+    db.commit()
+
+    return {
+        "packer_ids": [p.id for p in packers],
+        "order_ids": [o.id for o in orders],
+    }
@@ -303,21 +303,24 @@ class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
     """
     Kong-style request size limiting plugin.
     Prevents DoS attacks via oversized payloads.
+    Bulk endpoints can be given their own limit in path_limits.
     """
 
-    def __init__(self, app, max_size_bytes: int = 1_048_576):  # 1MB default
+    def __init__(self, app, max_size_bytes: int = 1_048_576, path_limits: dict = None):  # 1MB default
         super().__init__(app)
         self.max_size_bytes = max_size_bytes
+        self.path_limits = path_limits or {}
 
     async def dispatch(self, request: Request, call_next):
         content_length = request.headers.get("Content-Length")
+        max_size = self.path_limits.get(request.url.path, self.max_size_bytes)
 
-        if content_length and int(content_length) > self.max_size_bytes:
+        if content_length and int(content_length) > max_size:
             return JSONResponse(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 content={
-                    "detail": f"Request body too large. Maximum size: {self.max_size_bytes // 1024}KB",
-                    "max_size": self.max_size_bytes
+                    "detail": f"Request body too large. Maximum size: {max_size // 1024}KB",
+                    "max_size": max_size
                 }
             )
 
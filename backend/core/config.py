@@ -45,11 +45,64 @@ class Settings(BaseSettings):
     BASE_PACKING_FEE: float = 50.0
     PRICE_PER_KM: float = 10.0
     URGENT_MULTIPLIER: float = 1.5
+    PRICING_RULES_RELOAD_SECONDS: float = 10.0  # How soon other processes pick up a published ruleset
+    SURGE_PRICING_ENABLED: bool = True
+    SURGE_CELL_SIZE_DEG: float = 0.05  # Counts cover a cell and its eight neighbours
+    SURGE_PRIOR: float = 2.0  # Added to open orders and packers before taking their ratio
+    SURGE_SENSITIVITY: float = 0.5  # Multiplier increase per unit of demand/supply ratio above 1
+    SURGE_MAX_MULTIPLIER: float = 2.0
+    SURGE_HALF_LIFE_SECONDS: float = 120.0  # How fast multipliers follow changes in the counts
+    QUOTE_EXPIRE_MINUTES: int = 15  # How long a price quote can be used to place an order
+    REPRICING_CHUNK_SIZE: int = 50000  # Orders read and repriced at a time by the repricing simulator
+    REPRICING_DISTANCE_BANDS_KM: List[float] = [2.0, 5.0, 10.0, 25.0, 50.0]  # Band edges in simulator reports
+    ORDER_MAX_ITEMS: int = 500  # Items, counting quantities, in a multi-item order
+    ESTIMATE_DIMENSION_STEP_CM: float = 0.1  # Dimensions are estimated at this resolution
+    ESTIMATE_DISTANCE_STEP_KM: float = 0.01  # Distances are priced at this resolution
+    ESTIMATE_CACHE_MAX_ENTRIES: int = 10000
+    ESTIMATE_BATCH_MAX_ITEMS: int = 50000  # Items per batch estimate, counting each item of a multi-item line
+    ESTIMATE_BATCH_MAX_PACKED_ITEMS: int = 5000  # Items of multi-item lines per batch; each line is bin packed
+    ESTIMATE_BATCH_MAX_BYTES: int = 16_777_216  # Overrides the 1MB request limit for batch estimates
     
     # Service
     DEFAULT_PACKER_SEARCH_RADIUS_KM: float = 10.0
+    LIVE_ORDERS_MAX_RADIUS_KM: float = 50.0
+    LIVE_ORDERS_PAGE_SIZE: int = 20
+    LIVE_ORDERS_MAX_PAGE_SIZE: int = 100
+    LIVE_STREAM_CELL_SIZE_DEG: float = 0.05  # Geo cell size of live order stream topics
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    ORDER_POOL_ENABLED: bool = True  # False = live feed and batch dispatch scan the orders table
+    ORDER_POOL_CELL_SIZE_DEG: float = 0.05
+    ORDER_POOL_RECONCILE_SECONDS: int = 30  # Rebuild from the database to pick up other workers' changes
     LOW_INVENTORY_THRESHOLD: int = 10
     
+    # Dispatch
+    PACKER_INDEX_ENABLED: bool = True  # False = radius queries against the database
+    PACKER_INDEX_CELL_SIZE_DEG: float = 0.05  # ~5.5 km grid cells
+    PACKER_INDEX_REFRESH_SECONDS: int = 60
+    PACKER_LOCATION_TRAIL_SIZE: int = 120  # Recent GPS fixes kept in memory per packer
+    PACKER_LOCATION_FLUSH_SECONDS: float = 2.0  # Write-behind interval for the latest fixes
+    PACKER_LOCATION_MAX_BATCH: int = 100  # Fixes accepted per upload
+    ORDER_TRAIL_TOLERANCE_M: float = 5.0  # Douglas-Peucker tolerance of stored order trails
+    ORDER_TRAIL_MAX_TAIL: int = 600  # Unsimplified fixes held in memory per order
+    ORDER_TRAIL_FLUSH_SECONDS: float = 15.0
+    TRACKING_PROJECTION_EVENTS: int = 50  # Newest tracking events embedded in each order's read model
+    BATCH_DISPATCH_ENABLED: bool = False  # Periodically auto-assign CREATED orders
+    BATCH_DISPATCH_INTERVAL_SECONDS: int = 30
+    BATCH_DISPATCH_TIME_BUDGET_SECONDS: float = 2.0
+    BATCH_DISPATCH_MAX_CANDIDATES: int = 8  # Cheapest feasible packers kept per order
+    BATCH_DISPATCH_ROUTE_CANDIDATE_FACTOR: int = 3  # With road distances, haversine picks this many times more to re-cost
+    BATCH_DISPATCH_RATING_WEIGHT_KM: float = 0.5  # Cost of each rating point below 5
+    ROAD_GRAPH_PATH: Optional[str] = None  # JSON road-graph extract, prebuilt with python -m services.road_network; haversine when unset
+    ROAD_GRAPH_MAX_SNAP_KM: float = 0.5  # Points further than this from the graph use haversine
+    DISPATCH_WORKER_ENABLED: bool = False  # Queue new orders for the dispatch worker pool
+    DISPATCH_WORKER_PROCESSES: int = 2
+    DISPATCH_WORKER_POLL_SECONDS: float = 1.0
+    DISPATCH_WORKER_BATCH_SIZE: int = 10  # Jobs claimed per poll
+    DISPATCH_JOB_MAX_ATTEMPTS: int = 10  # Then the order stays in the live pool for manual accept
+    DISPATCH_JOB_BACKOFF_SECONDS: float = 5.0  # Doubles after every failed attempt
+    DISPATCH_JOB_MAX_BACKOFF_SECONDS: float = 300.0
+    DISPATCH_JOB_LOCK_TIMEOUT_SECONDS: int = 120  # Running jobs older than this are reclaimed
+    
     def get_cors_origins(self) -> List[str]:
         """Get CORS origins as a list."""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",") if origin.strip()]
@@ -12,6 +12,18 @@ class OrderStatus(str, Enum):
     CANCELLED = "CANCELLED"
 
 
+# Statuses of orders a packer is working on
+ACTIVE_ORDER_STATUSES = (OrderStatus.PACKER_ASSIGNED, OrderStatus.ON_THE_WAY, OrderStatus.PACKED)
+
+
+class DispatchJobStatus(str, Enum):
+    """Dispatch queue job statuses."""
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
 class PackagingCategory(str, Enum):
     """Packaging service categories."""
     GIFT = "gift"
@@ -91,3 +103,4 @@ MATERIAL_TYPES = {
 # JWT token types
 TOKEN_TYPE_ACCESS = "access"
 TOKEN_TYPE_REFRESH = "refresh"
+TOKEN_TYPE_QUOTE = "quote"
@@ -0,0 +1,68 @@
+"""Conditional GET helpers."""
+from typing import Optional
+import hashlib
+
+from fastapi import Request, Response
+
+
+# Clients may cache but must revalidate with If-None-Match every time
+REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag from the values that determine a response.
+
+    Args:
+        parts: Version markers such as IDs, timestamps and statuses
+
+    Returns:
+        Quoted entity tag
+    """
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _opaque(tag: str) -> str:
+    # If-None-Match uses weak comparison, and proxies that compress the
+    # body (nginx, Apache) weaken the tag or append an encoding suffix
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ("-gzip", "-br"):
+        if tag.endswith(suffix):
+            tag = tag[:-len(suffix)]
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(tag) == target for tag in if_none_match.split(","))
+
+
+def check_not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Answer a conditional GET.
+
+    Sets the ETag on the route's response. Returns a 304 response to send
+    instead if the client already has this version, otherwise None.
+
+    Args:
+        request: Incoming request
+        response: Response the route will return
+        etag: Current ETag of the resource
+
+    Returns:
+        304 response or None
+    """
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE, "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,49 @@
+"""Server-sent event helpers."""
+from typing import AsyncIterator, Optional
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+def format_sse(event: str, data, event_id: Optional[str] = None) -> str:
+    """
+    Format one server-sent event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        event_id: Optional event ID the client echoes back as Last-Event-ID
+
+    Returns:
+        Event text, terminated by a blank line
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def heartbeat() -> str:
+    """Comment line that keeps idle connections and proxies from timing out."""
+    return ": keep-alive\n\n"
+
+
+def event_stream_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """
+    Wrap an async iterator of formatted events in a streaming response.
+
+    Content-Encoding is set to identity so GZipMiddleware passes events
+    through immediately instead of buffering them in the compressor, and
+    X-Accel-Buffering disables proxy buffering on nginx.
+    """
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Content-Encoding": "identity",
+            "X-Accel-Buffering": "no",
+        },
+    )
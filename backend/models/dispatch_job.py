@@ -0,0 +1,25 @@
+"""Dispatch queue job model."""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from models.database import Base
+
+
+class DispatchJob(Base):
+    """Model for orders waiting to be dispatched by the worker pool."""
+    
+    __tablename__ = "dispatch_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, unique=True, index=True)
+    status = Column(String(20), nullable=False, index=True)  # DispatchJobStatus enum values
+    attempts = Column(Integer, nullable=False, default=0)
+    run_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Not claimed before this time
+    locked_by = Column(String(100), nullable=True)  # Worker currently running the job
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<DispatchJob(id={self.id}, order_id={self.order_id}, status={self.status})>"
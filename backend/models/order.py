@@ -1,5 +1,5 @@
 """Order model."""
-from sqlalchemy import Column, Integer, String, DateTime, JSON, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, JSON, DECIMAL, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -10,19 +10,29 @@ class Order(Base):
     """Order model for packaging requests."""
     
     __tablename__ = "orders"
+    __table_args__ = (
+        # Live order feed: nearby CREATED orders, and CREATED orders newest first
+        Index("ix_orders_status_pickup", "status", "pickup_lat", "pickup_lng"),
+        Index("ix_orders_status_created", "status", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     packer_id = Column(Integer, ForeignKey("packers.id"), nullable=True, index=True)
     status = Column(String(50), nullable=False, index=True)  # OrderStatus enum values
     category = Column(String(100), nullable=False)  # PackagingCategory enum values
-    item_dimensions = Column(JSON, nullable=False)  # {length, width, height, weight}
+    item_dimensions = Column(JSON, nullable=False)  # {length, width, height, weight}; the largest item of multi-item orders
+    items = Column(JSON, nullable=True)  # [{length, width, height, weight, quantity}] for multi-item orders
     fragility_level = Column(String(20), nullable=True)  # FragilityLevel enum values
     urgency = Column(String(20), nullable=True)  # UrgencyLevel enum values
     materials_required = Column(JSON, nullable=False)  # {material_name: quantity}
     price = Column(DECIMAL(10, 2), nullable=False)
+    pricing_version = Column(Integer, nullable=True)  # Pricing ruleset that set the price; 0 = built-in rules
+    surge_multiplier = Column(DECIMAL(4, 2), nullable=True)  # Surge at the pickup point when the order was placed
     distance_km = Column(DECIMAL(5, 2), nullable=True)
     pickup_location = Column(JSON, nullable=False)  # {lat, lng, address}
+    pickup_lat = Column(DECIMAL(10, 8), nullable=True, index=True)  # Copied from pickup_location for radius queries
+    pickup_lng = Column(DECIMAL(11, 8), nullable=True, index=True)
     dropoff_location = Column(JSON, nullable=True)  # {lat, lng, address} - Added for delivery
     receiver_name = Column(String, nullable=True)
     receiver_phone = Column(String, nullable=True)
@@ -22,6 +22,7 @@ class Packer(Base):
     available = Column(Boolean, default=True, index=True)
     rating = Column(DECIMAL(3, 2), default=5.00)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     orders = relationship("Order", back_populates="packer")
@@ -0,0 +1,24 @@
+"""Pricing ruleset model."""
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float
+from sqlalchemy.sql import func
+
+from models.database import Base
+
+
+class PricingRuleset(Base):
+    """Model for a published version of the pricing rules; rows are never updated."""
+    
+    __tablename__ = "pricing_rulesets"
+    
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    base_packing_fee = Column(Float, nullable=False)
+    price_per_km = Column(Float, nullable=False)
+    urgent_multiplier = Column(Float, nullable=False)
+    category_multipliers = Column(JSON, nullable=False)  # {category: multiplier}
+    material_costs = Column(JSON, nullable=False)  # {material_name: unit cost}
+    note = Column(String(255), nullable=True)
+    created_by = Column(Integer, nullable=True)  # Admin ID
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<PricingRuleset(version={self.version})>"
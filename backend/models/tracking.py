@@ -1,5 +1,5 @@
 """Tracking event model."""
-from sqlalchemy import Column, Integer, String, DateTime, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, DECIMAL, Float, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -10,6 +10,10 @@ class TrackingEvent(Base):
     """Model for order tracking events."""
     
     __tablename__ = "tracking_events"
+    __table_args__ = (
+        # Timeline reads: an order's events in ID order, optionally after a cursor
+        Index("ix_tracking_events_order_id_id", "order_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
@@ -24,3 +28,37 @@ class TrackingEvent(Base):
     
     def __repr__(self):
         return f"<TrackingEvent(id={self.id}, order_id={self.order_id}, status={self.status})>"
+
+
+class OrderTracking(Base):
+    """
+    Read model of an order's tracking page.
+    
+    Written in the same transaction as the order change or tracking event it
+    reflects (see services.tracking_projection), so the tracking endpoint
+    reads one row instead of the order, its events and the packer.
+    """
+    
+    __tablename__ = "order_tracking"
+    __table_args__ = (
+        # Write-behind of packer positions to the orders they are working on
+        Index("ix_order_tracking_packer_status", "packer_id", "current_status"),
+    )
+    
+    order_id = Column(Integer, ForeignKey("orders.id"), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    current_status = Column(String(50), nullable=False)
+    packer_id = Column(Integer, nullable=True)
+    packer_name = Column(String(255), nullable=True)
+    packer_phone = Column(String(20), nullable=True)
+    packer_rating = Column(Float, nullable=True)
+    packer_lat = Column(Float, nullable=True)
+    packer_lng = Column(Float, nullable=True)
+    delivery_otp = Column(String(6), nullable=True)
+    recent_events = Column(JSON, nullable=False, default=list)  # Newest events, oldest first
+    evicted_event_id = Column(Integer, nullable=True)  # Newest event dropped from recent_events
+    last_event_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<OrderTracking(order_id={self.order_id}, status={self.current_status})>"
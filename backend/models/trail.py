@@ -0,0 +1,20 @@
+"""Order location trail model."""
+from sqlalchemy import Column, Integer, DateTime, LargeBinary, ForeignKey
+from sqlalchemy.sql import func
+
+from models.database import Base
+
+
+class OrderTrail(Base):
+    """Model for the simplified route a packer took while working on an order."""
+    
+    __tablename__ = "order_trails"
+    
+    order_id = Column(Integer, ForeignKey("orders.id"), primary_key=True)
+    points = Column(LargeBinary, nullable=False)  # Encoded by services.order_trails.encode_points
+    point_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<OrderTrail(order_id={self.order_id}, points={self.point_count})>"
@@ -1,7 +1,9 @@
 """Admin schemas for request/response validation."""
 from typing import Optional, Dict, List
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, confloat
+from datetime import date, datetime
+
+from core.constants import PackagingCategory
 
 
 class AdminLogin(BaseModel):
@@ -66,3 +68,82 @@ class OrderListItem(BaseModel):
     price: float
     distance_km: Optional[float] = None
     created_at: datetime
+
+
+class BatchDispatchResult(BaseModel):
+    """Schema for a batch dispatch run summary."""
+    orders_considered: int
+    packers_considered: int
+    assigned: int
+    elapsed_ms: float
+
+
+class EstimateCacheStats(BaseModel):
+    """Schema for estimate cache statistics."""
+    size: int
+    max_entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    invalidations: int
+
+
+class PricingRuleChanges(BaseModel):
+    """Schema for changes to the pricing rules; omitted fields keep their current values."""
+    base_packing_fee: Optional[confloat(ge=0)] = None
+    price_per_km: Optional[confloat(ge=0)] = None
+    urgent_multiplier: Optional[confloat(ge=1)] = None
+    category_multipliers: Optional[Dict[PackagingCategory, confloat(gt=0)]] = None
+    material_costs: Optional[Dict[str, confloat(ge=0)]] = None
+
+
+class PricingRulesetCreate(PricingRuleChanges):
+    """Schema for publishing a pricing ruleset."""
+    note: Optional[str] = Field(None, max_length=255)
+
+
+class PricingSimulationRequest(PricingRuleChanges):
+    """Schema for repricing past orders under candidate rules."""
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+
+class RevenueDelta(BaseModel):
+    """Schema for the revenue of a group of orders before and after repricing."""
+    key: str
+    orders: int
+    current_revenue: float
+    candidate_revenue: float
+    delta: float
+    delta_percent: float
+
+
+class PricingSimulationResult(BaseModel):
+    """Schema for the revenue impact of candidate pricing rules."""
+    base_version: int  # Ruleset the candidate changes were applied to
+    orders: int
+    current_revenue: float
+    candidate_revenue: float
+    delta: float
+    delta_percent: float
+    by_category: List[RevenueDelta]
+    by_day: List[RevenueDelta]
+    by_distance_band: List[RevenueDelta]
+    elapsed_seconds: float
+
+
+class PricingRulesetResponse(BaseModel):
+    """Schema for a published pricing ruleset."""
+    version: int
+    base_packing_fee: float
+    price_per_km: float
+    urgent_multiplier: float
+    category_multipliers: Dict[str, float]
+    material_costs: Dict[str, float]
+    note: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -1,8 +1,9 @@
 """Order schemas for request/response validation."""
-from typing import Optional, Dict
-from pydantic import BaseModel, confloat, conint
+from typing import Optional, Dict, List
+from pydantic import BaseModel, Field, confloat, conint, model_validator
 from datetime import datetime
 
+from core.config import settings
 from core.constants import PackagingCategory, FragilityLevel, UrgencyLevel, OrderStatus
 
 
@@ -14,6 +15,31 @@ class ItemDimensions(BaseModel):
     weight: confloat(gt=0)  # kg
 
 
+class OrderItem(ItemDimensions):
+    """Schema for one line of a multi-item order."""
+    quantity: conint(ge=1) = 1
+
+
+class ItemsMixin(BaseModel):
+    """Either a single item's dimensions or the items of a multi-item order."""
+    item_dimensions: Optional[ItemDimensions] = None
+    items: Optional[List[OrderItem]] = Field(None, min_length=1)
+    
+    @model_validator(mode="after")
+    def check_items(self):
+        if self.items is None:
+            if self.item_dimensions is None:
+                raise ValueError("item_dimensions or items is required")
+            return self
+        if sum(item.quantity for item in self.items) > settings.ORDER_MAX_ITEMS:
+            raise ValueError(f"At most {settings.ORDER_MAX_ITEMS} items per order")
+        if self.item_dimensions is None:
+            # The largest item stands in for single-item consumers
+            largest = max(self.items, key=lambda item: item.length * item.width * item.height)
+            self.item_dimensions = ItemDimensions(**largest.model_dump(exclude={"quantity"}))
+        return self
+
+
 class Location(BaseModel):
     """Schema for location data."""
     lat: float
@@ -21,16 +47,17 @@ class Location(BaseModel):
     address: str
 
 
-class OrderCreate(BaseModel):
+class OrderCreate(ItemsMixin):
     """Schema for creating an order."""
     category: PackagingCategory
-    item_dimensions: ItemDimensions
     fragility_level: Optional[FragilityLevel] = FragilityLevel.LOW
     urgency: Optional[UrgencyLevel] = UrgencyLevel.NORMAL
     pickup_location: Location
     dropoff_location: Optional[Location] = None
     receiver_name: str
     receiver_phone: str
+    distance_km: confloat(ge=0) = 0  # Pickup to dropoff, calculated by the frontend
+    quote_token: Optional[str] = None  # From /estimate/price; reused if the inputs match
 
 
 class OrderResponse(BaseModel):
@@ -41,10 +68,13 @@ class OrderResponse(BaseModel):
     status: OrderStatus
     category: str
     item_dimensions: Dict
+    items: Optional[List[Dict]] = None
     fragility_level: Optional[str]
     urgency: Optional[str]
     materials_required: Dict[str, float]
     price: float
+    pricing_version: Optional[int] = None
+    surge_multiplier: Optional[float] = None
     distance_km: Optional[float]
     pickup_location: Dict
     dropoff_location: Optional[Dict] = None
@@ -63,10 +93,9 @@ class OrderStatusUpdate(BaseModel):
     status: OrderStatus
 
 
-class MaterialEstimateRequest(BaseModel):
+class MaterialEstimateRequest(ItemsMixin):
     """Schema for material estimation request."""
     category: PackagingCategory
-    item_dimensions: ItemDimensions
     fragility_level: Optional[FragilityLevel] = FragilityLevel.LOW
 
 
@@ -74,16 +103,17 @@ class MaterialEstimateResponse(BaseModel):
     """Schema for material estimation response."""
     materials: Dict[str, float]
     material_cost: float
-    estimated_box_size: str
+    estimated_box_size: str  # Largest box used by a multi-item order
+    boxes: Optional[Dict[str, int]] = None  # Boxes of each size, for multi-item orders
 
 
-class PriceEstimateRequest(BaseModel):
+class PriceEstimateRequest(ItemsMixin):
     """Schema for price estimation request."""
     category: PackagingCategory
-    item_dimensions: ItemDimensions
     fragility_level: Optional[FragilityLevel] = FragilityLevel.LOW
     urgency: Optional[UrgencyLevel] = UrgencyLevel.NORMAL
     distance_km: confloat(ge=0) = 0
+    pickup_location: Optional[Location] = None  # Prices include surge at the pickup point when given
 
 
 class PriceEstimateResponse(BaseModel):
@@ -93,4 +123,8 @@ class PriceEstimateResponse(BaseModel):
     distance_charge: float
     urgency_multiplier: float
     category_multiplier: float
+    surge_multiplier: float = 1.0
     final_price: float
+    pricing_version: int  # Pricing ruleset the price was computed with
+    quote_token: Optional[str] = None  # Pass to order creation to keep this price
+    quote_expires_at: Optional[datetime] = None
@@ -1,6 +1,6 @@
 """Packer schemas for request/response validation."""
-from typing import Optional, Dict
-from pydantic import BaseModel, EmailStr, constr, condecimal
+from typing import Optional, Dict, List
+from pydantic import BaseModel, EmailStr, Field, constr, condecimal, confloat
 from datetime import datetime
 
 
@@ -37,6 +37,27 @@ class PackerLocationUpdate(BaseModel):
     """Schema for updating packer location."""
     lat: condecimal(max_digits=10, decimal_places=8)
     lng: condecimal(max_digits=11, decimal_places=8)
+    recorded_at: Optional[datetime] = None  # Device time of the fix; without it the fix stays out of the trail
+
+
+class LocationPing(BaseModel):
+    """Schema for one GPS fix."""
+    lat: confloat(ge=-90, le=90)
+    lng: confloat(ge=-180, le=180)
+    recorded_at: Optional[datetime] = None  # Device time of the fix; defaults to arrival time
+
+
+class LocationPingBatch(BaseModel):
+    """Schema for a batch of GPS fixes."""
+    pings: List[LocationPing] = Field(..., min_length=1)
+
+
+class LocationPingResult(BaseModel):
+    """Schema for the result of a GPS upload."""
+    accepted: int
+    lat: float
+    lng: float
+    recorded_at: datetime
 
 
 class PackerAvailabilityUpdate(BaseModel):
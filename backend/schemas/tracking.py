@@ -29,3 +29,18 @@ class TrackingTimelineResponse(BaseModel):
     packer_lng: Optional[float] = None
     delivery_otp: Optional[str] = None
     events: List[TrackingEventResponse]
+    next_cursor: Optional[int] = None  # Pass as after_id to fetch only newer events
+
+
+class TrailPointResponse(BaseModel):
+    """Schema for one point of a packer's route."""
+    lat: float
+    lng: float
+    recorded_at: datetime
+
+
+class OrderTrailResponse(BaseModel):
+    """Schema for the route a packer took on an order."""
+    order_id: int
+    tolerance_m: float
+    points: List[TrailPointResponse]
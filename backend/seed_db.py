@@ -7,8 +7,12 @@ from models.order import Order
 from models.material import Material
 from models.admin import Admin
 from models.tracking import TrackingEvent
+from models.dispatch_job import DispatchJob
+from models.trail import OrderTrail
+from models.pricing import PricingRuleset
 from core.security import hash_password
 from core.constants import MATERIAL_TYPES, MaterialUnit
+from services.pricing_rules import pricing_rules
 
 
 def seed_materials():
@@ -34,6 +38,19 @@ def seed_materials():
     db.close()
 
 
+def seed_pricing_rules():
+    """Publish the first pricing ruleset from the built-in rules and materials table."""
+    db = SessionLocal()
+    
+    print("Seeding pricing rules...")
+    
+    if db.query(PricingRuleset).count() == 0:
+        pricing_rules.publish(db, note="Initial rules")
+    
+    print(f"✅ Seeded pricing ruleset v{pricing_rules.current().version}")
+    db.close()
+
+
 def seed_packers():
     """Seed packers table with demo packers."""
     db = SessionLocal()
@@ -164,6 +181,7 @@ if __name__ == "__main__":
     print("✅ Database initialized")
     
     seed_materials()
+    seed_pricing_rules()
     seed_packers()
     seed_admin()
     
@@ -0,0 +1,312 @@
+"""Batch dispatch service for assigning many orders at once."""
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from models.packer import Packer
+from core.config import settings
+from core.constants import OrderStatus
+from services.dispatcher import Dispatcher
+from services.geo_index import KM_PER_DEGREE
+from services.inventory_matrix import encode_many, unknown_materials
+from services.road_network import get_distance_provider, RoadDistanceProvider
+from services.live_orders import publish_order_removed, ORDER_CLAIMED
+from services.order_pool import order_pool
+from services.packer_locations import packer_locations
+
+
+# Orders scored against packers per haversine matrix chunk
+ORDER_CHUNK_SIZE = 256
+
+
+class BatchDispatcher:
+    """
+    Service for assigning all waiting orders to packers in one pass.
+
+    Greedy one-at-a-time dispatch lets an early order take the only packer a
+    later order could use. Batch dispatch instead solves a min-cost bipartite
+    matching between CREATED orders and available packers, where an edge
+    exists only if the packer is within the search radius and has enough
+    inventory for the order.
+    """
+
+    @staticmethod
+    def build_candidates(
+        orders: List[Order],
+        packers: List[Packer],
+        deadline: float
+    ) -> List[List[Tuple[int, float, float]]]:
+        """
+        Find the cheapest feasible packers for every order.
+
+        Args:
+            orders: Orders waiting for a packer
+            packers: Available packers
+            deadline: time.monotonic() value after which to stop adding edges
+
+        Returns:
+            For each order, a list of (packer index, cost, distance) edges
+        """
+        candidates: List[List[Tuple[int, float, float]]] = [[] for _ in orders]
+        if not orders or not packers:
+            return candidates
+
+        radius = settings.DEFAULT_PACKER_SEARCH_RADIUS_KM
+        max_edges = settings.BATCH_DISPATCH_MAX_CANDIDATES
+        road_network = isinstance(get_distance_provider(), RoadDistanceProvider)
+        if road_network:
+            # A packer outside the haversine top K can still be cheaper by road
+            max_edges *= settings.BATCH_DISPATCH_ROUTE_CANDIDATE_FACTOR
+        band = radius / KM_PER_DEGREE
+
+        # Sort both sides by latitude so each chunk of orders only needs to be
+        # scored against the band of packers that can be within the radius
+        order_lats = np.array([o.pickup_location["lat"] for o in orders], dtype=np.float64)
+        order_lngs = np.array([o.pickup_location["lng"] for o in orders], dtype=np.float64)
+        order_by_lat = np.argsort(order_lats, kind="stable")
+
+        positions = np.array([packer_locations.position(p) for p in packers], dtype=np.float64)
+        packer_lats = positions[:, 0]
+        packer_by_lat = np.argsort(packer_lats, kind="stable")
+        sorted_packer_lats = packer_lats[packer_by_lat]
+        sorted_packer_lngs = positions[:, 1][packer_by_lat]
+
+        # Inventories and requirements as dense vectors so feasibility against
+        # every in-range packer is one comparison per order
+        packer_stock = encode_many(p.inventory for p in packers)[packer_by_lat]
+        order_needs = order_pool.requirements_for(orders)
+
+        # Cost in km-equivalents: distance plus a penalty per rating point below 5
+        rating_penalty = settings.BATCH_DISPATCH_RATING_WEIGHT_KM * (5.0 - np.array([
+            float(p.rating if p.rating is not None else 5.0) for p in packers
+        ]))[packer_by_lat]
+
+        for start in range(0, len(orders), ORDER_CHUNK_SIZE):
+            if time.monotonic() > deadline:
+                break
+
+            chunk = order_by_lat[start:start + ORDER_CHUNK_SIZE]
+            chunk_lats = order_lats[chunk]
+            lo = int(np.searchsorted(sorted_packer_lats, chunk_lats[0] - band, side="left"))
+            hi = int(np.searchsorted(sorted_packer_lats, chunk_lats[-1] + band, side="right"))
+            if lo >= hi:
+                continue
+
+            distances = np.round(Dispatcher.haversine_matrix(
+                chunk_lats, order_lngs[chunk], sorted_packer_lats[lo:hi], sorted_packer_lngs[lo:hi]
+            ), 2)
+            costs = distances + rating_penalty[None, lo:hi]
+            costs[distances > radius] = np.inf
+
+            for row, order_idx in enumerate(chunk.tolist()):
+                in_range = np.flatnonzero(np.isfinite(costs[row]))
+                if in_range.size == 0:
+                    continue
+
+                required = orders[order_idx].materials_required
+                feasible = (packer_stock[lo + in_range] >= order_needs[order_idx]).all(axis=1)
+                in_range = in_range[feasible]
+
+                # Keep the cheapest few packers that have the inventory
+                ordered = in_range[np.argsort(costs[row, in_range], kind="stable")]
+                check_extras = bool(unknown_materials(required))
+                edges = candidates[order_idx]
+                for column in ordered.tolist():
+                    packer_idx = int(packer_by_lat[lo + column])
+                    if check_extras and not Dispatcher.check_inventory_sufficient(
+                        packers[packer_idx].inventory, required
+                    ):
+                        continue
+                    edges.append((packer_idx, float(costs[row, column]), float(distances[row, column])))
+                    if len(edges) >= max_edges:
+                        break
+
+        if road_network:
+            BatchDispatcher._apply_route_distances(candidates, orders, positions, deadline)
+
+        return candidates
+
+    @staticmethod
+    def _apply_route_distances(
+        candidates: List[List[Tuple[int, float, float]]],
+        orders: List[Order],
+        positions: np.ndarray,
+        deadline: float
+    ) -> None:
+        """
+        Re-cost candidate edges with road distances from packer to pickup.
+
+        The haversine cut can drop a packer that is cheaper by road than one
+        it kept, so candidates come in BATCH_DISPATCH_ROUTE_CANDIDATE_FACTOR
+        times wider than BATCH_DISPATCH_MAX_CANDIDATES and the cheapest by
+        road cost are kept. Each order is one query against its own
+        candidates. Orders not reached by the deadline keep haversine costs.
+
+        Args:
+            candidates: For each order, (packer index, cost, distance) edges
+                sorted by haversine cost; replaced in place
+            orders: Orders the candidates belong to
+            positions: (lat, lng) of every packer, by packer index
+            deadline: time.monotonic() value after which to stop re-costing
+        """
+        max_edges = settings.BATCH_DISPATCH_MAX_CANDIDATES
+        for order_idx, edges in enumerate(candidates):
+            if not edges or time.monotonic() > deadline:
+                candidates[order_idx] = edges[:max_edges]
+                continue
+
+            pickup = orders[order_idx].pickup_location
+            distances = Dispatcher.route_distance_matrix(
+                [tuple(positions[packer_idx].tolist()) for packer_idx, _, _ in edges],
+                [(pickup["lat"], pickup["lng"])]
+            )[:, 0]
+            recosted = []
+            for (packer_idx, cost, distance), road in zip(edges, distances.tolist()):
+                road = round(road, 2)
+                recosted.append((packer_idx, cost - distance + road, road))
+            recosted.sort(key=lambda edge: edge[1])
+            candidates[order_idx] = recosted[:max_edges]
+
+    @staticmethod
+    def solve(
+        candidates: List[List[Tuple[int, float, float]]],
+        deadline: float,
+        epsilon: float = 0.01
+    ) -> Dict[int, int]:
+        """
+        Match as many orders as possible to packers at minimum total cost.
+
+        Uses the auction algorithm: unassigned orders bid for their best packer
+        and outbid orders re-enter the queue. The result is within ``epsilon``
+        per order of the optimum for the candidate edges. If the deadline
+        passes first, the remaining orders are filled greedily with packers
+        that are still free.
+
+        Args:
+            candidates: For each order, a list of (packer index, cost, distance) edges
+            deadline: time.monotonic() value at which to stop bidding
+            epsilon: Minimum bid increment
+
+        Returns:
+            Mapping of order index to packer index
+        """
+        edge_costs = [cost for edges in candidates for _, cost, _ in edges]
+        if not edge_costs:
+            return {}
+
+        queue = deque(order_idx for order_idx, edges in enumerate(candidates) if edges)
+
+        # An edge is worth ceiling - cost and leaving an order unassigned is
+        # worth 0. A ceiling of twice the largest cost means an order is only
+        # dropped when serving it would force a much worse total, which
+        # favours serving more orders without long price wars.
+        ceiling = 2 * max(edge_costs) + 1.0
+        prices: Dict[int, float] = {}
+        owner: Dict[int, int] = {}
+        assignment: Dict[int, int] = {}
+
+        bids = 0
+        while queue:
+            bids += 1
+            if bids % 256 == 0 and time.monotonic() > deadline:
+                break
+
+            order_idx = queue.popleft()
+            best_packer: Optional[int] = None
+            best_value = second_value = float("-inf")
+
+            for packer_idx, cost, _ in candidates[order_idx]:
+                value = ceiling - cost - prices.get(packer_idx, 0.0)
+                if value > best_value:
+                    second_value = best_value
+                    best_packer, best_value = packer_idx, value
+                elif value > second_value:
+                    second_value = value
+
+            # Staying unassigned is worth 0
+            if best_packer is None or best_value <= 0:
+                continue
+            second_value = max(second_value, 0.0)
+
+            prices[best_packer] = prices.get(best_packer, 0.0) + best_value - second_value + epsilon
+            previous = owner.get(best_packer)
+            owner[best_packer] = order_idx
+            assignment[order_idx] = best_packer
+            if previous is not None:
+                del assignment[previous]
+                queue.append(previous)
+
+        # Out of time: hand the leftovers their cheapest free packer
+        for order_idx in sorted(queue, key=lambda o: candidates[o][0][1]):
+            if order_idx in assignment:
+                continue
+            for packer_idx, _, _ in candidates[order_idx]:
+                if packer_idx not in owner:
+                    owner[packer_idx] = order_idx
+                    assignment[order_idx] = packer_idx
+                    break
+
+        return assignment
+
+    @staticmethod
+    def run(db: Session, time_budget_seconds: Optional[float] = None) -> Dict[str, float]:
+        """
+        Assign all waiting orders to packers in one batch.
+
+        On Postgres, orders are locked with SKIP LOCKED while the matching is
+        solved, so concurrent runs in other workers work on disjoint orders.
+        Each assignment then claims its order conditionally, so an order a
+        packer accepted in the meantime is skipped rather than reassigned.
+
+        Args:
+            db: Database session
+            time_budget_seconds: Time allowed for building and solving the
+                matching (defaults to BATCH_DISPATCH_TIME_BUDGET_SECONDS)
+
+        Returns:
+            Summary of the run
+        """
+        started = time.monotonic()
+        budget = (
+            time_budget_seconds
+            if time_budget_seconds is not None
+            else settings.BATCH_DISPATCH_TIME_BUDGET_SECONDS
+        )
+        deadline = started + budget
+
+        query = db.query(Order).filter(Order.status == OrderStatus.CREATED)
+        if settings.ORDER_POOL_ENABLED:
+            # Only lock the orders this process knows are waiting; orders
+            # created through other workers join after the next reconcile
+            order_pool.ensure_fresh(db)
+            pooled_ids = order_pool.order_ids()
+            query = query.filter(Order.id.in_(pooled_ids)) if pooled_ids else None
+        orders = query.order_by(
+            Order.created_at.asc()
+        ).with_for_update(skip_locked=True).all() if query is not None else []
+        packers = db.query(Packer).filter(Packer.available == True).all() if orders else []
+
+        candidates = BatchDispatcher.build_candidates(orders, packers, deadline)
+        assignment = BatchDispatcher.solve(candidates, deadline)
+
+        # Release locks on orders that stay unassigned; each assignment below
+        # re-checks the order status as part of claiming it
+        db.commit()
+
+        assigned = 0
+        for order_idx, packer_idx in assignment.items():
+            distance = next(d for p, _, d in candidates[order_idx] if p == packer_idx)
+            if Dispatcher.assign_order(db, orders[order_idx], packers[packer_idx], distance):
+                publish_order_removed(orders[order_idx], ORDER_CLAIMED)
+                assigned += 1
+
+        return {
+            "orders_considered": len(orders),
+            "packers_considered": len(packers),
+            "assigned": assigned,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 2),
+        }
@@ -0,0 +1,254 @@
+"""3D bin packing of order items into boxes."""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import itertools
+
+from core.constants import BOX_SIZES
+
+
+# Slack for float comparisons, in cm
+_TOLERANCE = 1e-6
+
+# Free cuboids kept per box, bounding the work of each placement
+_MAX_FREE_SPACES = 32
+
+Dimensions = Tuple[float, float, float]
+
+
+def box_dimensions(box_sizes: Optional[Dict[str, dict]] = None) -> Dict[str, Dimensions]:
+    """
+    Inner dimensions of each box size, smallest box first.
+
+    Args:
+        box_sizes: Box definitions like BOX_SIZES; BOX_SIZES if None
+
+    Returns:
+        Dictionary of box size name to (length, width, height) in cm
+    """
+    box_sizes = BOX_SIZES if box_sizes is None else box_sizes
+    dimensions = {
+        name: tuple(float(value) for value in spec["dimensions"].split("x"))
+        for name, spec in box_sizes.items()
+    }
+    return dict(sorted(dimensions.items(), key=lambda item: item[1][0] * item[1][1] * item[1][2]))
+
+
+class PackedBox(NamedTuple):
+    """A box and the items packed into it."""
+    size: str
+    items: List[int]  # Indices into the packed items
+    positions: List[Tuple[float, float, float, float, float, float]]  # x, y, z, length, width, height
+
+
+class _Item(NamedTuple):
+    index: int
+    volume: float
+    sorted_dims: Dimensions
+    orientations: List[Dimensions]
+
+
+class _Box:
+    """
+    A box being filled.
+
+    Free space is kept as disjoint cuboids. An item goes into the corner of
+    the lowest free cuboid that holds it, and the rest of that cuboid is cut
+    into three smaller ones (see _split), so placement never has to test
+    for overlaps. At most _MAX_FREE_SPACES cuboids are kept, the largest.
+    """
+
+    __slots__ = ("dimensions", "free_volume", "largest_space", "spaces", "items", "positions", "failed")
+
+    def __init__(self, dimensions: Dimensions):
+        self.dimensions = dimensions
+        self.free_volume = dimensions[0] * dimensions[1] * dimensions[2]
+        # Volume of the largest free cuboid; no larger item can be placed
+        self.largest_space = self.free_volume
+        self.spaces: List[Tuple[float, ...]] = [(0.0, 0.0, 0.0) + tuple(dimensions)]
+        self.items: List[int] = []
+        self.positions: List[Tuple[float, ...]] = []
+        # Sorted dimensions of items that did not fit; anything as large fails too
+        self.failed: List[Dimensions] = []
+
+    def place(self, item: _Item, min_side: float, min_volume: float) -> bool:
+        """
+        Place an item if it fits.
+
+        Args:
+            item: Item to place
+            min_side: Smallest side of any item still to pack; thinner spaces are dropped
+            min_volume: Smallest volume of any item still to pack
+
+        Returns:
+            True if the item was placed
+        """
+        if item.volume > self.largest_space + _TOLERANCE:
+            return False
+        a, b, c = item.sorted_dims
+        for fa, fb, fc in self.failed:
+            if a >= fa - _TOLERANCE and b >= fb - _TOLERANCE and c >= fc - _TOLERANCE:
+                return False
+
+        spaces = self.spaces
+        for position, (x, y, z, length, width, height) in enumerate(spaces):
+            if length * width * height + _TOLERANCE < item.volume:
+                continue
+            # Of the rotations that fit, keep the one leaving the largest single cuboid
+            best = None
+            for l, w, h in item.orientations:
+                if l <= length + _TOLERANCE and w <= width + _TOLERANCE and h <= height + _TOLERANCE:
+                    leftover = max((length - l) * width * height, (width - w) * l * height, (height - h) * l * w)
+                    if best is None or leftover > best[0]:
+                        best = (leftover, l, w, h)
+            if best is None:
+                continue
+
+            _, l, w, h = best
+            del spaces[position]
+            for space in _split(x, y, z, length, width, height, l, w, h):
+                if (
+                    space[3] >= min_side and space[4] >= min_side and space[5] >= min_side
+                    and space[3] * space[4] * space[5] >= min_volume
+                ):
+                    spaces.append(space)
+            if len(spaces) > _MAX_FREE_SPACES:
+                # The smallest cuboids are the least likely to take an item
+                spaces.sort(key=lambda space: -space[3] * space[4] * space[5])
+                del spaces[_MAX_FREE_SPACES:]
+            # Bottom layer first, then back to front, then left to right
+            spaces.sort(key=lambda space: (space[2], space[1], space[0]))
+            self.largest_space = max((space[3] * space[4] * space[5] for space in spaces), default=0.0)
+            self.free_volume -= item.volume
+            self.items.append(item.index)
+            self.positions.append((x, y, z, l, w, h))
+            return True
+
+        # Failures this one covers are dropped, keeping the list short
+        self.failed = [
+            (fa, fb, fc) for fa, fb, fc in self.failed
+            if not (fa >= a - _TOLERANCE and fb >= b - _TOLERANCE and fc >= c - _TOLERANCE)
+        ]
+        self.failed.append(item.sorted_dims)
+        return False
+
+
+def _split(x, y, z, length, width, height, l, w, h) -> Tuple[Tuple[float, ...], ...]:
+    """
+    Cut the rest of a free cuboid around an item in its corner into three.
+
+    Of the guillotine cuts tried, the one leaving the largest single cuboid
+    wins, which keeps room for the larger items still to come.
+    """
+    cuts = (
+        ((x + l, y, z, length - l, width, height), (x, y + w, z, l, width - w, height),
+         (x, y, z + h, l, w, height - h)),
+        ((x, y, z + h, length, width, height - h), (x + l, y, z, length - l, width, h),
+         (x, y + w, z, l, width - w, h)),
+        ((x, y, z + h, length, width, height - h), (x, y + w, z, length, width - w, h),
+         (x + l, y, z, length - l, w, h)),
+        ((x + l, y, z, length - l, width, height), (x, y, z + h, l, width, height - h),
+         (x, y + w, z, l, width - w, h)),
+    )
+    return max(cuts, key=lambda cut: max(space[3] * space[4] * space[5] for space in cut))
+
+
+def _orientations(dimensions: Dimensions) -> List[Dimensions]:
+    """Distinct axis-aligned rotations of an item."""
+    return sorted(set(itertools.permutations(dimensions)))
+
+
+def _fits(sorted_dims: Dimensions, box: Dimensions) -> bool:
+    return all(side <= limit + _TOLERANCE for side, limit in zip(sorted_dims, sorted(box)))
+
+
+def _pack_into(box: Dimensions, items: List[_Item]) -> Optional[_Box]:
+    """Pack items into a single box, or None if they do not all fit."""
+    min_side = min(item.sorted_dims[0] for item in items)
+    min_volume = min(item.volume for item in items)
+    packed = _Box(box)
+    for item in items:
+        if not packed.place(item, min_side, min_volume):
+            return None
+    return packed
+
+
+def pack_items(dimensions: Sequence[Sequence[float]], box_sizes: Optional[Dict[str, dict]] = None) -> List[PackedBox]:
+    """
+    Pack items into as few, then as small, boxes as the heuristic finds.
+
+    First-fit decreasing: items are taken largest first and each goes into
+    the first box it fits, in the rotation that leaves the most room, else
+    into a new box of the largest size. Boxes are skipped without looking
+    at their free space when their largest free cuboid is too small or a
+    no-larger item already failed to fit. Afterwards each box is moved to
+    the smallest size its items repack into.
+
+    Items too large for every box in every rotation get a largest box of
+    their own, as single-item estimates do.
+
+    Args:
+        dimensions: Length, width and height in cm of each item
+        box_sizes: Box definitions like BOX_SIZES; BOX_SIZES if None
+
+    Returns:
+        Packed boxes, in the order they were opened
+    """
+    sizes = box_dimensions(box_sizes)
+    names = list(sizes)
+    largest = names[-1]
+
+    items = []
+    for index, item_dims in enumerate(dimensions):
+        item_dims = tuple(float(side) for side in item_dims)
+        items.append(_Item(
+            index, item_dims[0] * item_dims[1] * item_dims[2], tuple(sorted(item_dims)), _orientations(item_dims)
+        ))
+    if not items:
+        return []
+    # Largest first; ties by longest side so long items claim floor space early
+    items.sort(key=lambda item: (-item.volume, -item.sorted_dims[2], item.index))
+    min_side = min(item.sorted_dims[0] for item in items)
+    min_volume = min(item.volume for item in items)
+
+    boxes: List[Tuple[str, _Box]] = []
+    for item in items:
+        if not _fits(item.sorted_dims, sizes[largest]):
+            oversize = _Box(sizes[largest])
+            oversize.spaces, oversize.free_volume, oversize.largest_space = [], 0.0, 0.0
+            oversize.items.append(item.index)
+            oversize.positions.append((0.0, 0.0, 0.0) + tuple(item.orientations[0]))
+            boxes.append((largest, oversize))
+            continue
+
+        for _, box in boxes:
+            if box.place(item, min_side, min_volume):
+                break
+        else:
+            box = _Box(sizes[largest])
+            box.place(item, min_side, min_volume)
+            boxes.append((largest, box))
+
+    by_index = {item.index: item for item in items}
+    result = []
+    for name, box in boxes:
+        contents = [by_index[index] for index in box.items]
+        used = sum(item.volume for item in contents)
+        for smaller in names[:-1]:
+            dims = sizes[smaller]
+            if dims[0] * dims[1] * dims[2] + _TOLERANCE < used:
+                continue
+            if not all(_fits(item.sorted_dims, dims) for item in contents):
+                continue
+            repacked = _pack_into(dims, contents)
+            if repacked is not None:
+                name, box = smaller, repacked
+                break
+        result.append(PackedBox(name, box.items, box.positions))
+    return result
+
+
+def count_boxes(packed: List[PackedBox]) -> Dict[str, int]:
+    """Number of boxes of each size."""
+    counts: Dict[str, int] = {}
+    for box in packed:
+        counts[box.size] = counts.get(box.size, 0) + 1
+    return counts
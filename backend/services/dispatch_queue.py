@@ -0,0 +1,166 @@
+"""Persistent dispatch queue."""
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+import random
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from models.dispatch_job import DispatchJob
+from models.order import Order
+from core.config import settings
+from core.constants import DispatchJobStatus, OrderStatus
+from services.dispatcher import Dispatcher
+
+
+class DispatchQueue:
+    """
+    Service for queueing orders for automatic dispatch.
+
+    Jobs live in the dispatch_jobs table so they survive restarts. Workers
+    claim them with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    worker processes can poll the same table without handing out a job
+    twice, and a job whose worker died is reclaimed after the lock timeout.
+    """
+
+    @staticmethod
+    def enqueue(db: Session, order_id: int, delay_seconds: float = 0) -> DispatchJob:
+        """
+        Queue an order for dispatch.
+
+        Does not commit, so the job can be written in the same transaction
+        as the order.
+
+        Args:
+            db: Database session
+            order_id: Order ID
+            delay_seconds: Earliest time to try, relative to now
+
+        Returns:
+            The new job
+        """
+        job = DispatchJob(
+            order_id=order_id,
+            status=DispatchJobStatus.PENDING,
+            attempts=0,
+            run_at=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+        )
+        db.add(job)
+        return job
+
+    @staticmethod
+    def backoff_seconds(attempts: int) -> float:
+        """
+        Delay before retrying a job.
+
+        Args:
+            attempts: Attempts made so far
+
+        Returns:
+            Exponential delay with +/-20% jitter, capped at DISPATCH_JOB_MAX_BACKOFF_SECONDS
+        """
+        delay = settings.DISPATCH_JOB_BACKOFF_SECONDS * 2 ** max(0, attempts - 1)
+        delay = min(delay, settings.DISPATCH_JOB_MAX_BACKOFF_SECONDS)
+        return delay * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def claim(db: Session, worker_id: str, limit: int) -> List[DispatchJob]:
+        """
+        Claim due jobs for a worker.
+
+        Commits the session, releasing the row locks; the RUNNING status then
+        keeps other workers away until the lock timeout passes.
+
+        Args:
+            db: Database session
+            worker_id: Identifier of the claiming worker
+            limit: Maximum jobs to claim
+
+        Returns:
+            Claimed jobs
+        """
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=settings.DISPATCH_JOB_LOCK_TIMEOUT_SECONDS)
+
+        jobs = db.query(DispatchJob).filter(
+            or_(
+                and_(DispatchJob.status == DispatchJobStatus.PENDING, DispatchJob.run_at <= now),
+                and_(DispatchJob.status == DispatchJobStatus.RUNNING, DispatchJob.locked_at < stale),
+            )
+        ).order_by(DispatchJob.run_at.asc()).limit(limit).with_for_update(skip_locked=True).all()
+
+        for job in jobs:
+            job.status = DispatchJobStatus.RUNNING
+            job.locked_by = worker_id
+            job.locked_at = now
+            job.attempts += 1
+        db.commit()
+        return jobs
+
+    @staticmethod
+    def _finish(db: Session, job: DispatchJob, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = error[:500] if error else None
+        db.commit()
+
+    @staticmethod
+    def _retry(db: Session, job: DispatchJob, error: str) -> None:
+        if job.attempts >= settings.DISPATCH_JOB_MAX_ATTEMPTS:
+            DispatchQueue._finish(db, job, DispatchJobStatus.FAILED, error)
+            return
+        job.run_at = datetime.now(timezone.utc) + timedelta(
+            seconds=DispatchQueue.backoff_seconds(job.attempts)
+        )
+        DispatchQueue._finish(db, job, DispatchJobStatus.PENDING, error)
+
+    @staticmethod
+    def process(db: Session, job: DispatchJob) -> bool:
+        """
+        Try to dispatch a claimed job's order.
+
+        Orders that were accepted or cancelled in the meantime complete the
+        job. If no packer can take the order, the job is retried with backoff
+        and marked FAILED after DISPATCH_JOB_MAX_ATTEMPTS; the order stays in
+        the live pool for packers to accept manually.
+
+        Args:
+            db: Database session
+            job: Claimed job
+
+        Returns:
+            True if the job is finished, False if it will be retried
+        """
+        job_id = job.id
+        try:
+            order = db.query(Order).filter(Order.id == job.order_id).first()
+            if order is None or order.status != OrderStatus.CREATED:
+                DispatchQueue._finish(db, job, DispatchJobStatus.DONE)
+                return True
+
+            result = Dispatcher.find_nearest_packer(
+                db=db,
+                order_location=order.pickup_location,
+                required_materials=order.materials_required
+            )
+            if result:
+                packer, distance = result
+                if Dispatcher.assign_order(db, order, packer, distance):
+                    DispatchQueue._finish(db, job, DispatchJobStatus.DONE)
+                    return True
+
+                # Lost the order to a packer accepting it directly
+                db.refresh(order)
+                if order.status != OrderStatus.CREATED:
+                    DispatchQueue._finish(db, job, DispatchJobStatus.DONE)
+                    return True
+
+            DispatchQueue._retry(db, job, "No packer available")
+            return False
+        except Exception as e:
+            db.rollback()
+            job = db.query(DispatchJob).filter(DispatchJob.id == job_id).first()
+            if job is not None:
+                DispatchQueue._retry(db, job, f"{type(e).__name__}: {e}")
+            return False
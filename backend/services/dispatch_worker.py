@@ -0,0 +1,106 @@
+"""
+Dispatch worker pool.
+
+Runs outside the API process and assigns queued orders to packers.
+
+Usage (from the backend directory):
+    python -m services.dispatch_worker --processes 4
+"""
+from typing import Callable
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from models.database import SessionLocal
+# Import all models so relationships resolve in a fresh process
+from models.user import User
+from models.packer import Packer
+from models.order import Order
+from models.tracking import TrackingEvent
+from models.dispatch_job import DispatchJob
+from services.dispatch_queue import DispatchQueue
+from services.pricing_rules import pricing_rules
+
+
+class DispatchWorker:
+    """Polls the dispatch queue and processes claimed jobs."""
+
+    def __init__(self, worker_id: str, session_factory: Callable[[], Session] = SessionLocal):
+        self.worker_id = worker_id
+        self.session_factory = session_factory
+
+    def run_once(self) -> int:
+        """
+        Claim and process one batch of due jobs.
+
+        Returns:
+            Number of jobs claimed
+        """
+        db = self.session_factory()
+        try:
+            # Price with the newest published ruleset
+            pricing_rules.load(db)
+            jobs = DispatchQueue.claim(db, self.worker_id, settings.DISPATCH_WORKER_BATCH_SIZE)
+            for job in jobs:
+                DispatchQueue.process(db, job)
+            return len(jobs)
+        finally:
+            db.close()
+
+    def run(self, stop_event) -> None:
+        """
+        Process jobs until stop_event is set.
+
+        Sleeps for DISPATCH_WORKER_POLL_SECONDS whenever the queue is empty.
+        """
+        while not stop_event.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                print(f"Dispatch worker {self.worker_id} warning: {e}")
+                claimed = 0
+            if claimed == 0:
+                stop_event.wait(settings.DISPATCH_WORKER_POLL_SECONDS)
+
+
+def _run_process(worker_id: str, stop_event) -> None:
+    # The parent handles Ctrl+C and tells the pool to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    print(f"✅ Dispatch worker {worker_id} started")
+    DispatchWorker(worker_id).run(stop_event)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the dispatch worker pool")
+    parser.add_argument("--processes", type=int, default=settings.DISPATCH_WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    # Spawn rather than fork so every worker opens its own database connections
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    processes = [
+        context.Process(target=_run_process, args=(f"{prefix}-{i}", stop_event), daemon=True)
+        for i in range(max(1, args.processes))
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for process in processes:
+        process.join()
+    print("🛑 Dispatch workers stopped")
+
+
+if __name__ == "__main__":
+    main()
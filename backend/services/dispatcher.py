@@ -1,10 +1,33 @@
 """Dispatcher service for packer assignment."""
 from typing import Optional, Dict, List, Tuple
 import math
+import numpy as np
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from models.packer import Packer
+from models.order import Order
+from models.tracking import TrackingEvent
 from core.config import settings
+from core.constants import OrderStatus
+from services.estimate_cache import estimate_cache, quantize_distance
+from services.inventory import InventoryManager
+from services.geo_index import (
+    packer_index,
+    haversine_km,
+    haversine_many_km,
+    haversine_matrix_km,
+    equirectangular_prefilter,
+    KM_PER_DEGREE,
+)
+from services.road_network import get_distance_provider
+from services.packer_locations import packer_locations
+from services.tracking_stream import publish_order_update
+from services.tracking_projection import TrackingProjection
+
+
+# Per-database cache of whether the Postgres cube/earthdistance extensions are installed
+_earthdistance_support: Dict[str, bool] = {}
 
 
 class Dispatcher:
@@ -24,24 +47,97 @@ class Dispatcher:
         Returns:
             Distance in kilometers
         """
-        # Earth radius in kilometers
-        R = 6371.0
+        return round(haversine_km(lat1, lng1, lat2, lng2), 2)
+    
+    @staticmethod
+    def haversine_many(
+        origin: Tuple[float, float],
+        lats,
+        lngs,
+        radius_km: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Calculate distances from one point to many points at once.
         
-        # Convert to radians
-        lat1_rad = math.radians(lat1)
-        lng1_rad = math.radians(lng1)
-        lat2_rad = math.radians(lat2)
-        lng2_rad = math.radians(lng2)
+        Unlike haversine_distance, results are not rounded.
         
-        # Haversine formula
-        dlat = lat2_rad - lat1_rad
-        dlng = lng2_rad - lng1_rad
+        Args:
+            origin: (lat, lng) of the origin point
+            lats: Array-like of target latitudes
+            lngs: Array-like of target longitudes
+            radius_km: Optional search radius. Points that the equirectangular
+                prefilter places outside it are skipped and reported as inf.
+            
+        Returns:
+            Array of distances in kilometers
+        """
+        lat, lng = origin
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
         
-        a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng / 2)**2
-        c = 2 * math.asin(math.sqrt(a))
+        if radius_km is None:
+            return haversine_many_km(lat, lng, lats, lngs)
         
-        distance = R * c
-        return round(distance, 2)
+        distances = np.full(lats.shape, np.inf)
+        mask = equirectangular_prefilter(lat, lng, lats, lngs, radius_km)
+        distances[mask] = haversine_many_km(lat, lng, lats[mask], lngs[mask])
+        return distances
+    
+    @staticmethod
+    def haversine_matrix(origin_lats, origin_lngs, lats, lngs) -> np.ndarray:
+        """
+        Calculate distances from many origins to many points.
+        
+        Memory grows with len(origins) * len(points); callers with large
+        inputs should pass origins in chunks.
+        
+        Args:
+            origin_lats: Array-like of origin latitudes
+            origin_lngs: Array-like of origin longitudes
+            lats: Array-like of target latitudes
+            lngs: Array-like of target longitudes
+            
+        Returns:
+            Array of shape (origins, points) with distances in kilometers
+        """
+        return haversine_matrix_km(origin_lats, origin_lngs, lats, lngs)
+    
+    @staticmethod
+    def route_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        """
+        Calculate travel distance between two points.
+        
+        Uses the road network when one is loaded and haversine otherwise.
+        
+        Args:
+            lat1: Latitude of point 1
+            lng1: Longitude of point 1
+            lat2: Latitude of point 2
+            lng2: Longitude of point 2
+            
+        Returns:
+            Distance in kilometers
+        """
+        return round(get_distance_provider().distance_km(lat1, lng1, lat2, lng2), 2)
+    
+    @staticmethod
+    def route_distance_matrix(
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]]
+    ) -> np.ndarray:
+        """
+        Calculate travel distances from many origins to many destinations.
+        
+        Args:
+            origins: (lat, lng) of each origin
+            destinations: (lat, lng) of each destination
+            
+        Returns:
+            Array of shape (origins, destinations) with distances in kilometers
+        """
+        if not origins or not destinations:
+            return np.zeros((len(origins), len(destinations)))
+        return get_distance_provider().matrix_km(origins, destinations)
     
     @staticmethod
     def check_inventory_sufficient(
@@ -64,6 +160,124 @@ class Dispatcher:
                 return False
         return True
     
+    @staticmethod
+    def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+        """
+        Calculate a lat/lng box that contains a circle.
+        
+        Args:
+            lat: Center latitude
+            lng: Center longitude
+            radius_km: Circle radius in kilometers
+            
+        Returns:
+            Tuple of (min_lat, max_lat, min_lng, max_lng)
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        edge_lat = min(89.9, abs(lat) + dlat)
+        dlng = radius_km / (KM_PER_DEGREE * math.cos(math.radians(edge_lat)))
+        return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+    
+    @staticmethod
+    def radius_filter(lat_column, lng_column, lat: float, lng: float, radius_km: float) -> list:
+        """
+        Build portable SQL conditions selecting rows within a radius.
+        
+        The bounding box lets the database use the lat/lng indexes; the
+        equirectangular circle test then drops the box corners using plain
+        arithmetic, so it runs on SQLite as well as Postgres. Like
+        equirectangular_prefilter it keeps a 1% margin, so callers should
+        still apply the exact haversine cut-off.
+        
+        Args:
+            lat_column: Latitude column
+            lng_column: Longitude column
+            lat: Center latitude
+            lng: Center longitude
+            radius_km: Radius in kilometers
+            
+        Returns:
+            List of SQLAlchemy filter conditions
+        """
+        min_lat, max_lat, min_lng, max_lng = Dispatcher.bounding_box(lat, lng, radius_km)
+        km_per_degree_lng = KM_PER_DEGREE * math.cos(math.radians(lat))
+        dy = (lat_column - lat) * KM_PER_DEGREE
+        dx = (lng_column - lng) * km_per_degree_lng
+        limit = radius_km * 1.01
+        
+        return [
+            lat_column.between(min_lat, max_lat),
+            lng_column.between(min_lng, max_lng),
+            dy * dy + dx * dx <= limit * limit,
+        ]
+    
+    @staticmethod
+    def has_earthdistance(db: Session) -> bool:
+        """
+        Check whether the Postgres cube and earthdistance extensions are installed.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            True if the earthdistance KNN path can be used
+        """
+        bind = db.get_bind()
+        key = str(bind.url)
+        
+        if key not in _earthdistance_support:
+            supported = False
+            if bind.dialect.name == "postgresql":
+                try:
+                    count = db.execute(text(
+                        "SELECT count(*) FROM pg_extension WHERE extname IN ('cube', 'earthdistance')"
+                    )).scalar()
+                    supported = count == 2
+                except Exception:
+                    db.rollback()
+            _earthdistance_support[key] = supported
+        
+        return _earthdistance_support[key]
+    
+    @staticmethod
+    def packers_within_radius(
+        db: Session,
+        lat: float,
+        lng: float,
+        radius_km: float
+    ) -> List[Packer]:
+        """
+        Load available packers near a point, filtering in the database.
+        
+        Uses the earthdistance GiST index (nearest first) when available and
+        the portable bounding-box filter otherwise.
+        
+        Args:
+            db: Database session
+            lat: Center latitude
+            lng: Center longitude
+            radius_km: Radius in kilometers
+            
+        Returns:
+            List of packers that may be within the radius
+        """
+        query = db.query(Packer).filter(Packer.available == True)
+        
+        if Dispatcher.has_earthdistance(db):
+            packer_point = "ll_to_earth(packers.lat::float8, packers.lng::float8)"
+            query = query.filter(
+                text(
+                    f"earth_box(ll_to_earth(:lat, :lng), :radius_m) @> {packer_point} "
+                    f"AND earth_distance(ll_to_earth(:lat, :lng), {packer_point}) <= :radius_m"
+                )
+            ).order_by(
+                text(f"{packer_point} <-> ll_to_earth(:lat, :lng)")
+            ).params(lat=lat, lng=lng, radius_m=radius_km * 1000 * 1.01)
+        else:
+            query = query.filter(*Dispatcher.radius_filter(Packer.lat, Packer.lng, lat, lng, radius_km))
+        
+        return query.all()
+    
     @staticmethod
     def find_nearest_packer(
         db: Session,
@@ -81,36 +295,40 @@ class Dispatcher:
         Returns:
             Tuple of (Packer, distance) or None if no packer found
         """
-        # Get all available packers
-        available_packers = db.query(Packer).filter(
-            Packer.available == True
-        ).all()
+        if settings.PACKER_INDEX_ENABLED:
+            return Dispatcher._find_nearest_from_index(db, order_location, required_materials)
+        return Dispatcher._find_nearest_from_database(db, order_location, required_materials)
+    
+    @staticmethod
+    def _find_nearest_from_database(
+        db: Session,
+        order_location: Dict[str, float],
+        required_materials: Dict[str, float]
+    ) -> Optional[Tuple[Packer, float]]:
+        """Nearest packer using a radius query against the packers table."""
+        radius = settings.DEFAULT_PACKER_SEARCH_RADIUS_KM
+        packers = [
+            packer for packer in Dispatcher.packers_within_radius(
+                db, order_location["lat"], order_location["lng"], radius
+            )
+            if Dispatcher.check_inventory_sufficient(packer.inventory, required_materials)
+        ]
         
-        if not available_packers:
+        if not packers:
             return None
         
-        # Calculate distances and filter by inventory
-        qualified_packers: List[Tuple[Packer, float]] = []
+        positions = [packer_locations.position(packer) for packer in packers]
+        distances = Dispatcher.haversine_many(
+            (order_location["lat"], order_location["lng"]),
+            [lat for lat, _ in positions],
+            [lng for _, lng in positions],
+        )
         
-        for packer in available_packers:
-            # Check inventory
-            if not Dispatcher.check_inventory_sufficient(
-                packer.inventory,
-                required_materials
-            ):
-                continue
-            
-            # Calculate distance
-            distance = Dispatcher.haversine_distance(
-                float(packer.lat),
-                float(packer.lng),
-                order_location["lat"],
-                order_location["lng"]
-            )
-            
-            # Only consider packers within search radius
-            if distance <= settings.DEFAULT_PACKER_SEARCH_RADIUS_KM:
-                qualified_packers.append((packer, distance))
+        qualified_packers: List[Tuple[Packer, float]] = [
+            (packer, round(distance, 2))
+            for packer, distance in zip(packers, distances.tolist())
+            if round(distance, 2) <= radius
+        ]
         
         if not qualified_packers:
             return None
@@ -118,9 +336,47 @@ class Dispatcher:
         # Sort by distance (ascending), then by rating (descending)
         qualified_packers.sort(key=lambda x: (x[1], -float(x[0].rating)))
         
-        # Return nearest packer
         return qualified_packers[0]
     
+    @staticmethod
+    def _find_nearest_from_index(
+        db: Session,
+        order_location: Dict[str, float],
+        required_materials: Dict[str, float]
+    ) -> Optional[Tuple[Packer, float]]:
+        """Nearest packer using the in-memory spatial index."""
+        packer_index.ensure_fresh(db)
+        
+        # The index may lag behind changes made by other workers, so every
+        # candidate is confirmed against its database row before it is returned.
+        while True:
+            nearest = packer_index.nearest(
+                order_location["lat"],
+                order_location["lng"],
+                k=1,
+                radius_km=settings.DEFAULT_PACKER_SEARCH_RADIUS_KM,
+                required_materials=required_materials
+            )
+            
+            if not nearest:
+                return None
+            
+            candidate, distance = nearest[0]
+            packer = db.query(Packer).filter(Packer.id == candidate.id).first()
+            
+            if packer is None:
+                packer_index.remove(candidate.id)
+                continue
+            
+            if (
+                packer.available
+                and packer_locations.position(packer) == (candidate.lat, candidate.lng)
+                and Dispatcher.check_inventory_sufficient(packer.inventory, required_materials)
+            ):
+                return packer, distance
+            
+            packer_index.sync(packer)
+    
     @staticmethod
     def deduct_inventory(
         packer: Packer,
@@ -172,3 +428,104 @@ class Dispatcher:
                 updated_inventory[material] = int(math.ceil(quantity))
         
         return updated_inventory
+    
+    @staticmethod
+    def claim_order(db: Session, order_id: int, packer_id: int) -> bool:
+        """
+        Atomically move an order from CREATED to PACKER_ASSIGNED.
+        
+        The status check and the update are a single conditional UPDATE, so
+        when several callers race for the same order exactly one succeeds.
+        Does not commit.
+        
+        Args:
+            db: Database session
+            order_id: Order ID
+            packer_id: Packer claiming the order
+            
+        Returns:
+            True if this caller claimed the order
+        """
+        claimed = db.query(Order).filter(
+            Order.id == order_id,
+            Order.status == OrderStatus.CREATED
+        ).update(
+            {Order.packer_id: packer_id, Order.status: OrderStatus.PACKER_ASSIGNED},
+            synchronize_session=False
+        )
+        return claimed == 1
+    
+    @staticmethod
+    def reprice(order: Order, distance_km: float) -> None:
+        """
+        Set an order's distance and reprice it for that distance.
+
+        An order already priced at the same distance, quoted or not, keeps
+        its price and pricing version.
+
+        Args:
+            order: Order being assigned
+            distance_km: Distance the order is now charged for
+        """
+        priced_distance = order.distance_km
+        order.distance_km = distance_km
+        if priced_distance is not None and quantize_distance(float(priced_distance)) == quantize_distance(distance_km):
+            return
+
+        price_breakdown = estimate_cache.price(
+            category=order.category,
+            materials=order.materials_required,
+            distance_km=distance_km,
+            urgency=order.urgency,
+            surge_multiplier=float(order.surge_multiplier or 1.0)
+        )
+        order.price = price_breakdown["final_price"]
+        order.pricing_version = price_breakdown["pricing_version"]
+    
+    @staticmethod
+    def assign_order(
+        db: Session,
+        order: Order,
+        packer: Packer,
+        distance: float
+    ) -> bool:
+        """
+        Assign a packer to an order, reprice it and deduct the packer's inventory.
+        
+        Commits the session.
+        
+        Args:
+            db: Database session
+            order: Order to assign
+            packer: Packer taking the order
+            distance: Packer distance to the pickup point in km
+            
+        Returns:
+            False if the order was no longer waiting for a packer
+        """
+        if not Dispatcher.claim_order(db, order.id, packer.id):
+            db.rollback()
+            return False
+        
+        # Update order with packer, and reprice it for the actual distance
+        order.packer_id = packer.id
+        order.status = OrderStatus.PACKER_ASSIGNED
+        Dispatcher.reprice(order, distance)
+        
+        # Create tracking event for packer assignment
+        packer_lat, packer_lng = packer_locations.position(packer)
+        tracking_event = TrackingEvent(
+            order_id=order.id,
+            status=OrderStatus.PACKER_ASSIGNED,
+            message=f"Packer {packer.name} has been assigned to your order. They are {distance} km away.",
+            packer_lat=packer_lat,
+            packer_lng=packer_lng
+        )
+        db.add(tracking_event)
+        TrackingProjection.apply(db, order, tracking_event, packer=packer)
+        
+        # Deduct inventory (commits the order changes as well)
+        updated_inventory = Dispatcher.deduct_inventory(packer, order.materials_required)
+        InventoryManager.update_packer_inventory(db, packer, updated_inventory)
+        publish_order_update(order, tracking_event, packer=packer)
+        return True
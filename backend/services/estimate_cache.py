@@ -0,0 +1,171 @@
+"""Memoized material and price estimates."""
+from typing import Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from core.config import settings
+from core.constants import BOX_SIZES
+from services.material_estimator import MaterialEstimator, round_like_builtin
+from services.pricing_engine import PricingEngine
+from services.pricing_rules import PricingRules, pricing_rules
+
+
+def pricing_fingerprint() -> Tuple:
+    """The pricing version and constants estimates depend on; a change empties the cache."""
+    return (
+        pricing_rules.current().version,
+        tuple((name, spec["max_volume"]) for name, spec in BOX_SIZES.items()),
+    )
+
+
+def quantize_dimensions(dimensions: Dict[str, float]) -> Dict[str, float]:
+    """Round dimensions to ESTIMATE_DIMENSION_STEP_CM, the resolution estimates are made at."""
+    step = settings.ESTIMATE_DIMENSION_STEP_CM
+    return {
+        name: round(round(value / step) * step, 6) if name in ("length", "width", "height") else value
+        for name, value in dimensions.items()
+    }
+
+
+def quantize_distance(distance_km: float) -> float:
+    """Round a distance to ESTIMATE_DISTANCE_STEP_KM, the resolution prices are made at."""
+    step = settings.ESTIMATE_DISTANCE_STEP_KM
+    return round(round(distance_km / step) * step, 6)
+
+
+def quantize_many(values: np.ndarray, step: float) -> np.ndarray:
+    """Vectorized quantize_dimensions / quantize_distance, with identical results."""
+    return round_like_builtin(np.round(values / step) * step, 6)
+
+
+def _key(value) -> str:
+    # Enum members and their string values must share cache entries
+    return str(getattr(value, "value", value))
+
+
+class EstimateCache:
+    """
+    Bounded LRU cache in front of MaterialEstimator and PricingEngine.
+
+    Inputs are quantized before they are estimated, so every request that
+    maps to a cache key gets exactly the result computed for that key. The
+    cache empties itself whenever pricing_fingerprint() changes. Callers
+    get copies and may modify them.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._fingerprint = pricing_fingerprint()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _get(self, key: Hashable, compute):
+        fingerprint = pricing_fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._entries.clear()
+                self._fingerprint = fingerprint
+                self.invalidations += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def materials(self, category: str, dimensions: Dict[str, float], fragility: str) -> Tuple[Dict[str, float], str]:
+        """
+        Cached MaterialEstimator.estimate_materials.
+
+        Args:
+            category: Packaging category
+            dimensions: Item dimensions
+            fragility: Fragility level
+
+        Returns:
+            Tuple of (materials dict, box size)
+        """
+        dimensions = quantize_dimensions(dimensions)
+        key = (
+            "materials", _key(category),
+            dimensions["length"], dimensions["width"], dimensions["height"],
+            _key(fragility),
+        )
+        materials, box_size = self._get(
+            key, lambda: MaterialEstimator.estimate_materials(category, dimensions, fragility)
+        )
+        return dict(materials), box_size
+
+    def price(
+        self,
+        category: str,
+        materials: Dict[str, float],
+        distance_km: float,
+        urgency: str,
+        rules: Optional[PricingRules] = None,
+        surge_multiplier: float = 1.0
+    ) -> Dict[str, float]:
+        """
+        Cached PricingEngine.calculate_price.
+
+        Args:
+            category: Packaging category
+            materials: Dictionary of materials and quantities
+            distance_km: Distance in km
+            urgency: Urgency level
+            rules: Pricing rules to apply; the rules in force if None
+            surge_multiplier: Surge multiplier at the pickup point
+
+        Returns:
+            Dictionary with price breakdown and the ruleset version used
+        """
+        rules = rules or pricing_rules.current()
+        distance_km = quantize_distance(distance_km)
+        # Material order is part of the key: costs are summed in that order
+        key = (
+            "price", rules.version, _key(category), tuple(materials.items()), distance_km, _key(urgency),
+            surge_multiplier
+        )
+        breakdown = self._get(key, lambda: PricingEngine.calculate_price(
+            category, materials, distance_km, urgency, rules, surge_multiplier
+        ))
+        return dict(breakdown)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counts since start-up and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+
+# Process-wide cache shared by the estimate and order routes
+estimate_cache = EstimateCache(max_entries=settings.ESTIMATE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,144 @@
+"""In-process publish/subscribe broker for streaming endpoints."""
+from typing import Dict, Iterable, List, Optional, Set, Union
+import asyncio
+import threading
+
+
+# Queued in place of dropped events when a subscriber falls behind
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """A subscriber's queue of events, owned by one event loop."""
+
+    def __init__(self, topics: Iterable[str], loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def _push(self, event: dict) -> None:
+        # Runs on the subscriber's loop. A consumer that cannot keep up loses
+        # its backlog and is told to resync instead of growing without bound.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Next event, or None if nothing arrives within timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """
+    Topic-based fan-out from request handlers to streaming connections.
+
+    publish() is safe to call from the threadpool that runs sync route
+    handlers: delivery is handed to each subscriber's event loop with one
+    call_soon_threadsafe per loop, however many subscribers share a topic.
+    Only subscribers in this process see events, so each API worker serves
+    the streams connected to it.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len({sub for subs in self._topics.values() for sub in subs})
+
+    def has_subscribers(self, topic: str) -> bool:
+        """Whether anything in this process is subscribed to a topic."""
+        with self._lock:
+            return topic in self._topics
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """
+        Subscribe the running event loop to one or more topics.
+
+        Args:
+            topics: Topic names
+
+        Returns:
+            Subscription to read events from; pass it to unsubscribe() when done
+        """
+        subscription = Subscription(topics, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering events to a subscription."""
+        with self._lock:
+            self._detach(subscription)
+
+    def resubscribe(self, subscription: Subscription, topics: Iterable[str]) -> None:
+        """
+        Change the topics of a subscription, keeping the events already queued.
+
+        Args:
+            subscription: Subscription from subscribe()
+            topics: New topic names
+        """
+        with self._lock:
+            self._detach(subscription)
+            subscription.topics = frozenset(topics)
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+
+    def _detach(self, subscription: Subscription) -> None:
+        # Caller holds the lock
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[topic]
+
+    def publish(self, topics: Union[str, Iterable[str]], event: dict) -> int:
+        """
+        Deliver an event to every subscriber of any of the topics.
+
+        Args:
+            topics: Topic name or names
+            event: JSON-serializable event
+
+        Returns:
+            Number of subscribers the event was queued for
+        """
+        if isinstance(topics, str):
+            topics = (topics,)
+        with self._lock:
+            subscribers = set()
+            for topic in topics:
+                subscribers.update(self._topics.get(topic, ()))
+
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, group, event)
+            except RuntimeError:
+                # Loop already closed; its subscriptions are going away
+                pass
+        return len(subscribers)
+
+
+def _deliver(subscriptions: List[Subscription], event: dict) -> None:
+    for subscription in subscriptions:
+        subscription._push(event)
+
+
+# Shared broker for all streaming endpoints in this process
+broker = EventBroker()
@@ -0,0 +1,473 @@
+"""In-memory spatial index of available packers."""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+import math
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.packer import Packer
+from core.config import settings
+from services.inventory_matrix import InventoryMatrix
+from services.packer_locations import packer_locations
+from services.surge_pricing import SurgePricing, surge_pricing
+
+
+# Earth radius in kilometers
+EARTH_RADIUS_KM = 6371.0
+
+# Length of one degree of latitude in kilometers
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Unrounded great-circle distance between two points.
+
+    Args:
+        lat1: Latitude of point 1
+        lng1: Longitude of point 1
+        lat2: Latitude of point 2
+        lng2: Longitude of point 2
+
+    Returns:
+        Distance in kilometers
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlng = math.radians(lng2) - math.radians(lng1)
+
+    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng / 2)**2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+def haversine_many_km(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """
+    Unrounded distances from one point to many points.
+
+    Args:
+        lat: Origin latitude
+        lng: Origin longitude
+        lats: Array-like of target latitudes
+        lngs: Array-like of target longitudes
+
+    Returns:
+        Float64 array of distances in kilometers
+    """
+    lats_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lngs_rad = np.radians(np.asarray(lngs, dtype=np.float64))
+    lat_rad = math.radians(lat)
+
+    a = (
+        np.sin((lats_rad - lat_rad) / 2)**2
+        + math.cos(lat_rad) * np.cos(lats_rad) * np.sin((lngs_rad - math.radians(lng)) / 2)**2
+    )
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def haversine_matrix_km(origin_lats, origin_lngs, lats, lngs) -> np.ndarray:
+    """
+    Unrounded distances from every origin to every target.
+
+    Args:
+        origin_lats: Array-like of origin latitudes (n)
+        origin_lngs: Array-like of origin longitudes (n)
+        lats: Array-like of target latitudes (m)
+        lngs: Array-like of target longitudes (m)
+
+    Returns:
+        Float64 array of shape (n, m) with distances in kilometers
+    """
+    o_lat = np.radians(np.asarray(origin_lats, dtype=np.float64))[:, None]
+    o_lng = np.radians(np.asarray(origin_lngs, dtype=np.float64))[:, None]
+    t_lat = np.radians(np.asarray(lats, dtype=np.float64))[None, :]
+    t_lng = np.radians(np.asarray(lngs, dtype=np.float64))[None, :]
+
+    a = np.sin((t_lat - o_lat) / 2)**2 + np.cos(o_lat) * np.cos(t_lat) * np.sin((t_lng - o_lng) / 2)**2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def equirectangular_prefilter(lat: float, lng: float, lats, lngs, radius_km: float) -> np.ndarray:
+    """
+    Cheap mask of points that may lie within a radius.
+
+    Uses the flat-earth (equirectangular) approximation, which needs no
+    trigonometry per point. A 1% margin keeps it conservative at city
+    scale, so exact distances only need computing for surviving points.
+
+    Args:
+        lat: Origin latitude
+        lng: Origin longitude
+        lats: Array-like of target latitudes
+        lngs: Array-like of target longitudes
+        radius_km: Search radius in kilometers
+
+    Returns:
+        Boolean array, True where the point might be within the radius
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    dy = lats - lat
+    dx = (lngs - lng) * math.cos(math.radians(lat))
+    limit = radius_km * 1.01 / KM_PER_DEGREE
+    return dx * dx + dy * dy <= limit * limit
+
+
+@dataclass
+class IndexedPacker:
+    """Snapshot of the packer fields dispatch needs."""
+    id: int
+    lat: float
+    lng: float
+    rating: float
+    inventory: Dict[str, int] = field(default_factory=dict)
+
+
+class PackerGeoIndex:
+    """
+    Uniform lat/lng grid of online packers.
+
+    Each packer lives in exactly one square cell of ``cell_size_deg`` degrees.
+    Radius and k-nearest queries only visit the cells around the query point,
+    so their cost grows with local packer density rather than the total
+    number of packers online. Inventories are mirrored in an InventoryMatrix
+    so feasibility for all online packers is a single vector comparison.
+    """
+
+    def __init__(
+        self,
+        cell_size_deg: float = 0.05,
+        refresh_seconds: float = 60.0,
+        surge: Optional[SurgePricing] = None
+    ):
+        self.cell_size_deg = cell_size_deg
+        self.refresh_seconds = refresh_seconds
+        # Told about every packer entering or leaving, as surge pricing supply
+        self.surge = surge
+        self._cells: Dict[Tuple[int, int], Dict[int, IndexedPacker]] = {}
+        self._entries: Dict[int, IndexedPacker] = {}
+        self.inventories = InventoryMatrix()
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cell_for(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Grid cell containing a point."""
+        return (
+            int(math.floor(lat / self.cell_size_deg)),
+            int(math.floor(lng / self.cell_size_deg)),
+        )
+
+    def get(self, packer_id: int) -> Optional[IndexedPacker]:
+        """Indexed snapshot of a packer, if it is online."""
+        return self._entries.get(packer_id)
+
+    def upsert(
+        self,
+        packer_id: int,
+        lat: float,
+        lng: float,
+        rating: float = 5.0,
+        inventory: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        Insert or move a packer in the index.
+
+        Args:
+            packer_id: Packer ID
+            lat: Current latitude
+            lng: Current longitude
+            rating: Packer rating
+            inventory: Packer's current inventory
+        """
+        entry = IndexedPacker(
+            id=packer_id,
+            lat=float(lat),
+            lng=float(lng),
+            rating=float(rating),
+            inventory=dict(inventory or {}),
+        )
+        with self._lock:
+            self._discard(packer_id)
+            self._entries[packer_id] = entry
+            self._cells.setdefault(self.cell_for(entry.lat, entry.lng), {})[packer_id] = entry
+            self.inventories.update(packer_id, entry.inventory)
+            if self.surge is not None:
+                self.surge.packer_added(entry.lat, entry.lng)
+
+    def move(self, packer_id: int, lat: float, lng: float) -> None:
+        """
+        Update the position of an indexed packer.
+
+        Packers not in the index (offline) are left out.
+
+        Args:
+            packer_id: Packer ID
+            lat: New latitude
+            lng: New longitude
+        """
+        with self._lock:
+            entry = self._entries.get(packer_id)
+            if entry is not None:
+                self.upsert(packer_id, lat, lng, entry.rating, entry.inventory)
+
+    def remove(self, packer_id: int) -> None:
+        """Drop a packer from the index (e.g. when going offline)."""
+        with self._lock:
+            self._discard(packer_id)
+
+    def _discard(self, packer_id: int) -> None:
+        entry = self._entries.pop(packer_id, None)
+        if entry is None:
+            return
+        self.inventories.remove(packer_id)
+        if self.surge is not None:
+            self.surge.packer_removed(entry.lat, entry.lng)
+        key = self.cell_for(entry.lat, entry.lng)
+        cell = self._cells.get(key)
+        if cell is not None:
+            cell.pop(packer_id, None)
+            if not cell:
+                del self._cells[key]
+
+    def sync(self, packer: Packer) -> None:
+        """
+        Bring the index in line with a packer row.
+
+        Available packers are inserted or moved; unavailable ones are removed.
+        A GPS fix held in memory takes precedence over the row's position.
+
+        Args:
+            packer: Packer model instance
+        """
+        if packer.id is None:
+            return
+        if packer.available and packer.lat is not None and packer.lng is not None:
+            lat, lng = packer_locations.position(packer)
+            self.upsert(
+                packer.id,
+                lat,
+                lng,
+                float(packer.rating if packer.rating is not None else 5.0),
+                packer.inventory,
+            )
+        else:
+            self.remove(packer.id)
+
+    def load(self, db: Session) -> None:
+        """
+        Rebuild the index from every available packer in the database.
+
+        Args:
+            db: Database session
+        """
+        rows = db.query(
+            Packer.id, Packer.lat, Packer.lng, Packer.rating, Packer.inventory
+        ).filter(Packer.available == True).all()
+
+        with self._lock:
+            self._cells = {}
+            self._entries = {}
+            self.inventories.clear()
+            if self.surge is not None:
+                self.surge.reset_packers()
+            for packer_id, lat, lng, rating, inventory in rows:
+                fix = packer_locations.latest(packer_id)
+                if fix is not None:
+                    lat, lng = fix.lat, fix.lng
+                self.upsert(packer_id, lat, lng, rating if rating is not None else 5.0, inventory)
+            self._loaded_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        """Whether the index has never been loaded or is due for a rebuild."""
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def ensure_fresh(self, db: Session) -> None:
+        """
+        Rebuild the index if it is stale.
+
+        Other API workers update their own copy of the index, so a periodic
+        rebuild bounds how long a change made elsewhere can go unseen.
+
+        Args:
+            db: Database session
+        """
+        if self.is_stale():
+            self.load(db)
+
+    def clear(self) -> None:
+        """Empty the index and mark it as not loaded."""
+        with self._lock:
+            self._cells = {}
+            self._entries = {}
+            self.inventories.clear()
+            self._loaded_at = None
+            if self.surge is not None:
+                self.surge.reset_packers()
+
+    def _lng_cell_km(self, lat: float) -> float:
+        """Lower bound on the east-west width of a cell near a latitude."""
+        edge_lat = min(89.9, abs(lat) + self.cell_size_deg)
+        return self.cell_size_deg * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+
+    def _ring(self, center: Tuple[int, int], radius: int) -> Iterator[Tuple[int, int]]:
+        """Cells at exactly Chebyshev distance ``radius`` from ``center``."""
+        ci, cj = center
+        if radius == 0:
+            yield center
+            return
+        for dj in range(-radius, radius + 1):
+            yield (ci - radius, cj + dj)
+            yield (ci + radius, cj + dj)
+        for di in range(-radius + 1, radius):
+            yield (ci + di, cj - radius)
+            yield (ci + di, cj + radius)
+
+    def within_radius(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float
+    ) -> List[Tuple[IndexedPacker, float]]:
+        """
+        All indexed packers within a radius of a point.
+
+        Args:
+            lat: Query latitude
+            lng: Query longitude
+            radius_km: Search radius in kilometers
+
+        Returns:
+            List of (packer, distance) sorted by distance, then rating descending
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / max(KM_PER_DEGREE * math.cos(math.radians(min(89.9, abs(lat) + dlat))), 1e-9)
+        min_i, min_j = self.cell_for(lat - dlat, lng - dlng)
+        max_i, max_j = self.cell_for(lat + dlat, lng + dlng)
+
+        candidates: List[IndexedPacker] = []
+        with self._lock:
+            for i in range(min_i, max_i + 1):
+                for j in range(min_j, max_j + 1):
+                    cell = self._cells.get((i, j))
+                    if cell:
+                        candidates.extend(cell.values())
+
+        return self._score(candidates, lat, lng, radius_km)
+
+    @staticmethod
+    def _score(
+        candidates: List[IndexedPacker],
+        lat: float,
+        lng: float,
+        radius_km: Optional[float]
+    ) -> List[Tuple[IndexedPacker, float]]:
+        """Distances for a batch of candidates, filtered by radius and sorted."""
+        if not candidates:
+            return []
+
+        lats = np.fromiter((c.lat for c in candidates), dtype=np.float64, count=len(candidates))
+        lngs = np.fromiter((c.lng for c in candidates), dtype=np.float64, count=len(candidates))
+        keep = np.arange(len(candidates))
+
+        if radius_km is not None:
+            keep = np.flatnonzero(equirectangular_prefilter(lat, lng, lats, lngs, radius_km))
+
+        distances = haversine_many_km(lat, lng, lats[keep], lngs[keep])
+
+        results = []
+        for position, distance in zip(keep.tolist(), distances.tolist()):
+            # Round like Dispatcher.haversine_distance so ordering ties stay identical
+            distance = round(distance, 2)
+            if radius_km is None or distance <= radius_km:
+                results.append((candidates[position], distance))
+
+        results.sort(key=lambda x: (x[1], -x[0].rating))
+        return results
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        radius_km: Optional[float] = None,
+        predicate: Optional[Callable[[IndexedPacker], bool]] = None,
+        required_materials: Optional[Dict[str, float]] = None
+    ) -> List[Tuple[IndexedPacker, float]]:
+        """
+        The k nearest indexed packers to a point.
+
+        Cells are visited in rings of growing size around the query cell and
+        the search stops once no unvisited cell can hold a closer packer.
+
+        Args:
+            lat: Query latitude
+            lng: Query longitude
+            k: Number of packers to return
+            radius_km: Optional maximum distance in kilometers
+            predicate: Optional filter applied to each candidate
+            required_materials: Only packers whose inventory covers these;
+                checked for each ring's candidates only
+
+        Returns:
+            Up to k (packer, distance) tuples sorted by distance, then rating descending
+        """
+        center = self.cell_for(lat, lng)
+        found: List[Tuple[IndexedPacker, float]] = []
+
+        with self._lock:
+            if not self._cells:
+                return []
+
+            # Furthest ring that can still contain an occupied cell
+            max_ring = max(
+                max(abs(i - center[0]), abs(j - center[1]))
+                for i, j in self._cells
+            )
+
+            ring = 0
+            while ring <= max_ring:
+                ring_candidates = []
+                for key in self._ring(center, ring):
+                    cell = self._cells.get(key)
+                    if not cell:
+                        continue
+                    for entry in cell.values():
+                        if predicate is None or predicate(entry):
+                            ring_candidates.append(entry)
+                if required_materials is not None and ring_candidates:
+                    eligible = self.inventories.packers_for(
+                        required_materials, [entry.id for entry in ring_candidates]
+                    )
+                    ring_candidates = [entry for entry in ring_candidates if entry.id in eligible]
+                found.extend(self._score(ring_candidates, lat, lng, radius_km))
+
+                # Anything outside the visited rings is at least this far away.
+                # The 1% slack covers the gap between grid and great-circle
+                # geometry, and half a cent covers rounding of distances.
+                bound = ring * min(self.cell_size_deg * KM_PER_DEGREE, self._lng_cell_km(lat)) * 0.99
+                if radius_km is not None and bound > radius_km:
+                    break
+                if len(found) >= k:
+                    found.sort(key=lambda x: (x[1], -x[0].rating))
+                    if found[k - 1][1] + 0.005 < bound:
+                        break
+                ring += 1
+
+        found.sort(key=lambda x: (x[1], -x[0].rating))
+        return found[:k]
+
+
+# Process-wide index shared by the dispatcher and packer routes
+packer_index = PackerGeoIndex(
+    cell_size_deg=settings.PACKER_INDEX_CELL_SIZE_DEG,
+    refresh_seconds=settings.PACKER_INDEX_REFRESH_SECONDS,
+    surge=surge_pricing,
+)
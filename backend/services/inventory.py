@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from models.packer import Packer
 from core.config import settings
+from services.geo_index import packer_index
 
 
 class InventoryManager:
@@ -36,6 +37,7 @@ class InventoryManager:
         
         db.commit()
         db.refresh(packer)
+        packer_index.sync(packer)
         
         return packer
     
@@ -0,0 +1,181 @@
+"""Dense vector encoding of packer inventories and order materials."""
+from typing import Dict, Iterable, List, Optional, Set
+import threading
+
+import numpy as np
+
+from core.constants import MATERIAL_TYPES
+
+
+# Fixed column order for material vectors
+MATERIAL_NAMES = tuple(MATERIAL_TYPES)
+MATERIAL_INDEX = {name: column for column, name in enumerate(MATERIAL_NAMES)}
+
+
+def encode_materials(materials: Dict[str, float]) -> np.ndarray:
+    """
+    Encode a material dictionary as a fixed-width vector.
+
+    Materials not listed in MATERIAL_TYPES are left out; see
+    unknown_materials() for callers that need to handle them.
+
+    Args:
+        materials: Dictionary of material names and quantities
+
+    Returns:
+        Float64 vector indexed by MATERIAL_TYPES order
+    """
+    vector = np.zeros(len(MATERIAL_NAMES))
+    for name, quantity in materials.items():
+        column = MATERIAL_INDEX.get(name)
+        if column is not None:
+            vector[column] = quantity
+    return vector
+
+
+def encode_many(materials_list: Iterable[Dict[str, float]]) -> np.ndarray:
+    """
+    Encode several material dictionaries as the rows of a matrix.
+
+    Args:
+        materials_list: Material dictionaries
+
+    Returns:
+        Float64 matrix with one row per dictionary
+    """
+    rows = [encode_materials(materials) for materials in materials_list]
+    if not rows:
+        return np.zeros((0, len(MATERIAL_NAMES)))
+    return np.vstack(rows)
+
+
+def unknown_materials(materials: Dict[str, float]) -> Dict[str, float]:
+    """Entries whose material is not in MATERIAL_TYPES."""
+    return {name: qty for name, qty in materials.items() if name not in MATERIAL_INDEX}
+
+
+def servable_orders(inventory: Dict[str, int], requirements: np.ndarray) -> np.ndarray:
+    """
+    Which orders a packer's inventory can cover, in one comparison.
+
+    Args:
+        inventory: Packer's inventory dictionary
+        requirements: Matrix of encoded order materials (one row per order)
+
+    Returns:
+        Boolean array, True where the packer has enough of every material
+    """
+    if requirements.shape[0] == 0:
+        return np.zeros(0, dtype=bool)
+    return (requirements <= encode_materials(inventory)).all(axis=1)
+
+
+class InventoryMatrix:
+    """
+    Packer inventories stored as the rows of a dense matrix.
+
+    Answers "which packers can serve this order" with one vectorized
+    comparison instead of a dictionary walk per packer.
+    """
+
+    def __init__(self, initial_capacity: int = 256):
+        self._matrix = np.zeros((initial_capacity, len(MATERIAL_NAMES)))
+        self._row_ids = np.full(initial_capacity, -1, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._free_rows: List[int] = list(range(initial_capacity - 1, -1, -1))
+        # Stock of materials outside MATERIAL_TYPES, which have no column
+        self._extras: Dict[int, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _grow(self) -> None:
+        capacity = self._matrix.shape[0]
+        self._matrix = np.vstack([self._matrix, np.zeros_like(self._matrix)])
+        self._row_ids = np.concatenate([self._row_ids, np.full(capacity, -1, dtype=np.int64)])
+        self._free_rows.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def update(self, packer_id: int, inventory: Dict[str, int]) -> None:
+        """
+        Store a packer's current inventory.
+
+        Args:
+            packer_id: Packer ID
+            inventory: Inventory dictionary
+        """
+        with self._lock:
+            row = self._rows.get(packer_id)
+            if row is None:
+                if not self._free_rows:
+                    self._grow()
+                row = self._free_rows.pop()
+                self._rows[packer_id] = row
+                self._row_ids[row] = packer_id
+            self._matrix[row] = encode_materials(inventory)
+
+            extras = unknown_materials(inventory)
+            if extras:
+                self._extras[packer_id] = extras
+            else:
+                self._extras.pop(packer_id, None)
+
+    def remove(self, packer_id: int) -> None:
+        """Drop a packer's row."""
+        with self._lock:
+            row = self._rows.pop(packer_id, None)
+            if row is None:
+                return
+            self._matrix[row] = 0
+            self._row_ids[row] = -1
+            self._free_rows.append(row)
+            self._extras.pop(packer_id, None)
+
+    def clear(self) -> None:
+        """Drop every row."""
+        with self._lock:
+            self._matrix[:] = 0
+            self._row_ids[:] = -1
+            self._rows = {}
+            self._free_rows = list(range(self._matrix.shape[0] - 1, -1, -1))
+            self._extras = {}
+
+    def packers_for(
+        self,
+        required_materials: Dict[str, float],
+        packer_ids: Optional[Iterable[int]] = None
+    ) -> Set[int]:
+        """
+        Packers whose inventory covers an order.
+
+        Args:
+            required_materials: Required materials for the order
+            packer_ids: Optionally restrict the check to these packers
+
+        Returns:
+            Set of packer IDs with sufficient inventory
+        """
+        required = encode_materials(required_materials)
+        extras = unknown_materials(required_materials)
+
+        with self._lock:
+            if packer_ids is None:
+                rows = np.flatnonzero(self._row_ids >= 0)
+            else:
+                rows = np.array(
+                    [self._rows[pid] for pid in packer_ids if pid in self._rows],
+                    dtype=np.int64
+                )
+            if rows.size == 0:
+                return set()
+
+            mask = (self._matrix[rows] >= required).all(axis=1)
+            eligible = self._row_ids[rows[mask]].tolist()
+
+            if extras:
+                eligible = [
+                    pid for pid in eligible
+                    if all(self._extras.get(pid, {}).get(name, 0) >= qty for name, qty in extras.items())
+                ]
+
+        return set(eligible)
@@ -0,0 +1,296 @@
+"""Live order feed for packers."""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+import math
+
+import numpy as np
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from models.packer import Packer
+from core.config import settings
+from core.constants import OrderStatus
+from schemas.order import OrderResponse
+from services.dispatcher import Dispatcher
+from services.event_broker import broker
+from services.inventory_matrix import encode_many, servable_orders, unknown_materials
+from services.order_pool import order_pool
+from services.packer_locations import packer_locations
+
+
+SORT_BY_AGE = "age"
+SORT_BY_DISTANCE = "distance"
+
+# Candidate rows fetched per round trip when paging newest-first
+AGE_SCAN_BATCH_SIZE = 200
+
+# Live stream event types
+ORDER_ADDED = "order_added"
+ORDER_CLAIMED = "order_claimed"
+ORDER_CANCELLED = "order_cancelled"
+
+# Fields left out of streamed orders, which go to every packer in the area
+PRIVATE_ORDER_FIELDS = {"delivery_otp", "receiver_phone"}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(sort: str, value, order_id: int) -> str:
+    """Opaque cursor pointing just after an order in the given sort."""
+    payload = json.dumps({"s": sort, "v": value, "id": order_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or belongs to another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort:
+            raise InvalidCursor("Cursor does not match the requested sort")
+        return payload["v"], int(payload["id"])
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+class LiveOrderFeed:
+    """
+    Service for the packer's feed of nearby unassigned orders.
+
+    Candidates come from the in-memory order pool, or when it is disabled
+    from the orders table using the pickup lat/lng indexes, scanning only
+    lightweight columns. Full rows are loaded for the returned page alone.
+    """
+
+    @staticmethod
+    def _candidate_columns():
+        return (Order.id, Order.created_at, Order.pickup_lat, Order.pickup_lng, Order.materials_required)
+
+    @staticmethod
+    def _nearby_query(db: Session, lat: float, lng: float, radius_km: float):
+        return db.query(*LiveOrderFeed._candidate_columns()).filter(
+            Order.status == OrderStatus.CREATED,
+            *Dispatcher.radius_filter(Order.pickup_lat, Order.pickup_lng, lat, lng, radius_km)
+        )
+
+    @staticmethod
+    def _keep(
+        rows: list,
+        inventory: Dict[str, int],
+        lat: float,
+        lng: float,
+        radius_km: float,
+        requirements: Optional[np.ndarray] = None,
+        extras: Optional[List[Dict[str, float]]] = None
+    ):
+        """Rows within the exact radius that the inventory can serve, with their distances."""
+        if not rows:
+            return [], np.zeros(0)
+        if requirements is None:
+            requirements = encode_many(row.materials_required for row in rows)
+        if extras is None:
+            extras = [unknown_materials(row.materials_required) for row in rows]
+        distances = Dispatcher.haversine_many(
+            (lat, lng),
+            [float(row.pickup_lat) for row in rows],
+            [float(row.pickup_lng) for row in rows],
+        )
+        ok = (distances <= radius_km) & servable_orders(inventory, requirements)
+        for i, row in enumerate(rows):
+            if ok[i] and extras[i]:
+                ok[i] = Dispatcher.check_inventory_sufficient(inventory, row.materials_required)
+        keep = np.flatnonzero(ok)
+        return [rows[i] for i in keep], distances[keep]
+
+    @staticmethod
+    def _nearby(db: Session, inventory: Dict[str, int], lat: float, lng: float, radius_km: float):
+        """Every nearby servable order, with distances."""
+        if settings.ORDER_POOL_ENABLED:
+            order_pool.ensure_fresh(db)
+            entries, _ = order_pool.within_radius(lat, lng, radius_km)
+            return LiveOrderFeed._keep(
+                entries, inventory, lat, lng, radius_km,
+                requirements=order_pool.requirements(entries),
+                extras=[entry.extras for entry in entries]
+            )
+        return LiveOrderFeed._keep(
+            LiveOrderFeed._nearby_query(db, lat, lng, radius_km).all(), inventory, lat, lng, radius_km
+        )
+
+    @staticmethod
+    def _page_by_age(db, packer, lat, lng, radius_km, limit, cursor):
+        after: Optional[Tuple[datetime, int]] = None
+        if cursor:
+            value, order_id = decode_cursor(cursor, SORT_BY_AGE)
+            try:
+                after = (datetime.fromisoformat(value), order_id)
+            except (TypeError, ValueError) as e:
+                raise InvalidCursor("Invalid cursor") from e
+
+        if settings.ORDER_POOL_ENABLED:
+            kept, _ = LiveOrderFeed._nearby(db, packer.inventory, lat, lng, radius_km)
+            kept.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+            if after is not None:
+                kept = [row for row in kept if (row.created_at, row.id) < after]
+            kept = kept[:limit + 1]
+        else:
+            kept = LiveOrderFeed._scan_by_age(db, packer, lat, lng, radius_km, limit, after)
+
+        page = kept[:limit]
+        next_cursor = None
+        if len(kept) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(SORT_BY_AGE, last.created_at.isoformat(), last.id)
+        return [row.id for row in page], next_cursor
+
+    @staticmethod
+    def _scan_by_age(db, packer, lat, lng, radius_km, limit, after):
+        # Newest first, walking the (created_at, id) keyset in batches until
+        # one more order than the page size has passed the filters
+        kept = []
+        while len(kept) <= limit:
+            query = LiveOrderFeed._nearby_query(db, lat, lng, radius_km)
+            if after is not None:
+                query = query.filter(or_(
+                    Order.created_at < after[0],
+                    and_(Order.created_at == after[0], Order.id < after[1]),
+                ))
+            rows = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(AGE_SCAN_BATCH_SIZE).all()
+            if not rows:
+                break
+            kept.extend(LiveOrderFeed._keep(rows, packer.inventory, lat, lng, radius_km)[0])
+            after = (rows[-1].created_at, rows[-1].id)
+            if len(rows) < AGE_SCAN_BATCH_SIZE:
+                break
+        return kept
+
+    @staticmethod
+    def _page_by_distance(db, packer, lat, lng, radius_km, limit, cursor):
+        after = None
+        if cursor:
+            value, order_id = decode_cursor(cursor, SORT_BY_DISTANCE)
+            try:
+                after = (float(value), order_id)
+            except (TypeError, ValueError) as e:
+                raise InvalidCursor("Invalid cursor") from e
+
+        rows, distances = LiveOrderFeed._nearby(db, packer.inventory, lat, lng, radius_km)
+        ids = np.array([row.id for row in rows], dtype=np.int64)
+        if after is not None:
+            later = (distances > after[0]) | ((distances == after[0]) & (ids > after[1]))
+            ids, distances = ids[later], distances[later]
+
+        ordered = np.lexsort((ids, distances))[:limit + 1]
+        page = ordered[:limit]
+        next_cursor = None
+        if len(ordered) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(SORT_BY_DISTANCE, float(distances[last]), int(ids[last]))
+        return ids[page].tolist(), next_cursor
+
+    @staticmethod
+    def page(
+        db: Session,
+        packer: Packer,
+        radius_km: float,
+        sort: str = SORT_BY_AGE,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Order], Optional[str]]:
+        """
+        One page of nearby CREATED orders the packer has the inventory for.
+
+        Args:
+            db: Database session
+            packer: Packer viewing the feed
+            radius_km: Search radius around the packer
+            sort: "age" for newest first or "distance" for nearest first
+            limit: Page size
+            cursor: Cursor returned with the previous page
+
+        Returns:
+            Tuple of (orders, cursor for the next page or None)
+
+        Raises:
+            InvalidCursor: If the cursor is malformed or belongs to another sort
+        """
+        lat, lng = packer_locations.position(packer)
+        if sort == SORT_BY_DISTANCE:
+            ids, next_cursor = LiveOrderFeed._page_by_distance(db, packer, lat, lng, radius_km, limit, cursor)
+        else:
+            ids, next_cursor = LiveOrderFeed._page_by_age(db, packer, lat, lng, radius_km, limit, cursor)
+
+        if not ids:
+            return [], None
+        orders = {
+            order.id: order
+            for order in db.query(Order).filter(Order.id.in_(ids), Order.status == OrderStatus.CREATED).all()
+        }
+        # The pool may still hold orders claimed through another API worker
+        for order_id in ids:
+            if order_id not in orders:
+                order_pool.remove(order_id)
+        return [orders[order_id] for order_id in ids if order_id in orders], next_cursor
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    size = settings.LIVE_STREAM_CELL_SIZE_DEG
+    return math.floor(lat / size), math.floor(lng / size)
+
+
+def cell_topic(lat: float, lng: float) -> str:
+    """Broker topic for the geo cell containing a point."""
+    row, col = _cell(lat, lng)
+    return f"cell:{row}:{col}"
+
+
+def cell_topics_for_radius(lat: float, lng: float, radius_km: float) -> List[str]:
+    """Broker topics for every geo cell that overlaps a circle."""
+    min_lat, max_lat, min_lng, max_lng = Dispatcher.bounding_box(lat, lng, radius_km)
+    min_row, min_col = _cell(min_lat, min_lng)
+    max_row, max_col = _cell(max_lat, max_lng)
+    return [
+        f"cell:{row}:{col}"
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
+
+
+def publish_order_added(order: Order) -> None:
+    """Add an order to the live pool and tell packers near the pickup point. Call after commit."""
+    order_pool.add(order)
+    payload = OrderResponse.model_validate(order).model_dump(mode="json", exclude=PRIVATE_ORDER_FIELDS)
+    broker.publish(
+        cell_topic(order.pickup_location["lat"], order.pickup_location["lng"]),
+        {"type": ORDER_ADDED, "order": payload}
+    )
+
+
+def publish_order_removed(order: Order, event_type: str) -> None:
+    """Remove an order from the live pool and tell packers near the pickup point. Call after commit."""
+    order_pool.remove(order.id)
+    broker.publish(
+        cell_topic(order.pickup_location["lat"], order.pickup_location["lng"]),
+        {"type": event_type, "order_id": order.id}
+    )
+
+
+def order_matches_packer(order: dict, lat: float, lng: float, radius_km: float, inventory: Dict[str, int]) -> bool:
+    """Whether a streamed order belongs in a packer's feed."""
+    pickup = order["pickup_location"]
+    return (
+        Dispatcher.haversine_distance(lat, lng, pickup["lat"], pickup["lng"]) <= radius_km
+        and Dispatcher.check_inventory_sufficient(inventory, order["materials_required"])
+    )
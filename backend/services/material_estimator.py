@@ -1,13 +1,51 @@
 """Material estimation service."""
-from typing import Dict, Tuple
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 import math
 
+import numpy as np
+
 from core.constants import (
     PackagingCategory,
     FragilityLevel,
     BOX_SIZES,
     MATERIAL_TYPES,
 )
+from services.bin_packing import pack_items, count_boxes
+
+
+# Categories whose items share boxes; others package each item on its own
+SHARED_BOX_CATEGORIES = (PackagingCategory.HOUSE_SHIFTING, PackagingCategory.BUSINESS_ORDERS)
+
+_BOX_PREFIX = "cardboard_box_"
+
+# Bubble wrap needed per fragility level, relative to LOW
+FRAGILITY_MULTIPLIERS = {
+    FragilityLevel.LOW: 1.0,
+    FragilityLevel.MEDIUM: 1.5,
+    FragilityLevel.HIGH: 2.0,
+}
+
+
+def round_like_builtin(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Round an array exactly as round() rounds each float.
+
+    np.round scales by 10**digits first, which can land a value exactly on
+    a half and round it the other way; those few values are redone one by
+    one so vectorized results match the scalar code to the last digit.
+
+    Args:
+        values: Float array
+        digits: Decimal places
+
+    Returns:
+        Rounded float array
+    """
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        rounded[i] = round(float(values[i]), digits)
+    return rounded
 
 
 class MaterialEstimator:
@@ -64,15 +102,26 @@ class MaterialEstimator:
         base_meters = (surface_area / 10000) * 1.5  # Convert cm² to m² and add 50% buffer
         
         # Adjust based on fragility
-        fragility_multipliers = {
-            FragilityLevel.LOW: 1.0,
-            FragilityLevel.MEDIUM: 1.5,
-            FragilityLevel.HIGH: 2.0,
-        }
-        
-        multiplier = fragility_multipliers.get(fragility, 1.0)
+        multiplier = FRAGILITY_MULTIPLIERS.get(fragility, 1.0)
         return round(base_meters * multiplier, 1)
     
+    @staticmethod
+    def calculate_bubble_wrap_many(dimensions: np.ndarray, fragility: str) -> np.ndarray:
+        """
+        Vectorized calculate_bubble_wrap for items of one fragility level.
+        
+        Args:
+            dimensions: Array of shape (n, 3) with length, width and height in cm
+            fragility: Fragility level
+            
+        Returns:
+            Bubble wrap lengths in meters
+        """
+        l, w, h = dimensions[:, 0], dimensions[:, 1], dimensions[:, 2]
+        surface_area = 2 * (l*w + w*h + h*l)
+        base_meters = (surface_area / 10000) * 1.5
+        return round_like_builtin(base_meters * FRAGILITY_MULTIPLIERS.get(fragility, 1.0), 1)
+    
     @staticmethod
     def estimate_materials(
         category: str,
@@ -165,21 +214,155 @@ class MaterialEstimator:
         return materials, box_size
     
     @staticmethod
-    def calculate_material_cost(materials: Dict[str, float]) -> float:
+    def estimate_multi_item_materials(
+        category: str,
+        items: Sequence[Dict[str, float]],
+        fragility: str
+    ) -> Tuple[Dict[str, float], Dict[str, int]]:
+        """
+        Estimate required materials for an order of several items.
+        
+        House shifting and business orders pack their items together: box
+        counts and sizes come from 3D bin packing, tape, labels and stickers
+        scale with the number of boxes, and bubble wrap is summed over items.
+        Other categories package every item separately, so their materials
+        are summed over items.
+        
+        Args:
+            category: Packaging category
+            items: Dimensions of each item, with an optional quantity
+            fragility: Fragility level
+            
+        Returns:
+            Tuple of (materials dict, number of boxes of each size)
+        """
+        expanded = [item for item in items for _ in range(int(item.get("quantity", 1)))]
+        materials: Dict[str, float] = {}
+        
+        if category not in SHARED_BOX_CATEGORIES:
+            for item in expanded:
+                item_materials, _ = MaterialEstimator.estimate_materials(category, item, fragility)
+                for name, quantity in item_materials.items():
+                    materials[name] = materials.get(name, 0.0) + quantity
+            if "bubble_wrap" in materials:
+                materials["bubble_wrap"] = round(materials["bubble_wrap"], 1)
+            boxes = {
+                size: int(materials[_BOX_PREFIX + size])
+                for size in BOX_SIZES if _BOX_PREFIX + size in materials
+            }
+            return materials, boxes
+        
+        counts = count_boxes(pack_items(
+            [(item["length"], item["width"], item["height"]) for item in expanded]
+        ))
+        boxes = {size: counts[size] for size in BOX_SIZES if size in counts}
+        for size, count in boxes.items():
+            materials[_BOX_PREFIX + size] = float(count)
+        
+        # Everything else in the single-item estimate is per box or per item
+        template, _ = MaterialEstimator.estimate_materials(category, expanded[0], fragility)
+        for name, quantity in template.items():
+            if name.startswith(_BOX_PREFIX):
+                continue
+            if name == "bubble_wrap":
+                materials[name] = round(sum(
+                    MaterialEstimator.calculate_bubble_wrap(item, fragility) for item in expanded
+                ), 1)
+            else:
+                materials[name] = quantity * sum(boxes.values())
+        return materials, boxes
+    
+    @staticmethod
+    def calculate_material_cost(
+        materials: Dict[str, float],
+        unit_costs: Optional[Mapping[str, float]] = None
+    ) -> float:
         """
         Calculate total cost of materials.
         
         Args:
             materials: Dictionary of material names and quantities
+            unit_costs: Cost per unit by material; MATERIAL_TYPES base costs if None
             
         Returns:
             Total cost
         """
+        if unit_costs is None:
+            unit_costs = {name: spec["base_cost"] for name, spec in MATERIAL_TYPES.items()}
         total_cost = 0.0
         
         for material_name, quantity in materials.items():
-            if material_name in MATERIAL_TYPES:
-                unit_cost = MATERIAL_TYPES[material_name]["base_cost"]
+            if material_name in unit_costs:
+                unit_cost = unit_costs[material_name]
                 total_cost += unit_cost * quantity
         
         return round(total_cost, 2)
+    
+    @staticmethod
+    def estimate_materials_many(
+        categories: Sequence[str],
+        dimensions: np.ndarray,
+        fragilities: Sequence[str],
+        unit_costs: Optional[Mapping[str, float]] = None
+    ) -> Tuple[List[Dict[str, float]], List[str], np.ndarray]:
+        """
+        Vectorized estimate_materials and calculate_material_cost.
+        
+        Items are grouped by category, fragility and box size, which fixes
+        every material except bubble wrap. Each group takes its materials
+        from estimate_materials on one item, computes bubble wrap for all its
+        items at once, and adds up costs in the same order as the scalar
+        code, so results are identical to estimating items one by one.
+        
+        Args:
+            categories: Packaging category of each item
+            dimensions: Array of shape (n, 3) with length, width and height in cm
+            fragilities: Fragility level of each item
+            unit_costs: Cost per unit by material; MATERIAL_TYPES base costs if None
+            
+        Returns:
+            Tuple of (materials dict per item, box size per item, material costs)
+        """
+        if unit_costs is None:
+            unit_costs = {name: spec["base_cost"] for name, spec in MATERIAL_TYPES.items()}
+        n = len(categories)
+        volumes = dimensions[:, 0] * dimensions[:, 1] * dimensions[:, 2]
+        size_names = list(BOX_SIZES)
+        limits = np.array([specs["max_volume"] for specs in BOX_SIZES.values()], dtype=np.float64)
+        size_index = np.minimum(np.searchsorted(limits, volumes, side="left"), len(size_names) - 1)
+        
+        groups: Dict[Tuple[str, str, int], List[int]] = {}
+        for i, key in enumerate(zip(categories, fragilities, size_index.tolist())):
+            groups.setdefault(key, []).append(i)
+        
+        materials: List[Dict[str, float]] = [None] * n
+        box_sizes = [size_names[i] for i in size_index.tolist()]
+        costs = np.zeros(n)
+        for (category, fragility, _), members in groups.items():
+            rows = np.array(members)
+            first = dimensions[rows[0]]
+            template, _ = MaterialEstimator.estimate_materials(
+                category, {"length": first[0], "width": first[1], "height": first[2]}, fragility
+            )
+            
+            bubble = None
+            if "bubble_wrap" in template:
+                wrap_fragility = FragilityLevel.HIGH if category == PackagingCategory.FRAGILE_ITEMS else fragility
+                bubble = MaterialEstimator.calculate_bubble_wrap_many(dimensions[rows], wrap_fragility)
+                if category == PackagingCategory.ELECTRONICS and fragility == FragilityLevel.HIGH:
+                    bubble = bubble * 1.5
+            
+            total = np.zeros(len(rows))
+            for name, quantity in template.items():
+                if name in unit_costs:
+                    unit_cost = unit_costs[name]
+                    total = total + unit_cost * (bubble if name == "bubble_wrap" else quantity)
+            costs[rows] = total
+            
+            for position, i in enumerate(members):
+                item = dict(template)
+                if bubble is not None:
+                    item["bubble_wrap"] = float(bubble[position])
+                materials[i] = item
+        
+        return materials, box_sizes, round_like_builtin(costs, 2)
@@ -0,0 +1,325 @@
+"""In-memory pool of orders waiting for a packer."""
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+import math
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from core.config import settings
+from core.constants import OrderStatus
+from services.geo_index import KM_PER_DEGREE, equirectangular_prefilter, haversine_many_km
+from services.inventory_matrix import MATERIAL_NAMES, encode_many, encode_materials, unknown_materials
+from services.surge_pricing import SurgePricing, surge_pricing
+
+
+@dataclass
+class PooledOrder:
+    """Snapshot of the order fields the live feed and dispatchers need."""
+    id: int
+    created_at: Optional[datetime]
+    pickup_lat: float
+    pickup_lng: float
+    materials_required: Dict[str, float]
+    # Materials encoded once, when the order enters the pool
+    requirements: np.ndarray = field(repr=False, default=None)
+    # Materials outside MATERIAL_TYPES, checked by dictionary
+    extras: Dict[str, float] = field(default_factory=dict)
+    pooled_at: float = 0.0
+
+
+class OrderPool:
+    """
+    CREATED orders held in memory on a uniform lat/lng grid.
+
+    Orders enter the pool when they are created and leave when they are
+    claimed or cancelled, so reading the live feed needs no scan of the
+    orders table. Each API worker keeps its own pool; reconcile() rebuilds
+    it from the database periodically to pick up changes made elsewhere.
+    """
+
+    def __init__(
+        self,
+        cell_size_deg: float = 0.05,
+        refresh_seconds: float = 30.0,
+        surge: Optional[SurgePricing] = None
+    ):
+        self.cell_size_deg = cell_size_deg
+        self.refresh_seconds = refresh_seconds
+        # Told about every order entering or leaving, as surge pricing demand
+        self.surge = surge
+        self._cells: Dict[Tuple[int, int], Dict[int, PooledOrder]] = {}
+        self._entries: Dict[int, PooledOrder] = {}
+        # Removal times, so a reconcile does not resurrect an order removed
+        # while its snapshot was being read
+        self._removed_at: Dict[int, float] = {}
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._entries
+
+    def cell_for(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Grid cell containing a point."""
+        return (
+            int(math.floor(lat / self.cell_size_deg)),
+            int(math.floor(lng / self.cell_size_deg)),
+        )
+
+    def get(self, order_id: int) -> Optional[PooledOrder]:
+        """Pooled snapshot of an order, if it is waiting for a packer."""
+        return self._entries.get(order_id)
+
+    @staticmethod
+    def _entry(order_id, created_at, lat, lng, materials) -> PooledOrder:
+        materials = dict(materials or {})
+        return PooledOrder(
+            id=order_id,
+            created_at=created_at,
+            pickup_lat=float(lat),
+            pickup_lng=float(lng),
+            materials_required=materials,
+            requirements=encode_materials(materials),
+            extras=unknown_materials(materials),
+            pooled_at=time.monotonic(),
+        )
+
+    def _insert(self, entry: PooledOrder) -> None:
+        self._discard(entry.id)
+        self._entries[entry.id] = entry
+        self._cells.setdefault(self.cell_for(entry.pickup_lat, entry.pickup_lng), {})[entry.id] = entry
+        if self.surge is not None:
+            self.surge.order_added(entry.pickup_lat, entry.pickup_lng)
+
+    def _discard(self, order_id: int) -> None:
+        entry = self._entries.pop(order_id, None)
+        if entry is None:
+            return
+        if self.surge is not None:
+            self.surge.order_removed(entry.pickup_lat, entry.pickup_lng)
+        key = self.cell_for(entry.pickup_lat, entry.pickup_lng)
+        cell = self._cells.get(key)
+        if cell is not None:
+            cell.pop(order_id, None)
+            if not cell:
+                del self._cells[key]
+
+    def add(self, order: Order) -> None:
+        """
+        Insert an order into the pool.
+
+        Args:
+            order: Order model instance, committed and waiting for a packer
+        """
+        lat = order.pickup_lat if order.pickup_lat is not None else order.pickup_location["lat"]
+        lng = order.pickup_lng if order.pickup_lng is not None else order.pickup_location["lng"]
+        entry = self._entry(order.id, order.created_at, lat, lng, order.materials_required)
+        with self._lock:
+            self._removed_at.pop(order.id, None)
+            self._insert(entry)
+
+    def remove(self, order_id: int) -> None:
+        """Drop an order from the pool (claimed, cancelled or gone)."""
+        with self._lock:
+            self._discard(order_id)
+            if self._loaded_at is not None:
+                self._removed_at[order_id] = time.monotonic()
+
+    def sync(self, order: Order) -> None:
+        """
+        Bring the pool in line with an order row.
+
+        CREATED orders are inserted; any other status removes the order.
+
+        Args:
+            order: Order model instance
+        """
+        if order.id is None:
+            return
+        if order.status == OrderStatus.CREATED:
+            self.add(order)
+        else:
+            self.remove(order.id)
+
+    def reconcile(self, db: Session) -> Dict[str, int]:
+        """
+        Rebuild the pool from the CREATED orders in the database.
+
+        Orders added or removed in this process while the rows were being
+        read keep their in-memory state; everything else follows the table.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Counts of orders added, removed and now pooled
+        """
+        started = time.monotonic()
+        rows = db.query(
+            Order.id, Order.created_at, Order.pickup_lat, Order.pickup_lng, Order.materials_required
+        ).filter(
+            Order.status == OrderStatus.CREATED,
+            Order.pickup_lat.isnot(None),
+            Order.pickup_lng.isnot(None)
+        ).all()
+        found = {
+            row.id: self._entry(row.id, row.created_at, row.pickup_lat, row.pickup_lng, row.materials_required)
+            for row in rows
+        }
+
+        with self._lock:
+            recent = {
+                order_id: entry for order_id, entry in self._entries.items()
+                if entry.pooled_at >= started
+            }
+            removed_since = {
+                order_id for order_id, removed_at in self._removed_at.items()
+                if removed_at >= started
+            }
+            before = set(self._entries)
+
+            self._cells = {}
+            self._entries = {}
+            if self.surge is not None:
+                self.surge.reset_orders()
+            for order_id, entry in found.items():
+                if order_id not in removed_since and order_id not in recent:
+                    self._insert(entry)
+            for entry in recent.values():
+                self._insert(entry)
+
+            self._removed_at = {order_id: self._removed_at[order_id] for order_id in removed_since}
+            self._loaded_at = started
+            after = set(self._entries)
+
+        return {
+            "added": len(after - before),
+            "removed": len(before - after),
+            "orders": len(after),
+        }
+
+    def load(self, db: Session) -> None:
+        """
+        Rebuild the pool from the database.
+
+        Args:
+            db: Database session
+        """
+        self.reconcile(db)
+
+    def is_stale(self) -> bool:
+        """Whether the pool has never been loaded or is overdue for a reconcile."""
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def ensure_fresh(self, db: Session) -> None:
+        """
+        Reconcile the pool if it is stale.
+
+        The API runs reconcile() in the background, so this only does work on
+        first use and in processes without that job.
+
+        Args:
+            db: Database session
+        """
+        if self.is_stale():
+            self.reconcile(db)
+
+    def clear(self) -> None:
+        """Empty the pool and mark it as not loaded."""
+        with self._lock:
+            self._cells = {}
+            self._entries = {}
+            self._removed_at = {}
+            self._loaded_at = None
+            if self.surge is not None:
+                self.surge.reset_orders()
+
+    def order_ids(self) -> List[int]:
+        """IDs of every pooled order."""
+        with self._lock:
+            return list(self._entries)
+
+    def within_radius(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float
+    ) -> Tuple[List[PooledOrder], np.ndarray]:
+        """
+        Pooled orders whose pickup point is within a radius.
+
+        Args:
+            lat: Query latitude
+            lng: Query longitude
+            radius_km: Search radius in kilometers
+
+        Returns:
+            Tuple of (orders, unrounded distances in km)
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / max(KM_PER_DEGREE * math.cos(math.radians(min(89.9, abs(lat) + dlat))), 1e-9)
+        min_i, min_j = self.cell_for(lat - dlat, lng - dlng)
+        max_i, max_j = self.cell_for(lat + dlat, lng + dlng)
+
+        candidates: List[PooledOrder] = []
+        with self._lock:
+            for i in range(min_i, max_i + 1):
+                for j in range(min_j, max_j + 1):
+                    cell = self._cells.get((i, j))
+                    if cell:
+                        candidates.extend(cell.values())
+        if not candidates:
+            return [], np.zeros(0)
+
+        lats = np.fromiter((c.pickup_lat for c in candidates), dtype=np.float64, count=len(candidates))
+        lngs = np.fromiter((c.pickup_lng for c in candidates), dtype=np.float64, count=len(candidates))
+        keep = np.flatnonzero(equirectangular_prefilter(lat, lng, lats, lngs, radius_km))
+        distances = haversine_many_km(lat, lng, lats[keep], lngs[keep])
+        inside = distances <= radius_km
+        return [candidates[i] for i in keep[inside].tolist()], distances[inside]
+
+    @staticmethod
+    def requirements(entries: List[PooledOrder]) -> np.ndarray:
+        """Precomputed material vectors of pooled orders, one row each."""
+        if not entries:
+            return np.zeros((0, len(MATERIAL_NAMES)))
+        return np.vstack([entry.requirements for entry in entries])
+
+    def requirements_for(self, orders: List[Order]) -> np.ndarray:
+        """
+        Material vectors for orders, reusing the pooled encoding when available.
+
+        Args:
+            orders: Order model instances
+
+        Returns:
+            Float64 matrix with one row per order
+        """
+        if not orders:
+            return np.zeros((0, len(MATERIAL_NAMES)))
+        with self._lock:
+            pooled = [self._entries.get(order.id) for order in orders]
+        if all(entry is None for entry in pooled):
+            return encode_many(order.materials_required for order in orders)
+        return np.vstack([
+            entry.requirements if entry is not None else encode_materials(order.materials_required)
+            for order, entry in zip(orders, pooled)
+        ])
+
+
+# Process-wide pool shared by the live order feed and the batch dispatcher.
+# The background reconcile normally runs well before reads find it stale.
+order_pool = OrderPool(
+    cell_size_deg=settings.ORDER_POOL_CELL_SIZE_DEG,
+    refresh_seconds=2 * settings.ORDER_POOL_RECONCILE_SECONDS,
+    surge=surge_pricing,
+)
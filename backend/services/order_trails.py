@@ -0,0 +1,298 @@
+"""Compressed location trails of packers working on orders."""
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+from datetime import datetime, timezone
+import math
+import threading
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from models.trail import OrderTrail
+from core.config import settings
+from services.packer_locations import LocationFix
+from services.tracking_stream import ACTIVE_STATUSES
+
+
+# Encoding format version, stored as the first byte
+_FORMAT_VERSION = 1
+
+_METERS_PER_DEGREE = math.pi * 6_371_000 / 180
+
+
+class TrailPoint(NamedTuple):
+    """A trail point in whole seconds and integer microdegrees."""
+    t: int
+    lat_e6: int
+    lng_e6: int
+
+    @classmethod
+    def from_fix(cls, fix: LocationFix) -> "TrailPoint":
+        return cls(int(fix.recorded_at.timestamp()), round(fix.lat * 1e6), round(fix.lng * 1e6))
+
+    @property
+    def recorded_at(self) -> datetime:
+        return datetime.fromtimestamp(self.t, tz=timezone.utc)
+
+    @property
+    def lat(self) -> float:
+        return self.lat_e6 / 1e6
+
+    @property
+    def lng(self) -> float:
+        return self.lng_e6 / 1e6
+
+
+def encode_points(points: Iterable[TrailPoint]) -> bytes:
+    """
+    Encode trail points as zigzag varint deltas from the previous point.
+
+    Consecutive fixes differ by a few seconds and a few hundred
+    microdegrees, so most points take four to six bytes.
+
+    Args:
+        points: Trail points in time order
+
+    Returns:
+        Encoded bytes
+    """
+    out = bytearray([_FORMAT_VERSION])
+    previous = (0, 0, 0)
+    for point in points:
+        for value, last in zip(point, previous):
+            delta = value - last
+            zigzag = (delta << 1) ^ (delta >> 63)
+            while zigzag >= 0x80:
+                out.append((zigzag & 0x7F) | 0x80)
+                zigzag >>= 7
+            out.append(zigzag)
+        previous = point
+    return bytes(out)
+
+
+def decode_points(data: bytes) -> List[TrailPoint]:
+    """
+    Decode bytes produced by encode_points.
+
+    Args:
+        data: Encoded bytes
+
+    Returns:
+        Trail points in time order
+
+    Raises:
+        ValueError: If the data is not in a known format
+    """
+    if not data:
+        return []
+    if data[0] != _FORMAT_VERSION:
+        raise ValueError(f"Unknown trail format {data[0]}")
+
+    values = []
+    value = shift = 0
+    for byte in data[1:]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append((value >> 1) ^ -(value & 1))
+        value = shift = 0
+    if shift or len(values) % 3:
+        raise ValueError("Truncated trail")
+
+    points = []
+    t = lat = lng = 0
+    for i in range(0, len(values), 3):
+        t += values[i]
+        lat += values[i + 1]
+        lng += values[i + 2]
+        points.append(TrailPoint(t, lat, lng))
+    return points
+
+
+def simplify(points: List[TrailPoint], tolerance_m: float) -> List[int]:
+    """
+    Douglas-Peucker simplification of a trail.
+
+    Args:
+        points: Trail points in time order
+        tolerance_m: Largest distance a dropped point may be from the kept route
+
+    Returns:
+        Indices of the points to keep, always including the first and last
+    """
+    n = len(points)
+    if n <= 2 or tolerance_m <= 0:
+        return list(range(n))
+
+    # Equirectangular projection is accurate to well under a metre at city scale
+    lat = np.array([point.lat_e6 for point in points], dtype=np.float64) / 1e6
+    lng = np.array([point.lng_e6 for point in points], dtype=np.float64) / 1e6
+    y = lat * _METERS_PER_DEGREE
+    x = lng * _METERS_PER_DEGREE * math.cos(math.radians(float(lat.mean())))
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        px, py = x[first + 1:last], y[first + 1:last]
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        length_sq = dx * dx + dy * dy
+        if length_sq == 0:
+            distances = np.hypot(px - x[first], py - y[first])
+        else:
+            along = np.clip(((px - x[first]) * dx + (py - y[first]) * dy) / length_sq, 0.0, 1.0)
+            distances = np.hypot(px - (x[first] + along * dx), py - (y[first] + along * dy))
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            index = first + 1 + farthest
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return np.flatnonzero(keep).tolist()
+
+
+class OrderTrails:
+    """
+    Location trails of orders in progress.
+
+    Fixes reported by packers are buffered and appended to the trail of each
+    of the packer's active orders by flush(). A stored trail is the committed,
+    simplified route followed by the packer's latest position. The raw fixes
+    since the last committed point (the tail) are kept in memory so that
+    every flush simplifies them together; committing a point only once later
+    fixes show it is a real turn keeps trails small however often packers
+    report.
+    """
+
+    def __init__(self, tolerance_m: float = 5.0, max_tail: int = 600):
+        self.tolerance_m = tolerance_m
+        self.max_tail = max_tail
+        self._pending: Dict[int, List[TrailPoint]] = {}
+        self._tails: Dict[int, List[TrailPoint]] = {}
+        self._lock = threading.Lock()
+
+    def extend(self, packer_id: int, fixes: Iterable[LocationFix]) -> None:
+        """
+        Buffer a packer's new fixes until the next flush.
+
+        Args:
+            packer_id: Packer ID
+            fixes: Fixes accepted for the packer, in time order
+        """
+        points = [TrailPoint.from_fix(fix) for fix in fixes]
+        if not points:
+            return
+        with self._lock:
+            self._pending.setdefault(packer_id, []).extend(points)
+
+    def pending(self) -> int:
+        """Packers with fixes not yet added to a trail."""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, db: Session) -> int:
+        """
+        Append buffered fixes to the trails of the packers' active orders.
+
+        Fixes of packers with no active order are dropped.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of trails written
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        try:
+            orders = db.query(Order.id, Order.packer_id).filter(
+                Order.packer_id.in_(list(batch)),
+                Order.status.in_(ACTIVE_STATUSES)
+            ).all()
+            if not orders:
+                return 0
+
+            # Lock the rows so API processes flushing together do not lose points
+            rows = {
+                row.order_id: row for row in db.query(OrderTrail).filter(
+                    OrderTrail.order_id.in_([order_id for order_id, _ in orders])
+                ).with_for_update().all()
+            }
+
+            tails = {}
+            for order_id, packer_id in orders:
+                row = rows.get(order_id)
+                stored = decode_points(row.points) if row is not None else []
+                committed, tail = self._extend_trail(stored, self._tails.get(order_id), batch[packer_id])
+                tails[order_id] = tail
+
+                points = committed if committed[-1:] == tail[-1:] else committed + tail[-1:]
+                if row is None:
+                    row = OrderTrail(order_id=order_id)
+                    db.add(row)
+                row.points = encode_points(points)
+                row.point_count = len(points)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for packer_id, points in batch.items():
+                    self._pending[packer_id] = points + self._pending.get(packer_id, [])
+            raise
+
+        # Only tails written this round are kept, which also forgets finished
+        # orders; an order whose packer skipped a round just commits its tail
+        with self._lock:
+            self._tails = tails
+        return len(tails)
+
+    def _extend_trail(
+        self,
+        stored: List[TrailPoint],
+        tail: List[TrailPoint],
+        new_points: List[TrailPoint]
+    ) -> Tuple[List[TrailPoint], List[TrailPoint]]:
+        """Committed points and the new tail after adding fixes to a trail."""
+        # The stored trail ends with the tail's last point unless another
+        # process wrote it since; then everything stored counts as committed
+        if tail and len(tail) > 1 and stored[-2:] == [tail[0], tail[-1]]:
+            committed = stored[:-1]
+        elif tail and len(tail) == 1 and stored[-1:] == tail:
+            committed = stored
+        else:
+            committed = stored
+            tail = stored[-1:]
+
+        tail = list(tail)
+        for point in sorted(new_points):
+            if not tail or point.t > tail[-1].t:
+                tail.append(point)
+
+        kept = simplify(tail, self.tolerance_m)
+        if len(tail) > self.max_tail:
+            anchor = len(tail) - 1
+        else:
+            anchor = kept[-2] if len(kept) >= 2 else 0
+        first = 1 if committed else 0
+        committed = committed + [tail[i] for i in kept if first <= i <= anchor]
+        return committed, tail[anchor:]
+
+    def clear(self) -> None:
+        """Drop buffered fixes and tails."""
+        with self._lock:
+            self._pending = {}
+            self._tails = {}
+
+
+# Process-wide buffers fed by the location routes
+order_trails = OrderTrails(
+    tolerance_m=settings.ORDER_TRAIL_TOLERANCE_M,
+    max_tail=settings.ORDER_TRAIL_MAX_TAIL
+)
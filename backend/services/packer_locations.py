@@ -0,0 +1,202 @@
+"""In-memory packer positions with write-behind to the database."""
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from collections import deque
+from datetime import datetime, timezone
+import threading
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from models.packer import Packer
+from models.tracking import OrderTracking
+from core.config import settings
+from core.constants import ACTIVE_ORDER_STATUSES
+
+
+class LocationFix(NamedTuple):
+    """One GPS fix reported by a packer."""
+    recorded_at: datetime
+    lat: float
+    lng: float
+
+
+def _utc(value: Optional[datetime]) -> datetime:
+    # Device clocks run ahead sometimes; a fix from the future would hide
+    # every later one, so clamp to the server's clock
+    now = datetime.now(timezone.utc)
+    if value is None:
+        return now
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return min(value.astimezone(timezone.utc), now)
+
+
+class PackerLocations:
+    """
+    Latest GPS fixes per packer, held in memory.
+
+    Each packer has a fixed-size ring buffer of recent fixes. Only the newest
+    fix of each packer is written back, and only by flush(), which turns
+    every fix received since the last flush into one batched UPDATE. Reads
+    that need the current position (dispatch, tracking) use position(),
+    which prefers the in-memory fix over the database row unless another
+    worker has written the row since.
+    """
+
+    def __init__(self, trail_size: int = 120):
+        self.trail_size = trail_size
+        self._trails: Dict[int, Deque[LocationFix]] = {}
+        self._dirty: Dict[int, LocationFix] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._trails)
+
+    def record(
+        self,
+        packer_id: int,
+        fixes: Iterable[Tuple[Optional[datetime], float, float]]
+    ) -> Tuple[List[LocationFix], Optional[LocationFix]]:
+        """
+        Add fixes to a packer's trail.
+
+        Fixes are applied in time order; any no newer than the packer's
+        latest fix are ignored, so retried or reordered uploads are harmless.
+
+        Args:
+            packer_id: Packer ID
+            fixes: (recorded_at, lat, lng) tuples; recorded_at None means now
+
+        Returns:
+            Tuple of (fixes accepted in time order, packer's latest fix)
+        """
+        ordered = sorted(
+            (LocationFix(_utc(recorded_at), float(lat), float(lng)) for recorded_at, lat, lng in fixes),
+            key=lambda fix: fix.recorded_at
+        )
+        accepted = []
+        with self._lock:
+            trail = self._trails.get(packer_id)
+            if trail is None:
+                trail = self._trails[packer_id] = deque(maxlen=self.trail_size)
+            for fix in ordered:
+                if trail and fix.recorded_at <= trail[-1].recorded_at:
+                    continue
+                trail.append(fix)
+                accepted.append(fix)
+            latest = trail[-1] if trail else None
+            if accepted:
+                self._dirty[packer_id] = latest
+        return accepted, latest
+
+    def latest(self, packer_id: int) -> Optional[LocationFix]:
+        """Newest fix held for a packer, if any."""
+        with self._lock:
+            trail = self._trails.get(packer_id)
+            return trail[-1] if trail else None
+
+    def trail(self, packer_id: int) -> List[LocationFix]:
+        """Recent fixes for a packer, oldest first."""
+        with self._lock:
+            return list(self._trails.get(packer_id, ()))
+
+    def position(self, packer: Packer) -> Tuple[float, float]:
+        """
+        Freshest known position of a packer.
+
+        The in-memory fix is used while it is unsaved or newer than the
+        row's updated_at. Flushes bump updated_at, so once another worker
+        has written a newer position the row wins over a fix this process
+        received earlier.
+
+        Args:
+            packer: Packer model instance
+
+        Returns:
+            (lat, lng) from memory or from the row, whichever is newer
+        """
+        fix = self.newer_than(packer.id, packer.updated_at)
+        if fix is not None:
+            return fix.lat, fix.lng
+        return float(packer.lat), float(packer.lng)
+
+    def newer_than(self, packer_id: int, saved_at: Optional[datetime]) -> Optional[LocationFix]:
+        """
+        The packer's latest fix if it should win over a row written at saved_at.
+
+        Args:
+            packer_id: Packer ID
+            saved_at: updated_at of the row holding the packer's position
+
+        Returns:
+            The fix if it is unsaved or newer than saved_at, else None
+        """
+        with self._lock:
+            trail = self._trails.get(packer_id)
+            fix = trail[-1] if trail else None
+            unsaved = packer_id in self._dirty
+        if fix is not None and (unsaved or saved_at is None or fix.recorded_at > _utc(saved_at)):
+            return fix
+        return None
+
+    def pending(self) -> int:
+        """Packers whose latest fix has not been written yet."""
+        with self._lock:
+            return len(self._dirty)
+
+    def discard_unsaved(self, packer_id: int) -> None:
+        """Stop a packer's unsaved fix from being written, e.g. after a newer position was written directly."""
+        with self._lock:
+            self._dirty.pop(packer_id, None)
+
+    def flush(self, db: Session) -> int:
+        """
+        Write the latest unsaved fix of every packer in one batched UPDATE.
+
+        The tracking read models of the packers' active orders are updated
+        in the same transaction.
+
+        Fixes that fail to write are kept for the next flush unless a newer
+        fix has arrived in the meantime.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of packers written
+        """
+        with self._lock:
+            batch, self._dirty = self._dirty, {}
+        if not batch:
+            return 0
+
+        try:
+            db.execute(
+                update(Packer),
+                [{"id": packer_id, "lat": fix.lat, "lng": fix.lng} for packer_id, fix in batch.items()]
+            )
+            db.execute(
+                update(OrderTracking.__table__).where(
+                    OrderTracking.packer_id == bindparam("b_packer_id"),
+                    OrderTracking.current_status.in_(ACTIVE_ORDER_STATUSES)
+                ).values(packer_lat=bindparam("b_lat"), packer_lng=bindparam("b_lng")),
+                [{"b_packer_id": packer_id, "b_lat": fix.lat, "b_lng": fix.lng} for packer_id, fix in batch.items()]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for packer_id, fix in batch.items():
+                    self._dirty.setdefault(packer_id, fix)
+            raise
+        return len(batch)
+
+    def clear(self) -> None:
+        """Drop every packer's fixes, including unsaved ones."""
+        with self._lock:
+            self._trails = {}
+            self._dirty = {}
+
+
+# Process-wide positions shared by the location routes, dispatcher and tracking
+packer_locations = PackerLocations(trail_size=settings.PACKER_LOCATION_TRAIL_SIZE)
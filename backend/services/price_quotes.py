@@ -0,0 +1,111 @@
+"""Signed, expiring price quotes."""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+
+from jose import JWTError, jwt
+
+from core.config import settings
+from core.constants import TOKEN_TYPE_QUOTE
+from services.estimate_cache import quantize_dimensions, quantize_distance
+
+
+def _value(value) -> Any:
+    # Enum members and their string values fingerprint the same
+    return getattr(value, "value", value)
+
+
+class PriceQuotes:
+    """
+    Price estimates handed to clients as signed tokens.
+
+    A quote carries the materials and price computed for a request and a
+    fingerprint of the inputs they were computed from. Order creation
+    takes the quote instead of estimating again when the signature holds,
+    it has not expired and the order has the same inputs, so the price a
+    client was shown is the price the order gets.
+    """
+
+    @staticmethod
+    def fingerprint(request) -> str:
+        """
+        Digest of the request fields that determine materials and price.
+
+        Dimensions and distance are quantized as the estimate cache does, so
+        requests estimated alike fingerprint alike.
+
+        Args:
+            request: PriceEstimateRequest or OrderCreate
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        pickup = request.pickup_location
+        inputs = {
+            "category": _value(request.category),
+            "fragility_level": _value(request.fragility_level),
+            "urgency": _value(request.urgency),
+            "item_dimensions": quantize_dimensions(request.item_dimensions.model_dump()),
+            "items": [item.model_dump() for item in request.items] if request.items else None,
+            "distance_km": quantize_distance(request.distance_km),
+            "pickup": [pickup.lat, pickup.lng] if pickup is not None else None,
+        }
+        encoded = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @staticmethod
+    def issue(request, materials: Dict[str, float], price_breakdown: Dict[str, float]) -> Tuple[str, datetime]:
+        """
+        Sign a quote for an estimate.
+
+        Args:
+            request: Price estimation request
+            materials: Estimated materials
+            price_breakdown: Price breakdown from PricingEngine
+
+        Returns:
+            Tuple of (quote token, expiry time in UTC)
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(minutes=settings.QUOTE_EXPIRE_MINUTES)
+        payload = {
+            "token_type": TOKEN_TYPE_QUOTE,
+            "inputs": PriceQuotes.fingerprint(request),
+            "materials": materials,
+            "final_price": price_breakdown["final_price"],
+            "pricing_version": price_breakdown["pricing_version"],
+            "surge_multiplier": price_breakdown["surge_multiplier"],
+            "iat": now,
+            "exp": expires_at,
+        }
+        return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM), expires_at
+
+    @staticmethod
+    def redeem(token: str, request) -> Optional[Dict[str, Any]]:
+        """
+        Read a quote back for an order.
+
+        Args:
+            token: Quote token from the estimate endpoint
+            request: Order creation data
+
+        Returns:
+            Dictionary with materials, final_price, pricing_version and
+            surge_multiplier, or None if the quote is invalid, expired or
+            for other inputs
+        """
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        if payload.get("token_type") != TOKEN_TYPE_QUOTE:
+            return None
+        if payload.get("inputs") != PriceQuotes.fingerprint(request):
+            return None
+        return {
+            "materials": payload["materials"],
+            "final_price": payload["final_price"],
+            "pricing_version": payload["pricing_version"],
+            "surge_multiplier": payload["surge_multiplier"],
+        }
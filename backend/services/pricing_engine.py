@@ -1,9 +1,10 @@
 """Pricing engine service."""
-from typing import Dict
+from typing import Dict, Optional, Sequence
 
-from core.config import settings
-from core.constants import CATEGORY_MULTIPLIERS, PackagingCategory, UrgencyLevel
-from services.material_estimator import MaterialEstimator
+import numpy as np
+
+from services.material_estimator import MaterialEstimator, round_like_builtin
+from services.pricing_rules import PricingRules, pricing_rules
 
 
 class PricingEngine:
@@ -14,7 +15,9 @@ class PricingEngine:
         category: str,
         materials: Dict[str, float],
         distance_km: float,
-        urgency: str
+        urgency: str,
+        rules: Optional[PricingRules] = None,
+        surge_multiplier: float = 1.0
     ) -> Dict[str, float]:
         """
         Calculate dynamic price for an order.
@@ -24,34 +27,34 @@ class PricingEngine:
             materials: Dictionary of materials and quantities
             distance_km: Distance to packer in km
             urgency: Urgency level
+            rules: Pricing rules to apply; the rules in force if None
+            surge_multiplier: Supply and demand multiplier at the pickup point,
+                from SurgePricing.multiplier
             
         Returns:
-            Dictionary with price breakdown
+            Dictionary with price breakdown and the ruleset version used
         """
+        rules = rules or pricing_rules.current()
+        
         # Calculate material cost
-        material_cost = MaterialEstimator.calculate_material_cost(materials)
+        material_cost = MaterialEstimator.calculate_material_cost(materials, rules.material_costs)
         
         # Base price: materials + packing fee
-        base_price = material_cost + settings.BASE_PACKING_FEE
+        base_price = material_cost + rules.base_packing_fee
         
         # Distance charge
-        distance_charge = distance_km * settings.PRICE_PER_KM
+        distance_charge = distance_km * rules.price_per_km
         
         # Urgency multiplier
-        urgency_multiplier = (
-            settings.URGENT_MULTIPLIER 
-            if urgency == UrgencyLevel.URGENT 
-            else 1.0
-        )
+        urgency_multiplier = rules.urgency_multiplier(urgency)
         
         # Category multiplier
-        category_multiplier = CATEGORY_MULTIPLIERS.get(
-            PackagingCategory(category), 
-            1.0
-        )
+        category_multiplier = rules.category_multiplier(category)
         
         # Final price calculation
-        final_price = (base_price + distance_charge) * urgency_multiplier * category_multiplier
+        final_price = (
+            (base_price + distance_charge) * urgency_multiplier * category_multiplier * surge_multiplier
+        )
         
         return {
             "base_price": round(base_price, 2),
@@ -59,5 +62,54 @@ class PricingEngine:
             "distance_charge": round(distance_charge, 2),
             "urgency_multiplier": urgency_multiplier,
             "category_multiplier": category_multiplier,
+            "surge_multiplier": surge_multiplier,
             "final_price": round(final_price, 2),
+            "pricing_version": rules.version,
+        }
+    
+    @staticmethod
+    def calculate_prices(
+        categories: Sequence[str],
+        material_costs: np.ndarray,
+        distances_km: np.ndarray,
+        urgencies: Sequence[str],
+        rules: Optional[PricingRules] = None,
+        surge_multipliers: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_price.
+        
+        Args:
+            categories: Packaging category of each order
+            material_costs: Material cost of each order, as from
+                MaterialEstimator.estimate_materials_many
+            distances_km: Distance of each order in km
+            urgencies: Urgency level of each order
+            rules: Pricing rules to apply, the same ones material_costs were
+                computed with; the rules in force if None
+            surge_multipliers: Surge multiplier of each order; 1 if None
+            
+        Returns:
+            Dictionary with the price breakdown arrays
+        """
+        rules = rules or pricing_rules.current()
+        base_price = material_costs + rules.base_packing_fee
+        distance_charge = distances_km * rules.price_per_km
+        # Looked up once per distinct value; large batches repeat a few categories
+        urgency_lookup = {urgency: rules.urgency_multiplier(urgency) for urgency in set(urgencies)}
+        category_lookup = {category: rules.category_multiplier(category) for category in set(categories)}
+        urgency_multiplier = np.array([urgency_lookup[urgency] for urgency in urgencies], dtype=np.float64)
+        category_multiplier = np.array([category_lookup[category] for category in categories], dtype=np.float64)
+        if surge_multipliers is None:
+            surge_multipliers = np.ones(len(categories))
+        final_price = (base_price + distance_charge) * urgency_multiplier * category_multiplier * surge_multipliers
+        
+        return {
+            "base_price": round_like_builtin(base_price, 2),
+            "material_cost": round_like_builtin(material_costs, 2),
+            "distance_charge": round_like_builtin(distance_charge, 2),
+            "urgency_multiplier": urgency_multiplier,
+            "category_multiplier": category_multiplier,
+            "surge_multiplier": surge_multipliers,
+            "final_price": round_like_builtin(final_price, 2),
         }
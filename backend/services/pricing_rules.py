@@ -0,0 +1,262 @@
+"""Versioned pricing rules."""
+from typing import Dict, Mapping, Optional
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.constants import CATEGORY_MULTIPLIERS, MATERIAL_TYPES, UrgencyLevel
+from models.material import Material
+from models.pricing import PricingRuleset
+
+
+def _name(value) -> str:
+    # Enum members and their string values look up the same entry
+    return str(getattr(value, "value", value))
+
+
+@dataclass(frozen=True)
+class PricingRules:
+    """
+    Immutable snapshot of one pricing ruleset version.
+
+    Version 0 is the built-in rules from Settings and core.constants, used
+    until a ruleset is published.
+    """
+    version: int
+    base_packing_fee: float
+    price_per_km: float
+    urgent_multiplier: float
+    category_multipliers: Mapping[str, float]
+    material_costs: Mapping[str, float]
+
+    @classmethod
+    def from_row(cls, row: PricingRuleset) -> "PricingRules":
+        return cls(
+            version=row.version,
+            base_packing_fee=float(row.base_packing_fee),
+            price_per_km=float(row.price_per_km),
+            urgent_multiplier=float(row.urgent_multiplier),
+            category_multipliers=MappingProxyType(
+                {_name(name): float(value) for name, value in row.category_multipliers.items()}
+            ),
+            material_costs=MappingProxyType(
+                {name: float(value) for name, value in row.material_costs.items()}
+            ),
+        )
+
+    def category_multiplier(self, category: str) -> float:
+        """Multiplier of a category; 1.0 for categories without one."""
+        return self.category_multipliers.get(_name(category), 1.0)
+
+    def urgency_multiplier(self, urgency: str) -> float:
+        """Multiplier of an urgency level."""
+        return self.urgent_multiplier if urgency == UrgencyLevel.URGENT else 1.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "base_packing_fee": self.base_packing_fee,
+            "price_per_km": self.price_per_km,
+            "urgent_multiplier": self.urgent_multiplier,
+            "category_multipliers": dict(self.category_multipliers),
+            "material_costs": dict(self.material_costs),
+        }
+
+
+def default_rules() -> PricingRules:
+    """The built-in rules, as version 0."""
+    return PricingRules(
+        version=0,
+        base_packing_fee=settings.BASE_PACKING_FEE,
+        price_per_km=settings.PRICE_PER_KM,
+        urgent_multiplier=settings.URGENT_MULTIPLIER,
+        category_multipliers=MappingProxyType(
+            {_name(name): value for name, value in CATEGORY_MULTIPLIERS.items()}
+        ),
+        material_costs=MappingProxyType(
+            {name: spec["base_cost"] for name, spec in MATERIAL_TYPES.items()}
+        ),
+    )
+
+
+class PricingRuleStore:
+    """
+    The pricing rules in force in this process.
+
+    Rulesets are append-only rows; the newest one is in force. Every process
+    holds a compiled snapshot and swaps in a newer one as a single reference
+    assignment when load() finds it, so a price is always computed from one
+    complete version. Callers that price in several steps should take
+    current() once and pass it along.
+    """
+
+    def __init__(self):
+        self._current = default_rules()
+        self._lock = threading.Lock()
+
+    def current(self) -> PricingRules:
+        """The snapshot in force."""
+        return self._current
+
+    def activate(self, rules: PricingRules) -> bool:
+        """
+        Put a snapshot in force unless a newer one already is.
+
+        Args:
+            rules: Compiled ruleset
+
+        Returns:
+            True if the snapshot was swapped in
+        """
+        with self._lock:
+            if rules.version <= self._current.version:
+                return False
+            self._current = rules
+            return True
+
+    def load(self, db: Session) -> bool:
+        """
+        Swap in the newest published ruleset if it is newer than the current one.
+
+        Args:
+            db: Database session
+
+        Returns:
+            True if a new version was swapped in
+        """
+        latest = db.query(func.max(PricingRuleset.version)).scalar()
+        if latest is None or latest <= self._current.version:
+            return False
+        return self.activate(PricingRules.from_row(db.get(PricingRuleset, latest)))
+
+    def draft(
+        self,
+        base_packing_fee: Optional[float] = None,
+        price_per_km: Optional[float] = None,
+        urgent_multiplier: Optional[float] = None,
+        category_multipliers: Optional[Dict[str, float]] = None,
+        material_costs: Optional[Dict[str, float]] = None
+    ) -> PricingRules:
+        """
+        The current rules with some fields changed, without publishing them.
+
+        The draft keeps the current version number; it is for evaluating
+        candidate rules (see RepricingSimulator) and building new versions.
+
+        Args:
+            base_packing_fee: Packing fee added to every order
+            price_per_km: Charge per km of distance
+            urgent_multiplier: Multiplier for urgent orders
+            category_multipliers: Multipliers to change, by category
+            material_costs: Unit costs to change, by material
+
+        Returns:
+            Compiled rules
+        """
+        current = self.current()
+        return replace(
+            current,
+            base_packing_fee=current.base_packing_fee if base_packing_fee is None else base_packing_fee,
+            price_per_km=current.price_per_km if price_per_km is None else price_per_km,
+            urgent_multiplier=current.urgent_multiplier if urgent_multiplier is None else urgent_multiplier,
+            category_multipliers=MappingProxyType({
+                **current.category_multipliers,
+                **{_name(name): value for name, value in (category_multipliers or {}).items()},
+            }),
+            material_costs=MappingProxyType({**current.material_costs, **(material_costs or {})}),
+        )
+
+    def build_candidate(
+        self,
+        db: Session,
+        base_packing_fee: Optional[float] = None,
+        price_per_km: Optional[float] = None,
+        urgent_multiplier: Optional[float] = None,
+        category_multipliers: Optional[Dict[str, float]] = None,
+        material_costs: Optional[Dict[str, float]] = None
+    ) -> PricingRules:
+        """
+        The rules publish() would put in force for these changes.
+
+        Fields left out are copied from the newest published version. Until
+        a version is published, material costs come from the materials
+        table; after that only costs passed here change them.
+
+        Args:
+            db: Database session
+            base_packing_fee: Packing fee added to every order
+            price_per_km: Charge per km of distance
+            urgent_multiplier: Multiplier for urgent orders
+            category_multipliers: Multipliers to change, by category
+            material_costs: Unit costs to change, by material
+
+        Returns:
+            Compiled rules, still numbered as the version they change
+        """
+        self.load(db)
+        costs = {}
+        if self.current().version == 0:
+            costs = {name: float(unit_cost) for name, unit_cost in db.query(Material.name, Material.unit_cost).all()}
+        costs.update(material_costs or {})
+        return self.draft(base_packing_fee, price_per_km, urgent_multiplier, category_multipliers, costs)
+
+    def publish(
+        self,
+        db: Session,
+        base_packing_fee: Optional[float] = None,
+        price_per_km: Optional[float] = None,
+        urgent_multiplier: Optional[float] = None,
+        category_multipliers: Optional[Dict[str, float]] = None,
+        material_costs: Optional[Dict[str, float]] = None,
+        note: Optional[str] = None,
+        created_by: Optional[int] = None
+    ) -> PricingRuleset:
+        """
+        Publish a new ruleset version and put it in force in this process.
+
+        The new version is build_candidate() for the same changes.
+
+        Args:
+            db: Database session
+            base_packing_fee: Packing fee added to every order
+            price_per_km: Charge per km of distance
+            urgent_multiplier: Multiplier for urgent orders
+            category_multipliers: Multipliers to change, by category
+            material_costs: Unit costs to change, by material
+            note: Why the rules changed
+            created_by: ID of the admin publishing
+
+        Returns:
+            The new ruleset row
+        """
+        rules = self.build_candidate(
+            db, base_packing_fee, price_per_km, urgent_multiplier, category_multipliers, material_costs
+        )
+
+        row = PricingRuleset(
+            base_packing_fee=rules.base_packing_fee,
+            price_per_km=rules.price_per_km,
+            urgent_multiplier=rules.urgent_multiplier,
+            category_multipliers=dict(rules.category_multipliers),
+            material_costs=dict(rules.material_costs),
+            note=note,
+            created_by=created_by,
+        )
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+        self.activate(PricingRules.from_row(row))
+        return row
+
+    def clear(self) -> None:
+        """Go back to the built-in rules."""
+        with self._lock:
+            self._current = default_rules()
+
+
+# Process-wide rules used by the pricing engine
+pricing_rules = PricingRuleStore()
@@ -0,0 +1,220 @@
+"""Revenue impact of candidate pricing rules on past orders."""
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import time
+
+import numpy as np
+from sqlalchemy import Float, String, Text, cast, func, select
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from core.config import settings
+from core.constants import OrderStatus
+from services.estimate_cache import quantize_many
+from services.material_estimator import MaterialEstimator
+from services.pricing_engine import PricingEngine
+from services.pricing_rules import PricingRules
+
+
+# Distinct material lists whose cost is remembered during one run
+_MATERIAL_COST_MEMO_SIZE = 100000
+
+
+def distance_band_labels(edges: Sequence[float]) -> List[str]:
+    """Labels of the bands np.digitize puts distances in for the given edges."""
+    bounds = [0.0] + [float(edge) for edge in edges]
+    labels = [f"{low:g}-{high:g} km" for low, high in zip(bounds, bounds[1:])]
+    return labels + [f"{bounds[-1]:g}+ km"]
+
+
+class _Totals:
+    """
+    Order counts and revenue per group, added up chunk by chunk.
+
+    Each group gets a row of a (groups, 3) array the first time it is seen,
+    so a chunk is added with three bincounts over its group codes.
+    """
+
+    def __init__(self, keys: Sequence[str] = ()):
+        self.codes: Dict[str, int] = {key: code for code, key in enumerate(keys)}
+        self.totals = np.zeros((len(self.codes), 3))
+
+    def codes_for(self, keys: Sequence[str]) -> np.ndarray:
+        """Group code of each key, adding groups not seen before."""
+        codes = self.codes
+        for key in set(keys).difference(codes):
+            codes[key] = len(codes)
+        return np.array([codes[key] for key in keys], dtype=np.intp)
+
+    def add(self, codes: np.ndarray, current: np.ndarray, candidate: np.ndarray) -> None:
+        groups = len(self.codes)
+        if groups > len(self.totals):
+            self.totals = np.vstack([self.totals, np.zeros((groups - len(self.totals), 3))])
+        self.totals[:, 0] += np.bincount(codes, minlength=groups)
+        self.totals[:, 1] += np.bincount(codes, weights=current, minlength=groups)
+        self.totals[:, 2] += np.bincount(codes, weights=candidate, minlength=groups)
+
+    def report(self, keep_order: bool = False) -> List[Dict]:
+        """Groups with orders, sorted by key unless kept in the order given."""
+        keys = list(self.codes) if keep_order else sorted(self.codes)
+        return [
+            _summary(self.totals[self.codes[key]], key=key)
+            for key in keys
+            if self.totals[self.codes[key], 0]
+        ]
+
+
+def _summary(totals: np.ndarray, **extra) -> Dict:
+    orders, current, candidate = totals.tolist()
+    return {
+        **extra,
+        "orders": int(orders),
+        "current_revenue": round(current, 2),
+        "candidate_revenue": round(candidate, 2),
+        "delta": round(candidate - current, 2),
+        "delta_percent": round(100 * (candidate - current) / current, 2) if current else 0.0,
+    }
+
+
+class RepricingSimulator:
+    """
+    Reprices past orders under candidate rules to show the revenue impact.
+
+    Orders are read in keyset-paginated chunks of a few columns, converted
+    to floats and strings in SQL and fetched as plain rows, so memory stays
+    bounded by the chunk size however many orders there are. Each chunk is
+    repriced with PricingEngine.calculate_prices, the vectorized form of
+    the formula live orders are priced with, using the distance, materials,
+    urgency and surge recorded on each order. Material costs are computed
+    once per distinct material list, as most orders share one of a few.
+    """
+
+    @staticmethod
+    def _chunks(
+        db: Session,
+        chunk_size: int,
+        start_date: Optional[date],
+        end_date: Optional[date]
+    ) -> Iterator[List[Tuple]]:
+        """Non-cancelled orders in the date range, chunk_size rows at a time in ID order."""
+        query = select(
+            Order.id,
+            Order.category,
+            Order.urgency,
+            cast(Order.materials_required, Text),
+            func.coalesce(cast(Order.distance_km, Float), 0.0),
+            func.coalesce(cast(Order.surge_multiplier, Float), 1.0),
+            cast(Order.price, Float),
+            cast(func.date(Order.created_at), String),
+        ).where(Order.status != OrderStatus.CANCELLED)
+        if start_date is not None:
+            query = query.where(Order.created_at >= start_date)
+        if end_date is not None:
+            query = query.where(Order.created_at < end_date + timedelta(days=1))
+
+        # Core rows, without the ORM's per-row loading
+        connection = db.connection()
+        last_id = 0
+        while True:
+            rows = connection.execute(query.where(Order.id > last_id).order_by(Order.id).limit(chunk_size)).all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def reprice_chunk(
+        rows: List[Tuple],
+        rules: PricingRules,
+        material_costs: Dict[str, float]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Current and candidate prices of a chunk of orders.
+
+        Args:
+            rows: (id, category, urgency, materials JSON, distance_km,
+                surge_multiplier, price, day) tuples
+            rules: Candidate pricing rules
+            material_costs: Memo of material cost by materials JSON, filled in
+                as new material lists are seen
+
+        Returns:
+            Dictionary with category and day tuples, and distance, current
+            price and candidate price arrays
+        """
+        _, categories, urgencies, materials, distances, surges, prices, days = zip(*rows)
+
+        if len(material_costs) > _MATERIAL_COST_MEMO_SIZE:
+            material_costs.clear()
+        costs = np.empty(len(rows))
+        for row, encoded in enumerate(materials):
+            cost = material_costs.get(encoded)
+            if cost is None:
+                cost = MaterialEstimator.calculate_material_cost(json.loads(encoded), rules.material_costs)
+                material_costs[encoded] = cost
+            costs[row] = cost
+
+        distances_km = np.array(distances, dtype=np.float64)
+        # Priced at the resolution live orders are (see estimate_cache)
+        candidate = PricingEngine.calculate_prices(
+            categories,
+            costs,
+            quantize_many(distances_km, settings.ESTIMATE_DISTANCE_STEP_KM),
+            urgencies,
+            rules,
+            np.array(surges, dtype=np.float64)
+        )["final_price"]
+        return {
+            "categories": categories,
+            "days": days,
+            "distances_km": distances_km,
+            "current": np.array(prices, dtype=np.float64),
+            "candidate": candidate,
+        }
+
+    @staticmethod
+    def simulate(
+        db: Session,
+        rules: PricingRules,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        chunk_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Revenue of past orders at their recorded prices and under candidate rules.
+
+        Args:
+            db: Database session
+            rules: Candidate pricing rules, e.g. from PricingRuleStore.build_candidate
+            start_date: First order day to include; all orders if None
+            end_date: Last order day to include; up to now if None
+            chunk_size: Orders per chunk; REPRICING_CHUNK_SIZE if None
+
+        Returns:
+            Totals, then revenue deltas by category, day and distance band
+        """
+        started = time.perf_counter()
+        chunk_size = chunk_size or settings.REPRICING_CHUNK_SIZE
+        edges = np.array(settings.REPRICING_DISTANCE_BANDS_KM, dtype=np.float64)
+
+        total = np.zeros(3)
+        by_category, by_day = _Totals(), _Totals()
+        # Band codes are np.digitize indices
+        by_band = _Totals(distance_band_labels(edges))
+        material_costs: Dict[str, float] = {}
+        for rows in RepricingSimulator._chunks(db, chunk_size, start_date, end_date):
+            chunk = RepricingSimulator.reprice_chunk(rows, rules, material_costs)
+            current, candidate = chunk["current"], chunk["candidate"]
+            total += (len(rows), current.sum(), candidate.sum())
+            by_category.add(by_category.codes_for(chunk["categories"]), current, candidate)
+            by_day.add(by_day.codes_for(chunk["days"]), current, candidate)
+            by_band.add(np.digitize(chunk["distances_km"], edges), current, candidate)
+
+        return {
+            **_summary(total),
+            "by_category": by_category.report(),
+            "by_day": by_day.report(),
+            "by_distance_band": by_band.report(keep_order=True),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
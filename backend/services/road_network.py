@@ -0,0 +1,583 @@
+"""
+Road-network travel distances using contraction hierarchies.
+
+Contracting a city graph takes a while, so the hierarchy is built offline
+and saved next to the extract; the API only loads it.
+
+Usage (from the backend directory):
+    python -m services.road_network /data/city.json
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import argparse
+import hashlib
+import heapq
+import json
+import time
+
+import numpy as np
+
+from services.geo_index import (
+    haversine_km,
+    haversine_many_km,
+    haversine_matrix_km,
+    KM_PER_DEGREE,
+)
+
+
+# Witness searches give up after settling this many nodes; a missed witness
+# only adds a redundant shortcut, never a wrong distance
+WITNESS_SETTLE_LIMIT = 200
+
+# Bump when the saved hierarchy layout changes
+CACHE_FORMAT_VERSION = 2
+
+INF = float("inf")
+
+
+class RoadNetwork:
+    """
+    Road graph preprocessed into a contraction hierarchy.
+
+    Nodes are contracted one at a time in order of importance, adding
+    shortcut edges wherever removing a node would lengthen a shortest path.
+    Queries then only ever move "up" the hierarchy from both ends, so each
+    search settles a few hundred nodes regardless of graph size.
+    """
+
+    def __init__(self, lats: Sequence[float], lngs: Sequence[float], edges: Iterable[Tuple[int, int, float]]):
+        """
+        Build the hierarchy.
+
+        Args:
+            lats: Node latitudes, indexed by node number
+            lngs: Node longitudes, indexed by node number
+            edges: Directed (from node, to node, length in km) edges
+        """
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+
+        node_count = len(self.lats)
+        out_edges: List[Dict[int, float]] = [{} for _ in range(node_count)]
+        in_edges: List[Dict[int, float]] = [{} for _ in range(node_count)]
+        for source, target, length in edges:
+            if source == target:
+                continue
+            if length < out_edges[source].get(target, INF):
+                out_edges[source][target] = length
+                in_edges[target][source] = length
+
+        self.up_out, self.up_in = self._contract(out_edges, in_edges)
+        self._build_snap_index()
+
+    @classmethod
+    def _from_hierarchy(
+        cls,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        up_out: List[Tuple[Tuple[int, float], ...]],
+        up_in: List[Tuple[Tuple[int, float], ...]]
+    ) -> "RoadNetwork":
+        """Network from an already contracted hierarchy."""
+        network = cls.__new__(cls)
+        network.lats, network.lngs = lats, lngs
+        network.up_out, network.up_in = up_out, up_in
+        network._build_snap_index()
+        return network
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    # ── Preprocessing ───────────────────────────────────────
+
+    @staticmethod
+    def _witness_distances(
+        out_edges: List[Dict[int, float]],
+        source: int,
+        skip: int,
+        max_distance: float,
+        targets: Dict[int, float]
+    ) -> Dict[int, float]:
+        """Shortest distances from source that avoid the node being contracted."""
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        remaining = len(targets)
+        settled = 0
+        while heap and remaining and settled < WITNESS_SETTLE_LIMIT:
+            d, node = heapq.heappop(heap)
+            if d > dist.get(node, INF):
+                continue
+            if d > max_distance:
+                break
+            settled += 1
+            if node in targets:
+                remaining -= 1
+            for neighbor, length in out_edges[node].items():
+                if neighbor == skip:
+                    continue
+                nd = d + length
+                if nd < dist.get(neighbor, INF):
+                    dist[neighbor] = nd
+                    heapq.heappush(heap, (nd, neighbor))
+        return dist
+
+    @staticmethod
+    def _shortcuts(
+        out_edges: List[Dict[int, float]],
+        in_edges: List[Dict[int, float]],
+        node: int
+    ) -> List[Tuple[int, int, float]]:
+        """Shortcuts needed to contract node without lengthening any shortest path."""
+        shortcuts = []
+        for source, in_length in in_edges[node].items():
+            via = {
+                target: in_length + out_length
+                for target, out_length in out_edges[node].items()
+                if target != source
+            }
+            if not via:
+                continue
+            witness = RoadNetwork._witness_distances(
+                out_edges, source, node, max(via.values()), via
+            )
+            for target, length in via.items():
+                if witness.get(target, INF) > length:
+                    shortcuts.append((source, target, length))
+        return shortcuts
+
+    @staticmethod
+    def _contract(
+        out_edges: List[Dict[int, float]],
+        in_edges: List[Dict[int, float]]
+    ) -> Tuple[List[Tuple[Tuple[int, float], ...]], List[Tuple[Tuple[int, float], ...]]]:
+        """
+        Contract every node, consuming the adjacency dictionaries.
+
+        Returns:
+            Upward out-edges and upward in-edges for each node
+        """
+        node_count = len(out_edges)
+        contracted_neighbors = [0] * node_count
+        contracted = [False] * node_count
+        up_out: List[Tuple[Tuple[int, float], ...]] = [()] * node_count
+        up_in: List[Tuple[Tuple[int, float], ...]] = [()] * node_count
+
+        def priority(node: int) -> Tuple[int, List[Tuple[int, int, float]]]:
+            # Edge difference plus a term that spreads contraction evenly
+            shortcuts = RoadNetwork._shortcuts(out_edges, in_edges, node)
+            removed = len(out_edges[node]) + len(in_edges[node])
+            return len(shortcuts) - removed + contracted_neighbors[node], shortcuts
+
+        heap = [(priority(node)[0], node) for node in range(node_count)]
+        heapq.heapify(heap)
+
+        while heap:
+            _, node = heapq.heappop(heap)
+            if contracted[node]:
+                continue
+
+            # Lazy update: priorities go stale as neighbours are contracted
+            current, shortcuts = priority(node)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, node))
+                continue
+
+            # Every remaining neighbour ranks higher than this node
+            up_out[node] = tuple(out_edges[node].items())
+            up_in[node] = tuple(in_edges[node].items())
+            for target in out_edges[node]:
+                del in_edges[target][node]
+                contracted_neighbors[target] += 1
+            for source in in_edges[node]:
+                del out_edges[source][node]
+                contracted_neighbors[source] += 1
+            for source, target, length in shortcuts:
+                if length < out_edges[source].get(target, INF):
+                    out_edges[source][target] = length
+                    in_edges[target][source] = length
+            out_edges[node] = {}
+            in_edges[node] = {}
+            contracted[node] = True
+
+        return up_out, up_in
+
+    def _build_snap_index(self) -> None:
+        self._by_lat = np.argsort(self.lats, kind="stable")
+        self._sorted_lats = self.lats[self._by_lat]
+
+    # ── Queries ─────────────────────────────────────────────
+
+    @staticmethod
+    def _upward_search(graph: List[Tuple[Tuple[int, float], ...]], start: int) -> Dict[int, float]:
+        """Distances to every node reachable from start along upward edges."""
+        dist = {start: 0.0}
+        heap = [(0.0, start)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for neighbor, length in graph[node]:
+                nd = d + length
+                if nd < dist.get(neighbor, INF):
+                    dist[neighbor] = nd
+                    heapq.heappush(heap, (nd, neighbor))
+        return dist
+
+    def node_distance(self, source: int, target: int) -> float:
+        """
+        Shortest-path length between two nodes.
+
+        Args:
+            source: Source node number
+            target: Target node number
+
+        Returns:
+            Distance in km, or inf if target is unreachable
+        """
+        if source == target:
+            return 0.0
+        forward = self._upward_search(self.up_out, source)
+        backward = self._upward_search(self.up_in, target)
+        if len(backward) < len(forward):
+            forward, backward = backward, forward
+        return min(
+            (d + backward[node] for node, d in forward.items() if node in backward),
+            default=INF
+        )
+
+    def node_matrix(self, sources: Sequence[int], targets: Sequence[int]) -> np.ndarray:
+        """
+        Shortest-path lengths between every source and every target node.
+
+        Runs one backward search per target, leaving (target, distance)
+        entries in a bucket at every node it reaches, then one forward search
+        per source that scans the buckets it meets. Cost grows with
+        sources + targets rather than sources x targets.
+
+        Args:
+            sources: Source node numbers
+            targets: Target node numbers
+
+        Returns:
+            len(sources) x len(targets) matrix in km, inf where unreachable
+        """
+        buckets: Dict[int, List[Tuple[int, float]]] = {}
+        for column, target in enumerate(targets):
+            for node, d in self._upward_search(self.up_in, target).items():
+                buckets.setdefault(node, []).append((column, d))
+
+        result = np.full((len(sources), len(targets)), INF)
+        for row, source in enumerate(sources):
+            distances = result[row]
+            for node, d in self._upward_search(self.up_out, source).items():
+                for column, backward in buckets.get(node, ()):
+                    total = d + backward
+                    if total < distances[column]:
+                        distances[column] = total
+        return result
+
+    def nearest_node(self, lat: float, lng: float, max_distance_km: float) -> Optional[Tuple[int, float]]:
+        """
+        Closest graph node to a point.
+
+        Args:
+            lat: Latitude
+            lng: Longitude
+            max_distance_km: Ignore nodes further away than this
+
+        Returns:
+            Tuple of (node number, distance in km), or None if no node is close enough
+        """
+        band = max_distance_km / KM_PER_DEGREE
+        lo = int(np.searchsorted(self._sorted_lats, lat - band, side="left"))
+        hi = int(np.searchsorted(self._sorted_lats, lat + band, side="right"))
+        if lo >= hi:
+            return None
+        nodes = self._by_lat[lo:hi]
+        distances = haversine_many_km(lat, lng, self.lats[nodes], self.lngs[nodes])
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance_km:
+            return None
+        return int(nodes[best]), float(distances[best])
+
+    # ── Loading ─────────────────────────────────────────────
+
+    @classmethod
+    def from_json(cls, path: str) -> "RoadNetwork":
+        """
+        Build a network from a road-graph extract.
+
+        The file holds ``{"nodes": [[id, lat, lng], ...], "edges": [[from, to,
+        length_m, oneway], ...]}``. Edge length defaults to the straight-line
+        distance between the nodes and oneway defaults to false.
+
+        Args:
+            path: Path to the JSON extract
+
+        Returns:
+            Preprocessed network
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        numbers = {}
+        lats, lngs = [], []
+        for node_id, lat, lng in data["nodes"]:
+            numbers[node_id] = len(lats)
+            lats.append(float(lat))
+            lngs.append(float(lng))
+
+        edges = []
+        for edge in data["edges"]:
+            source, target = numbers[edge[0]], numbers[edge[1]]
+            if len(edge) > 2 and edge[2] is not None:
+                length = float(edge[2]) / 1000
+            else:
+                length = haversine_km(lats[source], lngs[source], lats[target], lngs[target])
+            edges.append((source, target, length))
+            if not (len(edge) > 3 and edge[3]):
+                edges.append((target, source, length))
+
+        return cls(lats, lngs, edges)
+
+    def save(self, cache_path: str, source_digest: str) -> None:
+        """
+        Save the hierarchy as plain arrays.
+
+        Upward edges are stored per direction as CSR offsets, targets and
+        lengths, in an npz file that loads without unpickling anything.
+
+        Args:
+            cache_path: Path to write, normally hierarchy_path(extract path)
+            source_digest: SHA-256 of the extract the hierarchy was built from
+        """
+        arrays = {}
+        for name, graph in (("out", self.up_out), ("in", self.up_in)):
+            arrays[f"{name}_offsets"] = np.cumsum([0] + [len(edges) for edges in graph], dtype=np.int64)
+            arrays[f"{name}_targets"] = np.array(
+                [node for edges in graph for node, _ in edges], dtype=np.int64
+            )
+            arrays[f"{name}_lengths"] = np.array(
+                [length for edges in graph for _, length in edges], dtype=np.float64
+            )
+        # Written through a file object so numpy does not append .npz to the name
+        with open(cache_path, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.array(CACHE_FORMAT_VERSION),
+                source_sha256=np.array(source_digest),
+                lats=self.lats,
+                lngs=self.lngs,
+                **arrays
+            )
+
+    @classmethod
+    def build(cls, path: str) -> "RoadNetwork":
+        """
+        Contract a road-graph extract and save the hierarchy next to it.
+
+        Args:
+            path: Path to the JSON extract
+
+        Returns:
+            Preprocessed network
+        """
+        network = cls.from_json(path)
+        network.save(hierarchy_path(path), extract_digest(path))
+        return network
+
+    @classmethod
+    def load(cls, path: str) -> "RoadNetwork":
+        """
+        Load the prebuilt hierarchy of a road-graph extract.
+
+        Args:
+            path: Path to the JSON extract
+
+        Returns:
+            Preprocessed network
+
+        Raises:
+            ValueError: If the hierarchy is missing, malformed, or was built
+                from a different extract or format version
+        """
+        cache_path = hierarchy_path(path)
+        rebuild = f"run python -m services.road_network {path}"
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            raise ValueError(f"No usable road hierarchy at {cache_path} ({e}); {rebuild}") from e
+
+        try:
+            version = int(arrays["format_version"])
+            digest = str(arrays["source_sha256"])
+            lats = arrays["lats"].astype(np.float64)
+            lngs = arrays["lngs"].astype(np.float64)
+            graphs = []
+            for name in ("out", "in"):
+                offsets = arrays[f"{name}_offsets"].astype(np.int64)
+                targets = arrays[f"{name}_targets"].astype(np.int64)
+                lengths = arrays[f"{name}_lengths"].astype(np.float64)
+                if (
+                    len(offsets) != len(lats) + 1 or offsets[0] != 0 or offsets[-1] != len(targets)
+                    or len(lengths) != len(targets) or np.any(np.diff(offsets) < 0)
+                    or (len(targets) and (targets.min() < 0 or targets.max() >= len(lats)))
+                ):
+                    raise ValueError("inconsistent edge arrays")
+                edges = list(zip(targets.tolist(), lengths.tolist()))
+                bounds = offsets.tolist()
+                graphs.append([tuple(edges[lo:hi]) for lo, hi in zip(bounds, bounds[1:])])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed road hierarchy at {cache_path} ({e}); {rebuild}") from e
+
+        if version != CACHE_FORMAT_VERSION or len(lngs) != len(lats):
+            raise ValueError(f"Road hierarchy at {cache_path} is an old format; {rebuild}")
+        if digest != extract_digest(path):
+            raise ValueError(f"Road hierarchy at {cache_path} was built from another extract; {rebuild}")
+        return cls._from_hierarchy(lats, lngs, graphs[0], graphs[1])
+
+
+def hierarchy_path(path: str) -> str:
+    """Where the prebuilt hierarchy of an extract is saved."""
+    return f"{path}.ch.npz"
+
+
+def extract_digest(path: str) -> str:
+    """SHA-256 of an extract, tying a saved hierarchy to the file it came from."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DistanceProvider(ABC):
+    """Interface for travel distances used by dispatch and pricing."""
+
+    name = "abstract"
+
+    @abstractmethod
+    def distance_km(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        """Travel distance between two points in km."""
+
+    @abstractmethod
+    def matrix_km(
+        self,
+        origins: Sequence[Tuple[float, float]],
+        destinations: Sequence[Tuple[float, float]]
+    ) -> np.ndarray:
+        """Travel distances from every origin to every destination in km."""
+
+
+class HaversineDistanceProvider(DistanceProvider):
+    """Straight-line distances, used when no road graph is loaded."""
+
+    name = "haversine"
+
+    def distance_km(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        return haversine_km(lat1, lng1, lat2, lng2)
+
+    def matrix_km(self, origins, destinations) -> np.ndarray:
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+        return haversine_matrix_km(origins[:, 0], origins[:, 1], destinations[:, 0], destinations[:, 1])
+
+
+class RoadDistanceProvider(DistanceProvider):
+    """
+    Road distances over a preprocessed network.
+
+    Points are snapped to their nearest graph node and the straight-line
+    snap distance is added at both ends. Pairs that cannot be snapped or
+    are not connected fall back to haversine.
+    """
+
+    name = "road_network"
+
+    def __init__(self, network: RoadNetwork, max_snap_km: float = 0.5):
+        self.network = network
+        self.max_snap_km = max_snap_km
+        self.fallback = HaversineDistanceProvider()
+
+    def _snap(self, lat: float, lng: float) -> Optional[Tuple[int, float]]:
+        return self.network.nearest_node(lat, lng, self.max_snap_km)
+
+    def distance_km(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        start, end = self._snap(lat1, lng1), self._snap(lat2, lng2)
+        if start is None or end is None or start[0] == end[0]:
+            return self.fallback.distance_km(lat1, lng1, lat2, lng2)
+        network_km = self.network.node_distance(start[0], end[0])
+        if network_km == INF:
+            return self.fallback.distance_km(lat1, lng1, lat2, lng2)
+        return start[1] + network_km + end[1]
+
+    def matrix_km(self, origins, destinations) -> np.ndarray:
+        result = self.fallback.matrix_km(origins, destinations)
+        origin_snaps = [self._snap(lat, lng) for lat, lng in origins]
+        destination_snaps = [self._snap(lat, lng) for lat, lng in destinations]
+
+        rows = [i for i, snap in enumerate(origin_snaps) if snap is not None]
+        columns = [j for j, snap in enumerate(destination_snaps) if snap is not None]
+        if not rows or not columns:
+            return result
+
+        source_nodes = np.array([origin_snaps[i][0] for i in rows])
+        target_nodes = np.array([destination_snaps[j][0] for j in columns])
+        network_km = self.network.node_matrix(source_nodes.tolist(), target_nodes.tolist())
+        network_km += np.array([origin_snaps[i][1] for i in rows])[:, None]
+        network_km += np.array([destination_snaps[j][1] for j in columns])[None, :]
+
+        # Keep the straight-line value for unreachable and same-node pairs
+        block = result[np.ix_(rows, columns)]
+        use_road = np.isfinite(network_km) & (source_nodes[:, None] != target_nodes[None, :])
+        result[np.ix_(rows, columns)] = np.where(use_road, network_km, block)
+        return result
+
+
+# Provider used by Dispatcher; replaced at startup when a road graph is configured
+_distance_provider: DistanceProvider = HaversineDistanceProvider()
+
+
+def get_distance_provider() -> DistanceProvider:
+    """Active distance provider."""
+    return _distance_provider
+
+
+def set_distance_provider(provider: DistanceProvider) -> None:
+    """Replace the active distance provider."""
+    global _distance_provider
+    _distance_provider = provider
+
+
+def load_road_network(path: str, max_snap_km: float = 0.5) -> RoadDistanceProvider:
+    """
+    Load a prebuilt road network and make it the active distance provider.
+
+    Args:
+        path: Path to the JSON extract
+        max_snap_km: Furthest a point may be from the graph and still use it
+
+    Returns:
+        The new provider
+    """
+    provider = RoadDistanceProvider(RoadNetwork.load(path), max_snap_km)
+    set_distance_provider(provider)
+    return provider
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the contraction hierarchy of a road-graph extract")
+    parser.add_argument("path", help="JSON road-graph extract")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    network = RoadNetwork.build(args.path)
+    print(
+        f"✅ Contracted {len(network)} nodes in {time.perf_counter() - started:.1f}s "
+        f"→ {hierarchy_path(args.path)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Supply and demand surge pricing per geo cell."""
+from typing import Dict, Optional, Tuple
+import math
+import threading
+import time
+
+from core.config import settings
+
+
+Cell = Tuple[int, int]
+
+
+class SurgePricing:
+    """
+    Surge multipliers from open orders and available packers near a point.
+
+    The order pool and packer index report every order and packer entering
+    or leaving them, so demand and supply are running counts rather than
+    queries. Each event adds to the 3x3 block of cells around its own cell,
+    which makes a cell's counts cover its neighbours too: a packer just over
+    a cell edge still counts, and reading a cell is one dictionary lookup.
+
+    A cell's target multiplier is 1 + sensitivity * (ratio - 1), where
+    ratio = (demand + prior) / (supply + prior), kept between 1 and the
+    cap; the prior keeps a single order in an empty area from surging. The
+    multiplier moves towards its target with a half-life, so it does not
+    jump with every order.
+    """
+
+    def __init__(
+        self,
+        cell_size_deg: float = 0.05,
+        prior: float = 2.0,
+        sensitivity: float = 0.5,
+        max_multiplier: float = 2.0,
+        half_life_seconds: float = 120.0,
+        clock=time.monotonic
+    ):
+        self.cell_size_deg = cell_size_deg
+        self.prior = prior
+        self.sensitivity = sensitivity
+        self.max_multiplier = max_multiplier
+        self.half_life_seconds = half_life_seconds
+        self._clock = clock
+        self._demand: Dict[Cell, int] = {}
+        self._supply: Dict[Cell, int] = {}
+        # Smoothed multiplier of each cell and when it was last brought up to date
+        self._smoothed: Dict[Cell, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def cell_for(self, lat: float, lng: float) -> Cell:
+        """Grid cell containing a point."""
+        return (
+            int(math.floor(lat / self.cell_size_deg)),
+            int(math.floor(lng / self.cell_size_deg)),
+        )
+
+    def _target(self, cell: Cell) -> float:
+        ratio = (self._demand.get(cell, 0) + self.prior) / (self._supply.get(cell, 0) + self.prior)
+        return min(max(1.0 + self.sensitivity * (ratio - 1.0), 1.0), self.max_multiplier)
+
+    def _advance(self, cell: Cell, now: float) -> float:
+        """Move a cell's multiplier towards its current target up to now."""
+        target = self._target(cell)
+        value, updated_at = self._smoothed.get(cell, (1.0, now))
+        if self.half_life_seconds > 0:
+            value = target + (value - target) * 0.5 ** ((now - updated_at) / self.half_life_seconds)
+        else:
+            value = target
+        if value == 1.0 and target == 1.0:
+            self._smoothed.pop(cell, None)
+        else:
+            self._smoothed[cell] = (value, now)
+        return value
+
+    def _count(self, counts: Dict[Cell, int], lat: float, lng: float, delta: int) -> None:
+        row, col = self.cell_for(lat, lng)
+        now = self._clock()
+        with self._lock:
+            for cell in [(row + i, col + j) for i in (-1, 0, 1) for j in (-1, 0, 1)]:
+                # Settle the multiplier under the old counts before they change
+                self._advance(cell, now)
+                value = counts.get(cell, 0) + delta
+                if value > 0:
+                    counts[cell] = value
+                else:
+                    counts.pop(cell, None)
+
+    def order_added(self, lat: float, lng: float) -> None:
+        """Count an order waiting for a packer at a pickup point."""
+        self._count(self._demand, lat, lng, 1)
+
+    def order_removed(self, lat: float, lng: float) -> None:
+        """Stop counting an order added with order_added."""
+        self._count(self._demand, lat, lng, -1)
+
+    def packer_added(self, lat: float, lng: float) -> None:
+        """Count an available packer at a position."""
+        self._count(self._supply, lat, lng, 1)
+
+    def packer_removed(self, lat: float, lng: float) -> None:
+        """Stop counting a packer added with packer_added."""
+        self._count(self._supply, lat, lng, -1)
+
+    def reset_orders(self) -> None:
+        """Forget every counted order, before the order pool is rebuilt."""
+        with self._lock:
+            self._demand = {}
+
+    def reset_packers(self) -> None:
+        """Forget every counted packer, before the packer index is rebuilt."""
+        with self._lock:
+            self._supply = {}
+
+    def counts(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Open orders and available packers counted around a point."""
+        cell = self.cell_for(lat, lng)
+        return self._demand.get(cell, 0), self._supply.get(cell, 0)
+
+    def multiplier(self, lat: Optional[float], lng: Optional[float]) -> float:
+        """
+        Surge multiplier at a pickup point.
+
+        Args:
+            lat: Pickup latitude, or None when unknown
+            lng: Pickup longitude, or None when unknown
+
+        Returns:
+            Multiplier between 1 and the cap, to two decimal places
+        """
+        if not settings.SURGE_PRICING_ENABLED or lat is None or lng is None:
+            return 1.0
+        cell = self.cell_for(lat, lng)
+        with self._lock:
+            if cell not in self._smoothed and cell not in self._demand:
+                return 1.0
+            return round(self._advance(cell, self._clock()), 2)
+
+    def clear(self) -> None:
+        """Forget all counts and multipliers."""
+        with self._lock:
+            self._demand = {}
+            self._supply = {}
+            self._smoothed = {}
+
+
+# Process-wide counts fed by the order pool and packer index
+surge_pricing = SurgePricing(
+    cell_size_deg=settings.SURGE_CELL_SIZE_DEG,
+    prior=settings.SURGE_PRIOR,
+    sensitivity=settings.SURGE_SENSITIVITY,
+    max_multiplier=settings.SURGE_MAX_MULTIPLIER,
+    half_life_seconds=settings.SURGE_HALF_LIFE_SECONDS
+)
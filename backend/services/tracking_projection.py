@@ -0,0 +1,135 @@
+"""Denormalized per-order tracking read model."""
+from typing import Optional
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from models.packer import Packer
+from models.tracking import OrderTracking, TrackingEvent
+from core.config import settings
+from services.packer_locations import packer_locations
+from services.tracking_stream import packer_summary
+
+
+def _event_dict(event: TrackingEvent) -> dict:
+    return {
+        "id": event.id,
+        "order_id": event.order_id,
+        "status": event.status,
+        "message": event.message,
+        "packer_lat": float(event.packer_lat) if event.packer_lat is not None else None,
+        "packer_lng": float(event.packer_lng) if event.packer_lng is not None else None,
+        "created_at": event.created_at.isoformat(),
+    }
+
+
+class TrackingProjection:
+    """Keeps OrderTracking rows in step with orders and their tracking events."""
+
+    @staticmethod
+    def apply(
+        db: Session,
+        order: Order,
+        event: Optional[TrackingEvent] = None,
+        packer: Optional[Packer] = None
+    ) -> OrderTracking:
+        """
+        Update an order's projection; call before the commit that writes the change.
+
+        Args:
+            db: Database session
+            order: Order with its new state
+            event: Tracking event added with the change, if any
+            packer: The order's packer if already loaded (e.g. on assignment)
+
+        Returns:
+            The order's projection row
+        """
+        if event is not None:
+            # Set here rather than by the server so the row needs no reload
+            if event.created_at is None:
+                event.created_at = datetime.now(timezone.utc)
+            db.flush()
+
+        limit = settings.TRACKING_PROJECTION_EVENTS
+        # Locked until the commit, so concurrent changes to the order append
+        # their events one after the other instead of overwriting each other
+        row = db.get(OrderTracking, order.id, with_for_update=True, populate_existing=True)
+        if row is None:
+            # First write for this order: seed from the events table once
+            latest = db.query(TrackingEvent).filter(
+                TrackingEvent.order_id == order.id
+            ).order_by(TrackingEvent.id.desc()).limit(limit + 1).all()
+            row = OrderTracking(
+                order_id=order.id,
+                recent_events=[_event_dict(e) for e in reversed(latest[:limit])],
+                evicted_event_id=latest[limit].id if len(latest) > limit else None,
+                last_event_id=latest[0].id if latest else None,
+            )
+            db.add(row)
+        elif event is not None:
+            events = list(row.recent_events) + [_event_dict(event)]
+            if len(events) > limit:
+                row.evicted_event_id = events[-limit - 1]["id"]
+                events = events[-limit:]
+            row.recent_events = events
+            row.last_event_id = event.id
+
+        row.user_id = order.user_id
+        row.current_status = order.status
+        row.delivery_otp = order.delivery_otp
+
+        packer_id = packer.id if packer is not None else order.packer_id
+        if packer_id != row.packer_id or packer is not None:
+            if packer is None and packer_id is not None:
+                packer = db.get(Packer, packer_id)
+            for field, value in packer_summary(packer).items():
+                setattr(row, field, value)
+            row.packer_id = packer_id
+        elif event is not None and event.packer_lat is not None:
+            row.packer_lat = float(event.packer_lat)
+            row.packer_lng = float(event.packer_lng)
+        return row
+
+    @staticmethod
+    def timeline(db: Session, row: OrderTracking, after_id: Optional[int] = None) -> dict:
+        """
+        Tracking timeline from an order's projection.
+
+        Events older than the embedded ones are only read from the events
+        table when the cursor reaches back past them.
+
+        Args:
+            db: Database session
+            row: The order's projection
+            after_id: next_cursor of a previous response, or None for every event
+
+        Returns:
+            Dictionary matching TrackingTimelineResponse
+        """
+        if row.evicted_event_id is not None and (after_id is None or after_id < row.evicted_event_id):
+            query = db.query(TrackingEvent).filter(TrackingEvent.order_id == row.order_id)
+            if after_id is not None:
+                query = query.filter(TrackingEvent.id > after_id)
+            events = [_event_dict(e) for e in query.order_by(TrackingEvent.id.asc()).all()]
+        else:
+            events = [e for e in row.recent_events if after_id is None or e["id"] > after_id]
+
+        lat, lng = row.packer_lat, row.packer_lng
+        fix = packer_locations.newer_than(row.packer_id, row.updated_at) if row.packer_id else None
+        if fix is not None:
+            lat, lng = fix.lat, fix.lng
+
+        return {
+            "order_id": row.order_id,
+            "current_status": row.current_status,
+            "packer_name": row.packer_name,
+            "packer_phone": row.packer_phone,
+            "packer_rating": row.packer_rating,
+            "packer_lat": lat,
+            "packer_lng": lng,
+            "delivery_otp": row.delivery_otp,
+            "events": events,
+            "next_cursor": events[-1]["id"] if events else after_id,
+        }
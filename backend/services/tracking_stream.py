@@ -0,0 +1,157 @@
+"""Order tracking timeline and its live updates."""
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from models.packer import Packer
+from models.tracking import TrackingEvent
+from core.constants import OrderStatus, ACTIVE_ORDER_STATUSES
+from schemas.tracking import TrackingEventResponse
+from services.event_broker import broker
+from services.packer_locations import packer_locations
+
+
+# Stream event types
+ORDER_UPDATE = "order_update"
+PACKER_LOCATION = "packer_location"
+
+# Statuses after which an order's stream has nothing more to send
+FINAL_STATUSES = {OrderStatus.COMPLETED, OrderStatus.CANCELLED}
+
+# Statuses in which the customer sees the packer's position
+ACTIVE_STATUSES = ACTIVE_ORDER_STATUSES
+
+
+def order_topic(order_id: int) -> str:
+    """Broker topic for updates to one order."""
+    return f"order:{order_id}"
+
+
+def packer_topic(packer_id: int) -> str:
+    """Broker topic for position updates of one packer, followed by their orders' streams."""
+    return f"packer:{packer_id}"
+
+
+def packer_summary(packer: Optional[Packer]) -> Dict[str, Optional[object]]:
+    """Packer fields shown on the customer's tracking page."""
+    if packer is None:
+        return {
+            "packer_name": None,
+            "packer_phone": None,
+            "packer_rating": None,
+            "packer_lat": None,
+            "packer_lng": None,
+        }
+    lat, lng = packer_locations.position(packer)
+    return {
+        "packer_name": packer.name,
+        "packer_phone": packer.phone,
+        "packer_rating": float(packer.rating) if packer.rating is not None else None,
+        "packer_lat": lat,
+        "packer_lng": lng,
+    }
+
+
+def build_timeline(db: Session, order: Order, after_id: Optional[int] = None) -> dict:
+    """
+    Tracking timeline for an order.
+
+    Events are returned in ID order. With a cursor only newer events are
+    read, using the (order_id, id) index.
+
+    Args:
+        db: Database session
+        order: Order model instance
+        after_id: next_cursor of a previous response, or None for every event
+
+    Returns:
+        Dictionary matching TrackingTimelineResponse
+    """
+    query = db.query(TrackingEvent).filter(TrackingEvent.order_id == order.id)
+    if after_id is not None:
+        query = query.filter(TrackingEvent.id > after_id)
+    events = query.order_by(TrackingEvent.id.asc()).all()
+
+    packer = None
+    if order.packer_id:
+        packer = db.query(Packer).filter(Packer.id == order.packer_id).first()
+
+    return {
+        "order_id": order.id,
+        "current_status": order.status,
+        **packer_summary(packer),
+        "delivery_otp": order.delivery_otp,
+        "events": events,
+        "next_cursor": events[-1].id if events else after_id,
+    }
+
+
+def timeline_version(db: Session, order_id: int):
+    """
+    Columns that change whenever an order's timeline does, in one query.
+
+    Args:
+        db: Database session
+        order_id: Order ID
+
+    Returns:
+        Row of (user_id, status, updated_at, packer_id, packer_updated_at,
+        last_event_id), or None if the order does not exist
+    """
+    last_event_id = db.query(func.max(TrackingEvent.id)).filter(
+        TrackingEvent.order_id == Order.id
+    ).correlate(Order).scalar_subquery()
+    return db.query(
+        Order.user_id,
+        Order.status,
+        Order.updated_at,
+        Order.packer_id,
+        Packer.updated_at.label("packer_updated_at"),
+        last_event_id.label("last_event_id"),
+    ).outerjoin(Packer, Packer.id == Order.packer_id).filter(Order.id == order_id).first()
+
+
+def publish_order_update(
+    order: Order,
+    event: Optional[TrackingEvent] = None,
+    packer: Optional[Packer] = None
+) -> None:
+    """
+    Push an order's new status to its tracking streams. Call after commit.
+
+    Args:
+        order: Updated order
+        event: Tracking event recorded with the change, if any
+        packer: Newly assigned packer, whose details the stream should show
+    """
+    topic = order_topic(order.id)
+    # Skip serializing (and reloading expired attributes) when nobody is watching
+    if not broker.has_subscribers(topic):
+        return
+    update = {"type": ORDER_UPDATE, "current_status": order.status}
+    if event is not None:
+        update["event"] = TrackingEventResponse.model_validate(event).model_dump(mode="json")
+    if packer is not None:
+        # The ID lets the stream follow the new packer's position
+        update.update(packer_summary(packer), packer_id=packer.id)
+    broker.publish(topic, update)
+
+
+def publish_packer_location(packer: Packer) -> None:
+    """
+    Push a packer's new position to the tracking streams following them.
+
+    Streams of the packer's orders subscribe to packer_topic() and only pass
+    positions on while their order is active, so nothing is read from the
+    database here and nothing is done when no stream is open.
+
+    Args:
+        packer: Packer whose location changed
+    """
+    topic = packer_topic(packer.id)
+    if not broker.has_subscribers(topic):
+        return
+    lat, lng = packer_locations.position(packer)
+    broker.publish(topic, {"type": PACKER_LOCATION, "packer_lat": lat, "packer_lng": lng})
@@ -8,3 +8,87 @@ os.environ["DATABASE_URL"] = "sqlite:///./test_packnow.db"
 os.environ["SECRET_KEY"] = "test-secret-key-for-security-testing-only"
 os.environ["DEBUG"] = "true"
 os.environ["DB_HOST"] = "localhost"
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.constants import OrderStatus
+from models.database import Base
+from models.user import User
+from models.packer import Packer
+from models.order import Order
+# Imported so create_all makes every table
+from models import admin, dispatch_job, material, pricing, tracking, trail
+
+
+@pytest.fixture
+def session_factory():
+    """Sessions on a fresh in-memory database, shared by every thread."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    """A session on a fresh in-memory database."""
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def override_get_db(factory):
+    """A get_db replacement for app.dependency_overrides that opens sessions from factory."""
+    def get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    return get_db
+
+
+def add_user(db, user_id: int = 1, **fields) -> User:
+    """Add a customer with placeholder details."""
+    user = User(id=user_id, **{"name": "U", "phone": f"+91{99 + user_id:010d}", "password_hash": "x", **fields})
+    db.add(user)
+    return user
+
+
+def add_packer(db, packer_id: int = 1, **fields) -> Packer:
+    """Add an available packer at (19.0, 72.8) with no inventory unless overridden."""
+    packer = Packer(id=packer_id, **{
+        "name": f"P{packer_id}",
+        "phone": f"+91{packer_id:010d}",
+        "password_hash": "x",
+        "lat": 19.0,
+        "lng": 72.8,
+        "available": True,
+        "rating": 5.0,
+        "inventory": {},
+        **fields,
+    })
+    db.add(packer)
+    return packer
+
+
+def add_order(db, order_id: int = 1, pickup=(19.0, 72.81), **fields) -> Order:
+    """Add a CREATED gift order of user 1 picked up at pickup unless overridden."""
+    lat, lng = pickup
+    order = Order(id=order_id, **{
+        "user_id": 1,
+        "status": OrderStatus.CREATED,
+        "category": "gift",
+        "item_dimensions": {"length": 10, "width": 10, "height": 10, "weight": 1},
+        "materials_required": {"packing_tape": 1.0},
+        "price": 100.0,
+        "pickup_location": {"lat": lat, "lng": lng, "address": "x"},
+        "pickup_lat": lat,
+        "pickup_lng": lng,
+        **fields,
+    })
+    db.add(order)
+    return order
@@ -0,0 +1,94 @@
+"""Tests for concurrent order acceptance."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base
+from models.packer import Packer
+from models.order import Order
+from models.tracking import TrackingEvent
+from core.constants import OrderStatus
+from api.routes.packers import accept_order
+from services.geo_index import packer_index
+from services.order_pool import order_pool
+from tests.conftest import add_order, add_packer, add_user
+
+
+MATERIALS = {"cardboard_box_medium": 1.0, "packing_tape": 1.0}
+PACKER_COUNT = 16
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/accept.db", connect_args={"timeout": 30, "check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    db = factory()
+    add_user(db)
+    for packer_id in range(1, PACKER_COUNT + 1):
+        add_packer(db, packer_id, inventory={"cardboard_box_medium": 50, "packing_tape": 50})
+    add_order(db, materials_required=MATERIALS, dropoff_location={"lat": 19.05, "lng": 72.85, "address": "y"})
+    db.commit()
+    db.close()
+
+    packer_index.clear()
+    order_pool.clear()
+    yield factory
+    packer_index.clear()
+    order_pool.clear()
+    engine.dispose()
+
+
+def _accept(factory, order_id, packer_id):
+    db = factory()
+    try:
+        packer = db.get(Packer, packer_id)
+        accept_order(order_id=order_id, current_packer=packer, db=db)
+        return 200
+    except HTTPException as e:
+        return e.status_code
+    finally:
+        db.close()
+
+
+def test_concurrent_accepts_have_one_winner(session_factory):
+    """Exactly one of many simultaneous accepts wins; the rest get 409."""
+    with ThreadPoolExecutor(max_workers=PACKER_COUNT) as pool:
+        results = list(pool.map(
+            lambda packer_id: _accept(session_factory, 1, packer_id), range(1, PACKER_COUNT + 1)
+        ))
+
+    assert sorted(results) == [200] + [409] * (PACKER_COUNT - 1)
+
+    db = session_factory()
+    order = db.get(Order, 1)
+    assert order.status == OrderStatus.PACKER_ASSIGNED
+    assert results[order.packer_id - 1] == 200
+    assert db.query(TrackingEvent).count() == 1
+    # Only the winner's inventory was touched
+    spent = [p.id for p in db.query(Packer).all() if p.inventory["packing_tape"] != 50]
+    assert spent == [order.packer_id]
+
+
+def test_missing_order_is_404(session_factory):
+    assert _accept(session_factory, 999, 1) == 404
+
+
+def test_insufficient_inventory_releases_claim(session_factory):
+    """A packer without stock gets 400 and the order stays available."""
+    db = session_factory()
+    db.get(Packer, 1).inventory = {"packing_tape": 50}
+    db.commit()
+    db.close()
+
+    assert _accept(session_factory, 1, 1) == 400
+    assert _accept(session_factory, 1, 2) == 200
+
+    db = session_factory()
+    assert db.get(Order, 1).packer_id == 2
@@ -0,0 +1,127 @@
+"""Tests for batch dispatch."""
+import time
+
+import numpy as np
+
+from models.packer import Packer
+from models.order import Order
+from models.tracking import TrackingEvent
+from core.config import settings
+from core.constants import OrderStatus
+from services.batch_dispatcher import BatchDispatcher
+from services.geo_index import packer_index
+from services.order_pool import order_pool
+from services.road_network import HaversineDistanceProvider, RoadDistanceProvider, set_distance_provider
+from tests.conftest import add_order, add_packer, add_user
+
+
+INVENTORY = {"cardboard_box_medium": 50, "packing_tape": 50}
+MATERIALS = {"cardboard_box_medium": 1.0, "packing_tape": 1.0}
+
+
+def test_solve_avoids_greedy_trap():
+    """An order with one option keeps it even if another order wants it more."""
+    deadline = time.monotonic() + 1.0
+    candidates = [
+        # Order 0 prefers packer 0 but can use packer 1
+        [(0, 1.0, 1.0), (1, 2.0, 2.0)],
+        # Order 1 can only use packer 0
+        [(0, 3.0, 3.0)],
+    ]
+
+    assignment = BatchDispatcher.solve(candidates, deadline)
+
+    assert assignment == {0: 1, 1: 0}
+
+
+def test_solve_minimizes_total_cost():
+    """Matching picks the cheapest overall pairing, not the cheapest first pick."""
+    deadline = time.monotonic() + 1.0
+    candidates = [
+        [(0, 1.0, 1.0), (1, 1.5, 1.5)],
+        [(0, 1.2, 1.2), (1, 5.0, 5.0)],
+    ]
+
+    assignment = BatchDispatcher.solve(candidates, deadline)
+
+    # 1.5 + 1.2 beats 1.0 + 5.0
+    assert assignment == {0: 1, 1: 0}
+
+
+def test_solve_with_more_orders_than_packers():
+    """Orders that cannot all be served still get a valid one-to-one matching."""
+    deadline = time.monotonic() + 1.0
+    candidates = [[(0, float(i), float(i))] for i in range(5)]
+
+    assignment = BatchDispatcher.solve(candidates, deadline)
+
+    assert list(assignment.values()) == [0]
+
+
+def test_run_assigns_orders_in_database(db):
+    """Batch run assigns orders, deducts inventory and records tracking events."""
+    add_user(db)
+    add_packer(db, 1, name="Shared", inventory=dict(INVENTORY))
+    add_packer(db, 2, name="Spare", lng=72.75, inventory=dict(INVENTORY))
+    for order_id, pickup in enumerate([(19.0, 72.79), (19.0, 72.85)], start=1):
+        add_order(db, order_id, pickup=pickup, materials_required=MATERIALS)
+    db.commit()
+
+    packer_index.clear()
+    order_pool.clear()
+    try:
+        summary = BatchDispatcher.run(db)
+
+        assert summary["orders_considered"] == 2
+        assert summary["assigned"] == 2
+
+        orders = {order.id: order for order in db.query(Order).all()}
+        # Order 2 is only within range of packer 1, so order 1 gets packer 2
+        assert orders[1].packer_id == 2
+        assert orders[2].packer_id == 1
+        assert all(order.status == OrderStatus.PACKER_ASSIGNED for order in orders.values())
+        assert db.query(TrackingEvent).count() == 2
+        assert db.get(Packer, 1).inventory["packing_tape"] == 49
+    finally:
+        packer_index.clear()
+        order_pool.clear()
+
+
+class _RoadDetours(RoadDistanceProvider):
+    """Road distances of four times haversine, except from packers on a straight road."""
+
+    def __init__(self, direct_lngs):
+        super().__init__(network=None)
+        self.direct_lngs = direct_lngs
+
+    def matrix_km(self, origins, destinations):
+        straight = self.fallback.matrix_km(origins, destinations)
+        detour = np.array([1.0 if lng in self.direct_lngs else 4.0 for _, lng in origins])
+        return straight * detour[:, None]
+
+
+def test_road_costs_reselect_the_cheapest_candidates(monkeypatch):
+    """Packers beyond the haversine top K are re-costed, and the road-cheapest kept."""
+    monkeypatch.setattr(settings, "BATCH_DISPATCH_MAX_CANDIDATES", 1)
+    monkeypatch.setattr(settings, "BATCH_DISPATCH_ROUTE_CANDIDATE_FACTOR", 3)
+    packers = [
+        Packer(id=packer_id, lat=19.0, lng=lng, inventory=dict(INVENTORY), available=True, rating=5.0)
+        for packer_id, lng in enumerate([72.801, 72.802, 72.803], start=1)
+    ]
+    order = Order(
+        id=1, status=OrderStatus.CREATED, materials_required=MATERIALS,
+        pickup_location={"lat": 19.0, "lng": 72.8, "address": "x"},
+    )
+
+    set_distance_provider(_RoadDetours({72.803}))
+    try:
+        candidates = BatchDispatcher.build_candidates([order], packers, time.monotonic() + 1.0)
+        assert [packer_idx for packer_idx, _, _ in candidates[0]] == [2]
+
+        # Past the deadline the haversine costs stand
+        candidates = [[(0, 0.11, 0.11), (1, 0.21, 0.21), (2, 0.32, 0.32)]]
+        positions = np.array([(packer.lat, packer.lng) for packer in packers])
+        BatchDispatcher._apply_route_distances(candidates, [order], positions, time.monotonic() - 1.0)
+    finally:
+        set_distance_provider(HaversineDistanceProvider())
+    assert candidates == [[(0, 0.11, 0.11)]]
@@ -0,0 +1,78 @@
+"""Tests for the batch estimate endpoint."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.deps import get_current_user
+from core.config import settings
+from models.user import User
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)", "Content-Type": "application/x-ndjson"}
+
+ITEM = {
+    "category": "electronics",
+    "item_dimensions": {"length": 30, "width": 25, "height": 5, "weight": 1},
+    "fragility_level": "high",
+    "urgency": "urgent",
+    "distance_km": 4.2,
+}
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, name="U", phone="+910000000100")
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_batch_streams_one_line_per_item(client):
+    body = "\n".join([
+        json.dumps(ITEM),
+        json.dumps({**ITEM, "category": "unknown"}),
+        "",
+        json.dumps({**ITEM, "category": "gift", "urgency": "normal"}),
+    ])
+    response = client.post("/api/v1/orders/estimate/batch", content=body, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert "error" in lines[1]
+
+    single = client.post("/api/v1/orders/estimate/price", json=ITEM, headers={"User-Agent": HEADERS["User-Agent"]}).json()
+    # Batch lines carry no quote tokens
+    single.pop("quote_token")
+    single.pop("quote_expires_at")
+    assert {key: lines[0][key] for key in single} == single
+    assert lines[2]["materials"]["gift_wrapping_paper"] == 2.0
+
+
+def test_batch_item_limit(client, monkeypatch):
+    monkeypatch.setattr(settings, "ESTIMATE_BATCH_MAX_ITEMS", 2)
+    body = "\n".join(json.dumps(ITEM) for _ in range(3))
+    response = client.post("/api/v1/orders/estimate/batch", content=body, headers=HEADERS)
+    assert response.status_code == 413
+
+
+def test_batch_limits_count_items_of_multi_item_lines(client, monkeypatch):
+    multi = {**ITEM, "item_dimensions": None, "items": [{"length": 10, "width": 10, "height": 10, "weight": 1, "quantity": 3}]}
+    monkeypatch.setattr(settings, "ESTIMATE_BATCH_MAX_ITEMS", 4)
+    response = client.post("/api/v1/orders/estimate/batch", content=json.dumps(multi), headers=HEADERS)
+    assert response.status_code == 200
+
+    body = "\n".join([json.dumps(multi), json.dumps(ITEM), json.dumps(ITEM)])
+    response = client.post("/api/v1/orders/estimate/batch", content=body, headers=HEADERS)
+    assert response.status_code == 413
+
+    monkeypatch.setattr(settings, "ESTIMATE_BATCH_MAX_ITEMS", 100)
+    monkeypatch.setattr(settings, "ESTIMATE_BATCH_MAX_PACKED_ITEMS", 5)
+    body = "\n".join([json.dumps(multi), json.dumps(multi)])
+    response = client.post("/api/v1/orders/estimate/batch", content=body, headers=HEADERS)
+    assert response.status_code == 413
+    assert "multi-item" in response.json()["detail"]
@@ -0,0 +1,94 @@
+"""Tests for 3D bin packing and multi-item estimates."""
+import random
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from core.config import settings
+from services import bin_packing
+from services.bin_packing import box_dimensions, count_boxes, pack_items
+from services.material_estimator import MaterialEstimator
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"}
+
+
+def _overlap(a, b):
+    return all(a[axis] < b[axis] + b[axis + 3] and b[axis] < a[axis] + a[axis + 3] for axis in range(3))
+
+
+def _assert_valid(items, packed):
+    sizes = box_dimensions()
+    assert sorted(i for box in packed for i in box.items) == list(range(len(items)))
+    for box in packed:
+        for i, position in zip(box.items, box.positions):
+            assert sorted(position[3:]) == sorted(items[i])
+            assert all(position[axis] + position[axis + 3] <= sizes[box.size][axis] + 1e-6 for axis in range(3))
+        for first in range(len(box.positions)):
+            for second in range(first + 1, len(box.positions)):
+                assert not _overlap(box.positions[first], box.positions[second])
+
+
+def test_packing_is_valid():
+    rng = random.Random(3)
+    items = [(rng.uniform(2, 30), rng.uniform(2, 30), rng.uniform(2, 45)) for _ in range(200)]
+    _assert_valid(items, pack_items(items))
+
+
+def test_packing_stays_valid_with_few_free_spaces_kept(monkeypatch):
+    monkeypatch.setattr(bin_packing, "_MAX_FREE_SPACES", 3)
+    rng = random.Random(5)
+    items = [(rng.uniform(1, 50), rng.uniform(1, 50), rng.uniform(1, 50)) for _ in range(300)]
+    _assert_valid(items, pack_items(items))
+
+
+def test_small_items_share_the_smallest_box_that_holds_them():
+    assert count_boxes(pack_items([(10, 10, 10)] * 40)) == {"large": 1}
+    # Rotated to lie flat: two 45 cm items fit one 50 cm box side by side
+    assert count_boxes(pack_items([(45, 24, 10), (10, 45, 24)])) == {"extra_large": 1}
+
+
+def test_oversize_items_get_a_box_of_their_own():
+    packed = pack_items([(80, 10, 10), (5, 5, 5)])
+    assert [(box.size, box.items) for box in packed] == [("extra_large", [0]), ("small", [1])]
+
+
+def test_multi_item_estimate_shares_boxes():
+    items = [{"length": 30, "width": 20, "height": 10, "weight": 2, "quantity": 40}]
+    materials, boxes = MaterialEstimator.estimate_multi_item_materials("house_shifting", items, "low")
+    single, _ = MaterialEstimator.estimate_materials("house_shifting", items[0], "low")
+
+    # 40 single-item estimates would need 40 boxes
+    assert sum(boxes.values()) == 3
+    assert materials["packing_tape"] == single["packing_tape"] * 3
+    assert materials["bubble_wrap"] == round(single["bubble_wrap"] * 40, 1)
+    assert sum(materials[f"cardboard_box_{size}"] for size in boxes) == 3
+
+    # Gifts are still wrapped one by one
+    gifts, gift_boxes = MaterialEstimator.estimate_multi_item_materials("gift", items[:1] * 2, "low")
+    assert gifts["ribbon"] == 1.5 * 80
+    assert gift_boxes == {"medium": 80}
+
+
+def test_multi_item_price_estimate():
+    client = TestClient(app)
+    request = {
+        "category": "business_orders",
+        "items": [
+            {"length": 20, "width": 15, "height": 10, "weight": 1, "quantity": 12},
+            {"length": 40, "width": 30, "height": 30, "weight": 5},
+        ],
+        "distance_km": 3,
+    }
+    estimate = client.post("/api/v1/orders/estimate/materials", json=request, headers=HEADERS)
+    price = client.post("/api/v1/orders/estimate/price", json=request, headers=HEADERS)
+    missing = client.post("/api/v1/orders/estimate/price", json={"category": "gift"}, headers=HEADERS)
+    too_many = client.post("/api/v1/orders/estimate/price", json={
+        **request, "items": [{**request["items"][0], "quantity": settings.ORDER_MAX_ITEMS + 1}]
+    }, headers=HEADERS)
+
+    assert estimate.status_code == 200
+    assert estimate.json()["boxes"] == {"extra_large": 1}
+    assert price.json()["material_cost"] == estimate.json()["material_cost"]
+    assert missing.status_code == 422
+    assert too_many.status_code == 422
@@ -0,0 +1,17 @@
+"""Smoke test for the dispatch benchmark harness."""
+from benchmarks.dispatch import run
+from benchmarks.synthetic_city import CityConfig
+
+
+def test_dispatch_benchmark_reports_percentiles(tmp_path):
+    """A tiny city produces latency and query stats for every operation."""
+    config = CityConfig(radius_km=2.0, packers_per_km2=3.0, orders_per_minute=2.0, duration_minutes=10.0)
+
+    report = run(config, samples=5, database_url=f"sqlite:///{tmp_path}/city.db")
+
+    assert report["city"]["packer_count"] == config.packer_count
+    for name in ("find_nearest_packer", "get_live_orders"):
+        stats = report["results"][name]
+        assert stats["calls"] == 5
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+        assert stats["queries_per_call"] >= 1
@@ -0,0 +1,100 @@
+"""Tests for the persistent dispatch queue."""
+from datetime import datetime, timedelta, timezone
+
+from models.order import Order
+from models.tracking import TrackingEvent
+from models.dispatch_job import DispatchJob
+from core.config import settings
+from core.constants import OrderStatus, DispatchJobStatus
+from services.dispatch_queue import DispatchQueue
+from services.dispatch_worker import DispatchWorker
+from services.geo_index import packer_index
+from tests.conftest import add_order, add_packer, add_user
+
+
+MATERIALS = {"cardboard_box_medium": 1.0, "packing_tape": 1.0}
+
+
+def _seed(factory, with_packer=True):
+    """Queue order 1, with a packer able to take it unless with_packer is False."""
+    db = factory()
+    add_user(db)
+    if with_packer:
+        add_packer(db, inventory={"cardboard_box_medium": 5, "packing_tape": 5})
+    add_order(db, materials_required=MATERIALS)
+    DispatchQueue.enqueue(db, 1)
+    db.commit()
+    db.close()
+    packer_index.clear()
+    return factory
+
+
+def test_worker_assigns_queued_order(session_factory):
+    """A worker claims the job, assigns the order and completes the job."""
+    factory = _seed(session_factory)
+    try:
+        assert DispatchWorker("test-worker", factory).run_once() == 1
+
+        db = factory()
+        job = db.query(DispatchJob).one()
+        assert job.status == DispatchJobStatus.DONE
+        assert job.attempts == 1
+        assert db.get(Order, 1).status == OrderStatus.PACKER_ASSIGNED
+        assert db.get(Order, 1).packer_id == 1
+        # Nothing left to claim
+        assert DispatchWorker("test-worker", factory).run_once() == 0
+    finally:
+        packer_index.clear()
+
+
+def test_retry_with_backoff_then_fail(session_factory):
+    """Without a packer the job backs off and eventually fails."""
+    factory = _seed(session_factory, with_packer=False)
+    db = factory()
+
+    [job] = DispatchQueue.claim(db, "w", 10)
+    assert DispatchQueue.process(db, job) is False
+
+    job = db.query(DispatchJob).one()
+    assert job.status == DispatchJobStatus.PENDING
+    assert job.last_error == "No packer available"
+    # Not due again yet
+    assert DispatchQueue.claim(db, "w", 10) == []
+
+    job.attempts = settings.DISPATCH_JOB_MAX_ATTEMPTS - 1
+    job.run_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    [job] = DispatchQueue.claim(db, "w", 10)
+    DispatchQueue.process(db, job)
+
+    assert db.query(DispatchJob).one().status == DispatchJobStatus.FAILED
+    assert db.get(Order, 1).status == OrderStatus.CREATED
+
+
+def test_backoff_grows_and_is_capped():
+    """Backoff doubles per attempt up to the cap, with bounded jitter."""
+    base = settings.DISPATCH_JOB_BACKOFF_SECONDS
+
+    assert 0.8 * base <= DispatchQueue.backoff_seconds(1) <= 1.2 * base
+    assert 0.8 * 4 * base <= DispatchQueue.backoff_seconds(3) <= 1.2 * 4 * base
+    assert DispatchQueue.backoff_seconds(50) <= 1.2 * settings.DISPATCH_JOB_MAX_BACKOFF_SECONDS
+
+
+def test_cancelled_order_completes_job_and_stale_jobs_are_reclaimed(session_factory):
+    """Jobs left running by a dead worker are reclaimed; finished orders end the job."""
+    factory = _seed(session_factory)
+    db = factory()
+
+    [job] = DispatchQueue.claim(db, "dead-worker", 10)
+    assert DispatchQueue.claim(db, "w", 10) == []
+
+    job.locked_at = datetime.now(timezone.utc) - timedelta(seconds=settings.DISPATCH_JOB_LOCK_TIMEOUT_SECONDS + 1)
+    db.get(Order, 1).status = OrderStatus.CANCELLED
+    db.commit()
+
+    [job] = DispatchQueue.claim(db, "w", 10)
+    assert job.locked_by == "w"
+    assert job.attempts == 2
+    assert DispatchQueue.process(db, job) is True
+    assert db.query(DispatchJob).one().status == DispatchJobStatus.DONE
+    assert db.query(TrackingEvent).count() == 0
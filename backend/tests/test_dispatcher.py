@@ -107,3 +107,68 @@ def test_return_inventory():
     
     assert updated_inventory["bubble_wrap"] == 100
     assert updated_inventory["cardboard_box_medium"] == 50
+
+
+def test_haversine_many_matches_scalar():
+    """Vectorized distances agree with the scalar implementation."""
+    lats = [40.7128, 34.0522, 19.0760, 40.7128]
+    lngs = [-74.0060, -118.2437, 72.8777, -74.0060]
+    
+    distances = Dispatcher.haversine_many((40.7128, -74.0060), lats, lngs)
+    
+    for lat, lng, distance in zip(lats, lngs, distances):
+        assert round(float(distance), 2) == Dispatcher.haversine_distance(40.7128, -74.0060, lat, lng)
+
+
+def test_haversine_many_prefilter():
+    """Points outside the radius are rejected without losing points inside it."""
+    origin = (19.0760, 72.8777)
+    lats = [19.0760, 19.1500, 19.0850, 20.0000]
+    lngs = [72.8777, 72.8777, 72.8777, 72.8777]
+    
+    distances = Dispatcher.haversine_many(origin, lats, lngs, radius_km=10.0)
+    
+    assert distances[0] == 0.0
+    assert 8 < distances[1] < 10
+    assert distances[2] < 1.5
+    assert distances[3] == float("inf")
+
+
+def test_haversine_matrix():
+    """Matrix version returns one row per origin."""
+    origin_lats = [19.0760, 40.7128]
+    origin_lngs = [72.8777, -74.0060]
+    lats = [19.0760, 40.7128, 34.0522]
+    lngs = [72.8777, -74.0060, -118.2437]
+    
+    matrix = Dispatcher.haversine_matrix(origin_lats, origin_lngs, lats, lngs)
+    
+    assert matrix.shape == (2, 3)
+    for i in range(2):
+        row = Dispatcher.haversine_many((origin_lats[i], origin_lngs[i]), lats, lngs)
+        assert list(matrix[i]) == pytest.approx(list(row))
+
+
+def test_packers_within_radius_filters_in_sql(monkeypatch, db):
+    """Radius query only returns packers near the point and works on SQLite."""
+    from core.config import settings
+    from tests.conftest import add_packer
+    
+    inventory = {"cardboard_box_medium": 50, "packing_tape": 50}
+    add_packer(db, 1, name="A", lat=19.03, inventory=inventory, rating=4.0)
+    add_packer(db, 2, name="B", lat=19.01, inventory=inventory)
+    # Inside the bounding box corner but outside the circle
+    add_packer(db, 3, name="C", lat=19.085, lng=72.885, inventory=inventory)
+    add_packer(db, 4, name="D", lat=19.5, inventory=inventory)
+    add_packer(db, 5, name="E", inventory=inventory, available=False)
+    db.commit()
+    
+    packers = Dispatcher.packers_within_radius(db, 19.0, 72.8, 10.0)
+    assert sorted(packer.id for packer in packers) == [1, 2]
+    
+    monkeypatch.setattr(settings, "PACKER_INDEX_ENABLED", False)
+    packer, distance = Dispatcher.find_nearest_packer(
+        db, {"lat": 19.0, "lng": 72.8}, {"cardboard_box_medium": 1.0}
+    )
+    assert packer.id == 2
+    assert distance == Dispatcher.haversine_distance(19.01, 72.8, 19.0, 72.8)
@@ -0,0 +1,79 @@
+"""Tests for memoized material and price estimates."""
+from dataclasses import replace
+
+import numpy as np
+
+from core.config import settings
+from core.constants import PackagingCategory, FragilityLevel, UrgencyLevel
+from services.estimate_cache import EstimateCache, quantize_dimensions, quantize_distance, quantize_many
+from services.material_estimator import MaterialEstimator
+from services.pricing_engine import PricingEngine
+from services.pricing_rules import pricing_rules
+
+
+DIMENSIONS = {"length": 30.04, "width": 20, "height": 15, "weight": 2}
+
+
+def test_hit_after_miss_returns_copies():
+    cache = EstimateCache()
+    materials, box_size = cache.materials("electronics", DIMENSIONS, "high")
+    assert (materials, box_size) == MaterialEstimator.estimate_materials(
+        "electronics", quantize_dimensions(DIMENSIONS), "high"
+    )
+
+    materials["packing_tape"] = 999
+    again, _ = cache.materials("electronics", {**DIMENSIONS, "length": 29.98}, "high")
+    assert again["packing_tape"] != 999
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    price = cache.price("electronics", again, 12.344, "urgent")
+    assert price == PricingEngine.calculate_price("electronics", again, 12.34, "urgent")
+    assert cache.price("electronics", again, 12.336, "urgent") == price
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_enum_and_string_inputs_share_entries():
+    cache = EstimateCache()
+    cache.materials(PackagingCategory.ELECTRONICS, DIMENSIONS, FragilityLevel.HIGH)
+    cache.materials("electronics", DIMENSIONS, "high")
+    materials, _ = cache.materials("electronics", DIMENSIONS, "high")
+    cache.price(PackagingCategory.ELECTRONICS, materials, 5, UrgencyLevel.NORMAL)
+    cache.price("electronics", materials, 5, "normal")
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = EstimateCache(max_entries=2)
+    for length in (10, 20, 10, 30):
+        cache.materials("documents", {**DIMENSIONS, "length": length}, "low")
+    assert cache.stats()["size"] == 2
+    assert cache.evictions == 1
+
+    # 10 was used after 20, so 20 went
+    cache.materials("documents", {**DIMENSIONS, "length": 10}, "low")
+    cache.materials("documents", {**DIMENSIONS, "length": 20}, "low")
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_pricing_change_invalidates():
+    cache = EstimateCache()
+    before = cache.price("documents", {"packing_tape": 1}, 10, "normal")
+    current = pricing_rules.current()
+    pricing_rules.activate(replace(current, version=current.version + 1, price_per_km=current.price_per_km + 10))
+    try:
+        after = cache.price("documents", {"packing_tape": 1}, 10, "normal")
+    finally:
+        pricing_rules.clear()
+    assert after["distance_charge"] == before["distance_charge"] + 100
+    assert after["pricing_version"] == before["pricing_version"] + 1
+    assert cache.misses == 2 and cache.invalidations == 1
+
+
+def test_vectorized_quantization_matches_scalar():
+    values = np.random.default_rng(7).uniform(0, 500, 5000)
+    assert quantize_many(values, settings.ESTIMATE_DISTANCE_STEP_KM).tolist() == [
+        quantize_distance(float(value)) for value in values
+    ]
+    assert quantize_many(values, settings.ESTIMATE_DIMENSION_STEP_CM).tolist() == [
+        quantize_dimensions({"length": float(value)})["length"] for value in values
+    ]
@@ -1,7 +1,11 @@
 """Tests for material estimator service."""
+import itertools
+
+import numpy as np
 import pytest
 from services.material_estimator import MaterialEstimator
-from core.constants import PackagingCategory, FragilityLevel
+from services.pricing_engine import PricingEngine
+from core.constants import PackagingCategory, FragilityLevel, UrgencyLevel
 
 
 def test_calculate_volume():
@@ -140,3 +144,27 @@ def test_calculate_material_cost():
     
     # Cost should be: (3 * 15) + (1 * 35) + (1 * 25) = 105
     assert cost == 105.0
+
+
+def test_vectorized_estimates_match_single_items():
+    """Batch estimates equal item-by-item ones, including rounding."""
+    sizes = [0.5, 3.3, 19.9, 20.0, 31.7, 45.05, 80.0]
+    cases = list(itertools.product(PackagingCategory, FragilityLevel, UrgencyLevel, sizes, sizes[::2]))
+    categories = [c[0] for c in cases]
+    fragilities = [c[1] for c in cases]
+    urgencies = [c[2] for c in cases]
+    dimensions = np.array([(c[3], c[4], c[3] / 2) for c in cases])
+    distances = np.array([c[3] / 3 for c in cases])
+
+    materials, box_sizes, costs = MaterialEstimator.estimate_materials_many(categories, dimensions, fragilities)
+    prices = PricingEngine.calculate_prices(categories, costs, distances, urgencies)
+
+    for i, (category, fragility, urgency, a, b) in enumerate(cases):
+        expected, box_size = MaterialEstimator.estimate_materials(
+            category, {"length": a, "width": b, "height": a / 2}, fragility
+        )
+        breakdown = PricingEngine.calculate_price(category, expected, a / 3, urgency)
+        assert breakdown.pop("pricing_version") == 0
+        assert materials[i] == expected
+        assert box_sizes[i] == box_size
+        assert {name: values[i] for name, values in prices.items()} == breakdown
@@ -0,0 +1,129 @@
+"""Tests for the streaming event broker and live order events."""
+import asyncio
+import random
+import threading
+from datetime import datetime, timezone
+
+from core.streaming import format_sse
+from models.user import User
+from models.packer import Packer
+from models.order import Order
+from models.tracking import TrackingEvent
+from services.dispatcher import Dispatcher
+from services.event_broker import EventBroker, RESYNC, broker
+from services.live_orders import (
+    ORDER_ADDED,
+    cell_topic,
+    cell_topics_for_radius,
+    order_matches_packer,
+    publish_order_added,
+)
+
+
+def test_publish_from_other_thread_reaches_subscribers():
+    """Events published from a worker thread arrive once per subscriber."""
+    events = EventBroker()
+
+    async def scenario():
+        first = events.subscribe(["cell:1:1", "cell:1:2"])
+        second = events.subscribe(["cell:9:9"])
+
+        thread = threading.Thread(target=events.publish, args=(["cell:1:1", "cell:1:2"], {"n": 1}))
+        thread.start()
+        thread.join()
+
+        assert await first.get(1.0) == {"n": 1}
+        # Subscribed to both topics but delivered once
+        assert await first.get(0.05) is None
+        assert await second.get(0.05) is None
+
+        events.unsubscribe(first)
+        events.unsubscribe(second)
+        assert events.publish("cell:1:1", {"n": 2}) == 0
+        assert len(events) == 0
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_resync():
+    """A full queue is replaced by a single resync event."""
+    events = EventBroker(max_queue=3)
+
+    async def scenario():
+        subscription = events.subscribe(["t"])
+        for n in range(5):
+            events.publish("t", {"n": n})
+        await asyncio.sleep(0)
+
+        received = []
+        while (event := await subscription.get(0.05)) is not None:
+            received.append(event)
+        assert received[0] == RESYNC
+        assert len(received) <= 3
+
+    asyncio.run(scenario())
+
+
+def test_resubscribe_keeps_queued_events():
+    """Changing topics moves the subscription without losing what it has queued."""
+    events = EventBroker()
+
+    async def scenario():
+        subscription = events.subscribe(["order:1"])
+        events.publish("order:1", {"n": 1})
+        events.resubscribe(subscription, ["order:1", "packer:7"])
+        events.publish("packer:7", {"n": 2})
+
+        assert await subscription.get(1.0) == {"n": 1}
+        assert await subscription.get(1.0) == {"n": 2}
+
+        events.resubscribe(subscription, ["order:1"])
+        assert not events.has_subscribers("packer:7")
+        events.unsubscribe(subscription)
+        assert len(events) == 0
+
+    asyncio.run(scenario())
+
+
+def test_radius_topics_cover_every_point_in_radius():
+    """Any pickup within the radius publishes to one of the packer's topics."""
+    rng = random.Random(2)
+    lat, lng, radius = 19.07, 72.87, 10.0
+    topics = set(cell_topics_for_radius(lat, lng, radius))
+
+    for _ in range(500):
+        plat, plng = lat + rng.uniform(-0.1, 0.1), lng + rng.uniform(-0.1, 0.1)
+        if Dispatcher.haversine_distance(lat, lng, plat, plng) <= radius:
+            assert cell_topic(plat, plng) in topics
+
+
+def test_order_added_event_is_public_and_filtered():
+    """New-order events leave out private fields and match only nearby, servable packers."""
+    now = datetime.now(timezone.utc)
+    order = Order(
+        id=5, user_id=1, status="CREATED", category="gift",
+        item_dimensions={"length": 10, "width": 10, "height": 10, "weight": 1},
+        materials_required={"packing_tape": 2.0}, price=100.0, distance_km=None,
+        pickup_location={"lat": 19.0, "lng": 72.8, "address": "x"},
+        receiver_phone="+919999999999", delivery_otp="123456", created_at=now, updated_at=now,
+    )
+
+    async def scenario():
+        subscription = broker.subscribe([cell_topic(19.0, 72.8)])
+        try:
+            publish_order_added(order)
+            event = await subscription.get(1.0)
+        finally:
+            broker.unsubscribe(subscription)
+        return event
+
+    event = asyncio.run(scenario())
+
+    assert event["type"] == ORDER_ADDED
+    assert event["order"]["id"] == 5
+    assert "delivery_otp" not in event["order"]
+    assert "receiver_phone" not in event["order"]
+    assert order_matches_packer(event["order"], 19.0, 72.81, 5.0, {"packing_tape": 2})
+    assert not order_matches_packer(event["order"], 19.0, 72.81, 5.0, {"packing_tape": 1})
+    assert not order_matches_packer(event["order"], 19.5, 72.81, 5.0, {"packing_tape": 2})
+    assert format_sse(ORDER_ADDED, {"order_id": 5}) == 'event: order_added\ndata: {"order_id":5}\n\n'
@@ -0,0 +1,141 @@
+"""Tests for the packer spatial index."""
+import random
+
+import pytest
+
+from models.packer import Packer
+from services.dispatcher import Dispatcher
+from services.geo_index import PackerGeoIndex, packer_index
+from tests.conftest import add_packer
+
+
+def _random_index(seed=7, count=500):
+    rng = random.Random(seed)
+    index = PackerGeoIndex(cell_size_deg=0.05)
+    for packer_id in range(1, count + 1):
+        index.upsert(
+            packer_id,
+            19.0 + rng.uniform(-0.3, 0.3),
+            72.8 + rng.uniform(-0.3, 0.3),
+            rating=rng.choice([3.5, 4.0, 4.5, 5.0]),
+        )
+    return index
+
+
+def _brute_force(index, lat, lng, radius_km=None):
+    results = []
+    for packer_id in range(1, len(index) + 1):
+        entry = index.get(packer_id)
+        distance = Dispatcher.haversine_distance(entry.lat, entry.lng, lat, lng)
+        if radius_km is None or distance <= radius_km:
+            results.append((entry.id, distance, entry.rating))
+    results.sort(key=lambda x: (x[1], -x[2]))
+    return results
+
+
+def test_within_radius_matches_brute_force():
+    """Radius query returns the same packers in the same order as a full scan."""
+    index = _random_index()
+
+    results = index.within_radius(19.05, 72.85, 5.0)
+    expected = _brute_force(index, 19.05, 72.85, 5.0)
+
+    assert [(e.id, d) for e, d in results] == [(i, d) for i, d, _ in expected]
+
+
+def test_nearest_matches_brute_force():
+    """k-nearest query agrees with a full scan."""
+    index = _random_index()
+
+    for lat, lng in [(19.0, 72.8), (19.25, 72.55), (18.9, 73.05)]:
+        results = index.nearest(lat, lng, k=10)
+        expected = _brute_force(index, lat, lng)[:10]
+        assert [d for _, d in results] == [d for _, d, _ in expected]
+
+
+def test_nearest_respects_radius_and_predicate():
+    """Nearest query skips packers outside the radius or rejected by the predicate."""
+    index = PackerGeoIndex(cell_size_deg=0.05)
+    index.upsert(1, 19.0, 72.8, inventory={"bubble_wrap": 1})
+    index.upsert(2, 19.01, 72.8, inventory={"bubble_wrap": 100})
+    index.upsert(3, 19.5, 72.8, inventory={"bubble_wrap": 100})
+
+    results = index.nearest(
+        19.0, 72.8, k=5, radius_km=10.0,
+        predicate=lambda entry: entry.inventory.get("bubble_wrap", 0) >= 10
+    )
+
+    assert [entry.id for entry, _ in results] == [2]
+
+
+def test_nearest_checks_inventory_of_ring_candidates_only():
+    """Inventory feasibility is tested for the visited cells' packers, not the whole index."""
+    index = PackerGeoIndex(cell_size_deg=0.05)
+    index.upsert(1, 19.0, 72.8, inventory={"bubble_wrap": 1})
+    index.upsert(2, 19.01, 72.8, inventory={"bubble_wrap": 100})
+    for packer_id in range(3, 103):
+        index.upsert(packer_id, 25.0, 80.0, inventory={"bubble_wrap": 100})
+
+    checked = []
+    packers_for = index.inventories.packers_for
+    index.inventories.packers_for = lambda required, ids: checked.extend(ids) or packers_for(required, ids)
+
+    results = index.nearest(19.0, 72.8, k=1, radius_km=10.0, required_materials={"bubble_wrap": 10})
+
+    assert [entry.id for entry, _ in results] == [2]
+    assert sorted(checked) == [1, 2]
+
+
+def test_rating_breaks_distance_ties():
+    """Packers at the same distance are ordered by rating, best first."""
+    index = PackerGeoIndex(cell_size_deg=0.05)
+    index.upsert(1, 19.0, 72.8, rating=4.0)
+    index.upsert(2, 19.0, 72.8, rating=4.8)
+
+    results = index.nearest(19.01, 72.8, k=2)
+
+    assert [entry.id for entry, _ in results] == [2, 1]
+
+
+def test_sync_moves_and_removes_packers():
+    """Syncing follows location and availability changes."""
+    index = PackerGeoIndex(cell_size_deg=0.05)
+    packer = Packer(id=1, lat=19.0, lng=72.8, rating=5.0, available=True, inventory={})
+
+    index.sync(packer)
+    assert index.nearest(19.0, 72.8, k=1, radius_km=1.0)
+
+    packer.lat = 19.5
+    index.sync(packer)
+    assert not index.nearest(19.0, 72.8, k=1, radius_km=1.0)
+    assert index.nearest(19.5, 72.8, k=1, radius_km=1.0)
+
+    packer.available = False
+    index.sync(packer)
+    assert len(index) == 0
+
+
+def test_find_nearest_packer_uses_database_truth(db):
+    """Dispatcher returns the nearest qualified packer and skips stale index entries."""
+    inventory = {"cardboard_box_medium": 50, "packing_tape": 50}
+    add_packer(db, 1, name="Near", lat=19.001, inventory=inventory, rating=4.0)
+    add_packer(db, 2, name="Far", lat=19.02, inventory=inventory)
+    add_packer(db, 3, name="Empty")
+    db.commit()
+
+    packer_index.clear()
+    try:
+        required = {"cardboard_box_medium": 1.0, "packing_tape": 1.0}
+        packer, distance = Dispatcher.find_nearest_packer(db, {"lat": 19.0, "lng": 72.8}, required)
+        assert packer.id == 1
+        assert distance == Dispatcher.haversine_distance(19.001, 72.8, 19.0, 72.8)
+
+        # Another worker took packer 1 offline without this index noticing
+        db.query(Packer).filter(Packer.id == 1).update({"available": False})
+        db.commit()
+
+        packer, _ = Dispatcher.find_nearest_packer(db, {"lat": 19.0, "lng": 72.8}, required)
+        assert packer.id == 2
+        assert packer_index.get(1) is None
+    finally:
+        packer_index.clear()
@@ -0,0 +1,113 @@
+"""Tests for ETag handling on order and tracking reads."""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.deps import get_current_user
+from core.constants import OrderStatus
+from core.http_cache import etag_matches, make_etag
+from models.database import get_db
+from models.user import User
+from models.packer import Packer
+from models.tracking import TrackingEvent
+from tests.conftest import add_order, add_packer, add_user, override_get_db
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)", "Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def client(session_factory):
+    db = session_factory()
+    add_user(db, 1)
+    add_user(db, 2, name="V")
+    add_packer(db, name="P")
+    add_order(db)
+    db.add(TrackingEvent(order_id=1, status=OrderStatus.CREATED, message="Placed"))
+    db.commit()
+    db.close()
+
+    current = {"user_id": 1}
+
+    def override_user():
+        session = session_factory()
+        try:
+            return session.get(User, current["user_id"])
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db(session_factory)
+    app.dependency_overrides[get_current_user] = override_user
+    try:
+        yield TestClient(app), session_factory, current
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_etag_comparison_is_weak():
+    etag = make_etag("order", 1, "2026-01-01")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches(etag[:-1] + '-gzip"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/orders/1", "/api/v1/orders", "/api/v1/orders/1/tracking", "/api/v1/orders/1/tracking?after_id=1",
+])
+def test_unchanged_read_returns_304(client, path):
+    http, _, _ = client
+    first = http.get(path, headers=HEADERS)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = http.get(path, headers={**HEADERS, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_new_tracking_event_changes_etag(client):
+    http, factory, _ = client
+    etag = http.get("/api/v1/orders/1/tracking", headers=HEADERS).headers["etag"]
+
+    db = factory()
+    db.add(TrackingEvent(order_id=1, status=OrderStatus.CREATED, message="Still looking"))
+    db.commit()
+    db.close()
+
+    changed = http.get("/api/v1/orders/1/tracking", headers={**HEADERS, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [event["message"] for event in changed.json()["events"]] == ["Placed", "Still looking"]
+
+
+def test_authorization_is_checked_before_304(client):
+    http, _, current = client
+    etag = http.get("/api/v1/orders/1", headers=HEADERS).headers["etag"]
+
+    current["user_id"] = 2
+    assert http.get("/api/v1/orders/1", headers={**HEADERS, "If-None-Match": etag}).status_code == 403
+    assert http.get("/api/v1/orders/1/tracking", headers={**HEADERS, "If-None-Match": etag}).status_code == 403
+
+
+def test_packer_etag_follows_updates(client):
+    http, factory, _ = client
+    etag = http.get("/api/v1/packers/1", headers=HEADERS).headers["etag"]
+    assert http.get("/api/v1/packers/1", headers={**HEADERS, "If-None-Match": etag}).status_code == 304
+
+    db = factory()
+    packer = db.get(Packer, 1)
+    # Set explicitly so the test does not depend on clock resolution
+    packer.updated_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    packer.rating = 4.0
+    db.commit()
+    db.close()
+
+    changed = http.get("/api/v1/packers/1", headers={**HEADERS, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["rating"] == 4.0
@@ -0,0 +1,102 @@
+"""Tests for dense inventory vectors."""
+import random
+
+from core.constants import MATERIAL_TYPES
+from models.packer import Packer
+from services.dispatcher import Dispatcher
+from services.geo_index import PackerGeoIndex
+from services.inventory_matrix import (
+    InventoryMatrix,
+    encode_materials,
+    encode_many,
+    servable_orders,
+)
+
+
+def _random_materials(rng, scale):
+    names = rng.sample(list(MATERIAL_TYPES), rng.randint(1, 5))
+    return {name: rng.choice([0.5, 1.0, 2.0, 3.7]) * scale for name in names}
+
+
+def test_encode_materials_uses_material_types_order():
+    """Vectors are indexed by MATERIAL_TYPES order."""
+    vector = encode_materials({"bubble_wrap": 2.5, "label_sticker": 3})
+
+    assert len(vector) == len(MATERIAL_TYPES)
+    assert vector[0] == 2.5
+    assert vector[-1] == 3
+    assert vector.sum() == 5.5
+
+
+def test_packers_for_matches_dict_check():
+    """Vectorized feasibility agrees with check_inventory_sufficient."""
+    rng = random.Random(3)
+    matrix = InventoryMatrix(initial_capacity=4)
+    inventories = {}
+    for packer_id in range(1, 60):
+        inventory = {k: int(v) for k, v in _random_materials(rng, 20).items()}
+        inventories[packer_id] = inventory
+        matrix.update(packer_id, inventory)
+
+    for _ in range(50):
+        required = _random_materials(rng, 3)
+        expected = {
+            pid for pid, inventory in inventories.items()
+            if Dispatcher.check_inventory_sufficient(inventory, required)
+        }
+        assert matrix.packers_for(required) == expected
+
+
+def test_update_and_remove():
+    """Rows follow inventory changes and removals."""
+    matrix = InventoryMatrix()
+    matrix.update(1, {"packing_tape": 5})
+    matrix.update(2, {"packing_tape": 1})
+
+    assert matrix.packers_for({"packing_tape": 2.0}) == {1}
+
+    matrix.update(2, {"packing_tape": 10})
+    matrix.remove(1)
+
+    assert matrix.packers_for({"packing_tape": 2.0}) == {2}
+    assert matrix.packers_for({"packing_tape": 2.0}, packer_ids=[1]) == set()
+    assert len(matrix) == 1
+
+
+def test_unknown_materials_are_checked():
+    """Materials outside MATERIAL_TYPES still have to be in stock."""
+    matrix = InventoryMatrix()
+    matrix.update(1, {"packing_tape": 5, "custom_crate": 2})
+    matrix.update(2, {"packing_tape": 5})
+
+    assert matrix.packers_for({"packing_tape": 1.0, "custom_crate": 1.0}) == {1}
+
+
+def test_servable_orders():
+    """One packer against many orders in a single comparison."""
+    inventory = {"cardboard_box_medium": 2, "packing_tape": 1}
+    orders = [
+        {"cardboard_box_medium": 1.0, "packing_tape": 1.0},
+        {"cardboard_box_medium": 3.0},
+        {"bubble_wrap": 0.5},
+    ]
+
+    assert servable_orders(inventory, encode_many(orders)).tolist() == [True, False, False]
+
+
+def test_geo_index_keeps_matrix_in_sync():
+    """Index sync updates the inventory rows of online packers."""
+    index = PackerGeoIndex()
+    packer = Packer(id=7, lat=19.0, lng=72.8, rating=5.0, available=True,
+                    inventory={"packing_tape": 1})
+
+    index.sync(packer)
+    assert index.inventories.packers_for({"packing_tape": 2.0}) == set()
+
+    packer.inventory = Dispatcher.return_inventory(packer, {"packing_tape": 3.0})
+    index.sync(packer)
+    assert index.inventories.packers_for({"packing_tape": 2.0}) == {7}
+
+    packer.available = False
+    index.sync(packer)
+    assert len(index.inventories) == 0
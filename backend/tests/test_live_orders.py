@@ -0,0 +1,124 @@
+"""Tests for the packer live order feed."""
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models.packer import Packer
+from models.order import Order
+from core.config import settings
+from core.constants import OrderStatus
+from services.dispatcher import Dispatcher
+from services.live_orders import LiveOrderFeed, InvalidCursor, SORT_BY_AGE, SORT_BY_DISTANCE
+from services.order_pool import order_pool
+from tests.conftest import add_order, add_packer, add_user
+
+
+CENTER = (19.0, 72.8)
+
+
+@pytest.fixture(params=[True, False], ids=["pool", "table"])
+def db(request, monkeypatch, db):
+    monkeypatch.setattr(settings, "ORDER_POOL_ENABLED", request.param)
+    order_pool.clear()
+    rng = random.Random(5)
+
+    add_user(db)
+    add_packer(db, lat=CENTER[0], lng=CENTER[1], inventory={"cardboard_box_medium": 5, "packing_tape": 5})
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for order_id in range(1, 121):
+        lat = CENTER[0] + rng.uniform(-0.15, 0.15)
+        lng = CENTER[1] + rng.uniform(-0.15, 0.15)
+        # Every tenth order needs more boxes than the packer has
+        boxes = 10.0 if order_id % 10 == 0 else 1.0
+        add_order(
+            db, order_id, pickup=(lat, lng),
+            materials_required={"cardboard_box_medium": boxes, "packing_tape": 1.0},
+            # Pairs of orders share a timestamp to exercise the id tie-break
+            created_at=started + timedelta(minutes=order_id // 2),
+        )
+    db.commit()
+    yield db
+    order_pool.clear()
+
+
+def _expected(db, radius_km):
+    packer = db.get(Packer, 1)
+    return [
+        order for order in db.query(Order).all()
+        if Dispatcher.haversine_distance(CENTER[0], CENTER[1], float(order.pickup_lat), float(order.pickup_lng)) <= radius_km
+        and Dispatcher.check_inventory_sufficient(packer.inventory, order.materials_required)
+    ]
+
+
+def _all_pages(db, sort, radius_km, limit):
+    packer = db.get(Packer, 1)
+    seen, cursor = [], None
+    while True:
+        orders, cursor = LiveOrderFeed.page(db, packer, radius_km, sort=sort, limit=limit, cursor=cursor)
+        assert len(orders) <= limit
+        seen.extend(orders)
+        if cursor is None:
+            return seen
+
+
+def test_age_pages_cover_nearby_orders_newest_first(db):
+    """Pages concatenate to every nearby servable order, newest first, without repeats."""
+    expected = sorted(_expected(db, 10.0), key=lambda o: (o.created_at, o.id), reverse=True)
+
+    seen = _all_pages(db, SORT_BY_AGE, 10.0, limit=7)
+
+    assert [o.id for o in seen] == [o.id for o in expected]
+    assert 0 < len(seen) < 120
+
+
+def test_distance_pages_are_nearest_first(db):
+    """Distance sort returns the same orders ordered by distance from the packer."""
+    radius = 8.0
+    expected = _expected(db, radius)
+
+    seen = _all_pages(db, SORT_BY_DISTANCE, radius, limit=5)
+    distances = [
+        Dispatcher.haversine_distance(CENTER[0], CENTER[1], float(o.pickup_lat), float(o.pickup_lng))
+        for o in seen
+    ]
+
+    assert sorted(o.id for o in seen) == sorted(o.id for o in expected)
+    assert distances == sorted(distances)
+
+
+def test_cursor_must_match_sort(db):
+    packer = db.get(Packer, 1)
+    _, cursor = LiveOrderFeed.page(db, packer, 10.0, sort=SORT_BY_AGE, limit=2)
+
+    with pytest.raises(InvalidCursor):
+        LiveOrderFeed.page(db, packer, 10.0, sort=SORT_BY_DISTANCE, limit=2, cursor=cursor)
+    with pytest.raises(InvalidCursor):
+        LiveOrderFeed.page(db, packer, 10.0, sort=SORT_BY_AGE, limit=2, cursor="not-a-cursor")
+
+
+def test_pool_tracks_claims_and_reconciles_drift(db):
+    """Claimed orders leave the feed; reconcile picks up changes made behind the pool's back."""
+    packer = db.get(Packer, 1)
+    first, _ = LiveOrderFeed.page(db, packer, 10.0, limit=3)
+    claimed = first[0]
+
+    # Claimed through this process: removed straight away
+    assert Dispatcher.claim_order(db, claimed.id, 1)
+    db.commit()
+    order_pool.remove(claimed.id)
+    assert claimed.id not in [o.id for o in LiveOrderFeed.page(db, packer, 10.0, limit=3)[0]]
+
+    # Claimed and created elsewhere: filtered on read, then reconciled
+    other = first[1]
+    db.query(Order).filter(Order.id == other.id).update({Order.status: OrderStatus.CANCELLED})
+    add_order(db, 500, pickup=CENTER, created_at=datetime(2027, 1, 1, tzinfo=timezone.utc))
+    db.commit()
+    assert other.id not in [o.id for o in LiveOrderFeed.page(db, packer, 10.0, limit=3)[0]]
+
+    if settings.ORDER_POOL_ENABLED:
+        assert 500 not in order_pool
+        drift = order_pool.reconcile(db)
+        assert drift["added"] == 1
+        assert 500 in order_pool and other.id not in order_pool
+    assert LiveOrderFeed.page(db, packer, 10.0, limit=3)[0][0].id == 500
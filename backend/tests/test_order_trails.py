@@ -0,0 +1,102 @@
+"""Tests for compressed order location trails."""
+from datetime import datetime, timedelta, timezone
+import math
+
+import pytest
+
+from models.order import Order
+from models.trail import OrderTrail
+from core.constants import OrderStatus
+from services.packer_locations import LocationFix
+from services.order_trails import OrderTrails, TrailPoint, decode_points, encode_points, simplify
+from tests.conftest import add_order, add_packer, add_user
+
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(db):
+    add_user(db)
+    add_packer(db, name="P")
+    add_order(db, packer_id=1, status=OrderStatus.ON_THE_WAY, category="house_shifting")
+    db.commit()
+    return db
+
+
+def _l_shaped_route(seconds):
+    """One fix a second: north for half the time, then east, with ~1 m of GPS jitter."""
+    fixes = []
+    for i in range(seconds):
+        jitter = 0.00001 * math.sin(i * 1.7)
+        if i < seconds // 2:
+            lat, lng = 19.0 + i * 0.00008, 72.8 + jitter
+        else:
+            lat, lng = 19.0 + (seconds // 2) * 0.00008 + jitter, 72.8 + (i - seconds // 2) * 0.00008
+        fixes.append(LocationFix(T0 + timedelta(seconds=i), lat, lng))
+    return fixes
+
+
+def test_codec_round_trip():
+    points = [TrailPoint(1767268800, 19_076_090, 72_877_426), TrailPoint(1767268801, 19_076_010, 72_877_500),
+              TrailPoint(1767268860, -33_868_820, 151_209_290)]
+    data = encode_points(points)
+    assert decode_points(data) == points
+    assert decode_points(encode_points([])) == []
+    with pytest.raises(ValueError):
+        decode_points(data[:-1])
+
+
+def test_simplify_keeps_corners_and_drops_jitter():
+    points = [TrailPoint.from_fix(fix) for fix in _l_shaped_route(600)]
+    kept = simplify(points, 5.0)
+    assert kept[0] == 0 and kept[-1] == 599
+    assert len(kept) <= 4
+    assert any(abs(i - 300) <= 1 for i in kept)
+
+
+def test_flush_appends_to_trail_of_active_order(db):
+    trails = OrderTrails(tolerance_m=5.0)
+    fixes = _l_shaped_route(3600)
+    # Every two seconds, flushed every fifteen
+    for start in range(0, len(fixes), 2):
+        trails.extend(1, fixes[start:start + 2])
+        if start % 15 == 0:
+            trails.flush(db)
+    trails.flush(db)
+
+    row = db.get(OrderTrail, 1)
+    points = decode_points(row.points)
+    assert row.point_count == len(points)
+    assert len(row.points) < 1024
+    assert points[0] == TrailPoint.from_fix(fixes[0])
+    assert points[-1] == TrailPoint.from_fix(fixes[-1])
+    assert any(abs(point.t - points[0].t - 1800) <= 1 for point in points)
+
+
+def test_trail_survives_losing_memory(db):
+    """Another process, or a restart, carries on from the stored trail."""
+    fixes = _l_shaped_route(100)
+    first = OrderTrails()
+    first.extend(1, fixes[:50])
+    first.flush(db)
+
+    second = OrderTrails()
+    second.extend(1, fixes[50:])
+    second.flush(db)
+
+    points = decode_points(db.get(OrderTrail, 1).points)
+    assert points[0] == TrailPoint.from_fix(fixes[0])
+    assert points[-1] == TrailPoint.from_fix(fixes[-1])
+    assert [point.t for point in points] == sorted({point.t for point in points})
+
+
+def test_fixes_without_active_order_are_dropped(db):
+    db.get(Order, 1).status = OrderStatus.COMPLETED
+    db.commit()
+
+    trails = OrderTrails()
+    trails.extend(1, _l_shaped_route(10))
+    assert trails.flush(db) == 0
+    assert trails.pending() == 0
+    assert db.get(OrderTrail, 1) is None
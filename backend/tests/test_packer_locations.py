@@ -0,0 +1,135 @@
+"""Tests for in-memory packer positions and write-behind."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from api.main import app
+from api.deps import get_current_packer
+from models.database import get_db
+from models.packer import Packer
+from services.dispatcher import Dispatcher
+from services.geo_index import packer_index
+from services.packer_locations import PackerLocations, packer_locations
+from tests.conftest import add_packer, override_get_db
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"}
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(db):
+    add_packer(db, 1, inventory={"packing_tape": 10})
+    add_packer(db, 2, lat=19.02, inventory={"packing_tape": 10})
+    db.commit()
+    packer_index.clear()
+    packer_locations.clear()
+    yield db
+    packer_index.clear()
+    packer_locations.clear()
+
+
+def test_stale_and_duplicate_fixes_are_ignored():
+    locations = PackerLocations(trail_size=10)
+    accepted, latest = locations.record(1, [
+        (T0 + timedelta(seconds=2), 19.02, 72.8),
+        (T0, 19.0, 72.8),
+        (T0 + timedelta(seconds=1), 19.01, 72.8),
+    ])
+    assert len(accepted) == 3
+    assert latest.lat == 19.02
+
+    # A retried upload and a late fix change nothing
+    accepted, latest = locations.record(1, [
+        (T0 + timedelta(seconds=2), 19.02, 72.8),
+        (T0 + timedelta(seconds=1), 19.5, 72.8),
+    ])
+    assert accepted == []
+    assert latest.lat == 19.02
+    assert [fix.lat for fix in locations.trail(1)] == [19.0, 19.01, 19.02]
+
+
+def test_trail_keeps_only_recent_fixes():
+    locations = PackerLocations(trail_size=3)
+    locations.record(1, [(T0 + timedelta(seconds=i), 19.0 + i / 100, 72.8) for i in range(5)])
+    assert [fix.recorded_at for fix in locations.trail(1)] == [T0 + timedelta(seconds=i) for i in (2, 3, 4)]
+
+
+def test_fixes_from_the_future_are_clamped():
+    locations = PackerLocations()
+    future = datetime.now(timezone.utc) + timedelta(hours=1)
+    _, latest = locations.record(1, [(future, 19.0, 72.8)])
+    assert latest.recorded_at <= datetime.now(timezone.utc)
+    assert len(locations.record(1, [(None, 19.01, 72.8)])[0]) == 1
+
+
+def test_flush_writes_latest_fix_once(db):
+    packer_locations.record(1, [(T0, 19.1, 72.9), (T0 + timedelta(seconds=1), 19.2, 72.95)])
+    assert db.get(Packer, 1).lat == 19.0
+    assert packer_locations.pending() == 1
+
+    assert packer_locations.flush(db) == 1
+    db.expire_all()
+    packer = db.get(Packer, 1)
+    assert (float(packer.lat), float(packer.lng)) == (19.2, 72.95)
+    assert packer_locations.pending() == 0
+    assert packer_locations.flush(db) == 0
+
+
+def test_dispatch_sees_fixes_before_flush(db):
+    # By row, packer 2 is nearer; packer 1 has since reported a fix at the pickup
+    pickup = {"lat": 19.04, "lng": 72.8}
+    packer_locations.record(1, [(None, 19.04, 72.8001)])
+
+    packer, distance = Dispatcher.find_nearest_packer(db, pickup, {"packing_tape": 1.0})
+    assert packer.id == 1
+    assert distance < 0.1
+
+
+def test_rows_written_by_other_workers_win_over_old_fixes(db):
+    before = datetime.now(timezone.utc) - timedelta(minutes=5)
+    packer_locations.record(1, [(before, 19.1, 72.9)])
+    packer = db.get(Packer, 1)
+    # Unsaved fixes win whatever the row says
+    assert packer_locations.position(packer) == (19.1, 72.9)
+
+    packer_locations.flush(db)
+    # Another worker flushes a newer position, bumping updated_at
+    db.execute(update(Packer).where(Packer.id == 1).values(lat=19.3, lng=72.7))
+    db.commit()
+    db.expire_all()
+    packer = db.get(Packer, 1)
+    assert packer_locations.position(packer) == (19.3, 72.7)
+
+    # A newer fix received here wins again
+    packer_locations.record(1, [(None, 19.4, 72.6)])
+    packer_locations.flush(db)
+    db.expire_all()
+    assert packer_locations.position(db.get(Packer, 1)) == (19.4, 72.6)
+
+
+def test_location_patch_does_not_hide_buffered_fixes(db, session_factory):
+    app.dependency_overrides[get_db] = override_get_db(session_factory)
+    app.dependency_overrides[get_current_packer] = lambda db=Depends(get_db): db.get(Packer, 1)
+    try:
+        client = TestClient(app)
+        packer_locations.record(1, [(datetime.now(timezone.utc) - timedelta(minutes=2), 19.05, 72.8)])
+        response = client.patch("/api/v1/packers/me/location", json={"lat": 19.1, "lng": 72.9}, headers=HEADERS)
+        assert response.status_code == 200
+        # The older unsaved fix is not written over the patched position
+        assert packer_locations.pending() == 0
+
+        # Fixes the device buffered before the patch still join the trail
+        buffered = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+        response = client.post(
+            "/api/v1/packers/me/locations",
+            json={"pings": [{"lat": 19.11, "lng": 72.9, "recorded_at": buffered}]},
+            headers=HEADERS
+        )
+        assert response.json()["accepted"] == 1
+    finally:
+        app.dependency_overrides.clear()
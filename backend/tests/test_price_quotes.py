@@ -0,0 +1,112 @@
+"""Tests for signed price quotes."""
+from dataclasses import replace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.deps import get_current_user
+from api.routes import orders
+from core.config import settings
+from models.database import get_db
+from models.order import Order
+from models.user import User
+from schemas.order import OrderCreate
+from services.estimate_cache import estimate_cache
+from services.dispatcher import Dispatcher
+from services.price_quotes import PriceQuotes
+from services.pricing_rules import pricing_rules
+from tests.conftest import add_user, override_get_db
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"}
+
+ESTIMATE = {
+    "category": "electronics",
+    "item_dimensions": {"length": 30, "width": 25, "height": 5, "weight": 1},
+    "fragility_level": "high",
+    "distance_km": 4.2,
+    "pickup_location": {"lat": 19.0, "lng": 72.8, "address": "x"},
+}
+
+ORDER = {**ESTIMATE, "receiver_name": "R", "receiver_phone": "+910000000200"}
+
+
+@pytest.fixture
+def client(session_factory):
+    db = session_factory()
+    add_user(db)
+    db.commit()
+    user = db.get(User, 1)
+    db.close()
+
+    app.dependency_overrides[get_db] = override_get_db(session_factory)
+    app.dependency_overrides[get_current_user] = lambda: user
+    pricing_rules.clear()
+    estimate_cache.clear()
+    try:
+        yield TestClient(app), session_factory
+    finally:
+        app.dependency_overrides.clear()
+        pricing_rules.clear()
+
+
+def test_order_keeps_quoted_price(client, monkeypatch):
+    client, factory = client
+    quote = client.post("/api/v1/orders/estimate/price", json=ESTIMATE, headers=HEADERS).json()
+    assert quote["quote_token"]
+
+    # The quote holds even after the rules change, and nothing is estimated again
+    pricing_rules.activate(replace(pricing_rules.current(), version=1, base_packing_fee=500.0))
+    monkeypatch.setattr(orders, "_estimate_order_materials", lambda request: pytest.fail("re-estimated"))
+    response = client.post("/api/v1/orders", json={**ORDER, "quote_token": quote["quote_token"]}, headers=HEADERS)
+    assert response.status_code == 201
+    assert response.json()["price"] == quote["final_price"]
+    assert response.json()["pricing_version"] == 0
+
+    # Without the quote the order is priced from the current rules
+    monkeypatch.undo()
+    response = client.post("/api/v1/orders", json=ORDER, headers=HEADERS)
+    assert response.json()["price"] > quote["final_price"]
+    assert factory().query(Order).count() == 2
+
+
+def test_quote_only_matches_its_inputs(client):
+    client, _ = client
+    token = client.post("/api/v1/orders/estimate/price", json=ESTIMATE, headers=HEADERS).json()["quote_token"]
+
+    assert PriceQuotes.redeem(token, OrderCreate(**ORDER)) is not None
+    # Below the estimate resolution, as the cache treats it
+    assert PriceQuotes.redeem(token, OrderCreate(**{**ORDER, "distance_km": 4.2000001})) is not None
+    assert PriceQuotes.redeem(token, OrderCreate(**{**ORDER, "distance_km": 40})) is None
+    assert PriceQuotes.redeem(token, OrderCreate(**{**ORDER, "urgency": "urgent"})) is None
+    assert PriceQuotes.redeem(token[:-2] + "xx", OrderCreate(**ORDER)) is None
+
+
+def test_expired_quote_is_ignored(client, monkeypatch):
+    client, _ = client
+    monkeypatch.setattr(settings, "QUOTE_EXPIRE_MINUTES", -1)
+    quote = client.post("/api/v1/orders/estimate/price", json=ESTIMATE, headers=HEADERS).json()
+    assert PriceQuotes.redeem(quote["quote_token"], OrderCreate(**ORDER)) is None
+
+    response = client.post("/api/v1/orders", json={**ORDER, "quote_token": quote["quote_token"]}, headers=HEADERS)
+    assert response.status_code == 201
+    assert response.json()["price"] == quote["final_price"]
+
+
+def test_dispatch_keeps_quoted_price(client):
+    client, factory = client
+    quote = client.post("/api/v1/orders/estimate/price", json=ESTIMATE, headers=HEADERS).json()
+    response = client.post("/api/v1/orders", json={**ORDER, "quote_token": quote["quote_token"]}, headers=HEADERS)
+    pricing_rules.activate(replace(pricing_rules.current(), version=1, base_packing_fee=500.0))
+
+    db = factory()
+    order = db.get(Order, response.json()["id"])
+    Dispatcher.reprice(order, 4.2)
+    assert (float(order.price), order.pricing_version) == (quote["final_price"], 0)
+
+    # A different distance is charged at the rules in force
+    Dispatcher.reprice(order, 9.0)
+    assert order.pricing_version == 1
+    assert float(order.price) > quote["final_price"]
+    db.close()
@@ -0,0 +1,104 @@
+"""Tests for versioned pricing rules."""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.deps import get_current_admin
+from models.database import get_db
+from models.admin import Admin
+from models.material import Material
+from services.pricing_rules import PricingRuleStore, pricing_rules
+from tests.conftest import override_get_db
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"}
+
+ITEM = {
+    "category": "gift",
+    "item_dimensions": {"length": 10, "width": 10, "height": 10, "weight": 1},
+    "distance_km": 5,
+}
+
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    db.add(Admin(id=1, name="A", email="a@example.com", password_hash="x"))
+    db.add(Material(name="packing_tape", unit="units", unit_cost=30))
+    db.commit()
+    db.close()
+    pricing_rules.clear()
+    yield session_factory
+    pricing_rules.clear()
+
+
+def test_publish_copies_current_rules_and_materials_table(factory):
+    db = factory()
+    store = PricingRuleStore()
+    row = store.publish(db, price_per_km=12.0, category_multipliers={"gift": 1.1}, note="Fuel")
+
+    rules = store.current()
+    assert row.version == rules.version == 1
+    assert rules.price_per_km == 12.0
+    assert rules.base_packing_fee == 50.0
+    assert rules.category_multiplier("gift") == 1.1
+    assert rules.category_multiplier("electronics") == 1.2
+    assert rules.material_costs["packing_tape"] == 30.0
+    assert rules.material_costs["ribbon"] == 5.0
+    with pytest.raises(TypeError):
+        rules.material_costs["ribbon"] = 0.0
+    db.close()
+
+
+def test_later_versions_keep_published_material_costs(factory):
+    db = factory()
+    store = PricingRuleStore()
+    # packing_tape is 30 in the materials table
+    store.publish(db, material_costs={"packing_tape": 99.0})
+    store.publish(db, price_per_km=12.0)
+
+    rules = store.current()
+    assert rules.version == 2
+    assert rules.material_costs["packing_tape"] == 99.0
+    assert store.build_candidate(db, base_packing_fee=60.0).material_costs == rules.material_costs
+    db.close()
+
+
+def test_other_processes_swap_to_newer_versions_only(factory):
+    db = factory()
+    publisher, other = PricingRuleStore(), PricingRuleStore()
+    publisher.publish(db, price_per_km=11.0)
+    publisher.publish(db, price_per_km=13.0)
+
+    assert other.current().version == 0
+    assert other.load(db) is True
+    assert (other.current().version, other.current().price_per_km) == (2, 13.0)
+    assert other.load(db) is False
+
+    first = PricingRuleStore()
+    first.load(db)
+    assert first.activate(publisher.current()) is False
+    db.close()
+
+
+def test_published_rules_price_new_estimates(factory):
+    admin = factory().get(Admin, 1)
+    app.dependency_overrides[get_db] = override_get_db(factory)
+    app.dependency_overrides[get_current_admin] = lambda: admin
+    client = TestClient(app)
+    try:
+        before = client.post("/api/v1/orders/estimate/price", json=ITEM, headers=HEADERS).json()
+        published = client.post("/api/v1/admin/pricing/rulesets", json={"price_per_km": 20}, headers=HEADERS)
+        after = client.post("/api/v1/orders/estimate/price", json=ITEM, headers=HEADERS).json()
+        unknown = client.post("/api/v1/admin/pricing/rulesets", json={"material_costs": {"gold": 1}}, headers=HEADERS)
+        listed = client.get("/api/v1/admin/pricing/rulesets", headers=HEADERS).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert published.status_code == 201
+    assert (before["pricing_version"], after["pricing_version"]) == (0, 1)
+    assert after["distance_charge"] == before["distance_charge"] * 2
+    # packing_tape now costs 30 from the materials table
+    assert after["material_cost"] == before["material_cost"] + 5
+    assert unknown.status_code == 400
+    assert [ruleset["version"] for ruleset in listed] == [1]
@@ -0,0 +1,135 @@
+"""Tests for the historical repricing simulator."""
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.deps import get_current_admin
+from core.config import settings
+from core.constants import OrderStatus
+from models.database import get_db
+from models.admin import Admin
+from models.material import Material
+from models.order import Order
+from services.estimate_cache import estimate_cache
+from services.pricing_engine import PricingEngine
+from services.pricing_rules import pricing_rules
+from services.repricing import RepricingSimulator
+from tests.conftest import override_get_db
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"}
+
+# category, urgency, materials, distance, surge, day, status
+ORDERS = [
+    ("gift", "normal", {"packing_tape": 1.0, "gift_wrapping_paper": 2.0}, 1.5, None, 1, OrderStatus.COMPLETED),
+    ("gift", "urgent", {"packing_tape": 1.0, "gift_wrapping_paper": 2.0}, 7.25, 1.2, 1, OrderStatus.COMPLETED),
+    ("electronics", "normal", {"bubble_wrap": 3.0, "packing_tape": 2.0}, 12.0, None, 2, OrderStatus.CREATED),
+    ("house_shifting", "normal", {"cardboard_box_large": 4.0}, 60.0, 1.5, 2, OrderStatus.PACKED),
+    ("house_shifting", "normal", {"cardboard_box_large": 4.0}, 3.0, None, 3, OrderStatus.CANCELLED),
+]
+
+
+@pytest.fixture
+def factory(session_factory):
+    pricing_rules.clear()
+    rules = pricing_rules.current()
+    db = session_factory()
+    db.add(Admin(id=1, name="A", email="a@example.com", password_hash="x"))
+    for category, urgency, materials, distance, surge, day, order_status in ORDERS:
+        price = PricingEngine.calculate_price(category, materials, distance, urgency, rules, surge or 1.0)
+        db.add(Order(
+            user_id=1, status=order_status, category=category, urgency=urgency,
+            item_dimensions={"length": 10, "width": 10, "height": 10, "weight": 1},
+            materials_required=materials, price=price["final_price"], distance_km=distance,
+            surge_multiplier=surge, pickup_location={"lat": 19.0, "lng": 72.8, "address": "x"},
+            created_at=datetime(2026, 3, day, 12),
+        ))
+    db.commit()
+    db.close()
+    yield session_factory
+    pricing_rules.clear()
+
+
+def test_current_rules_reproduce_recorded_prices(factory):
+    db = factory()
+    result = RepricingSimulator.simulate(db, pricing_rules.current(), chunk_size=2)
+    db.close()
+
+    assert result["orders"] == 4
+    assert result["delta"] == 0.0
+    assert result["current_revenue"] == result["candidate_revenue"] > 0
+    assert [group["key"] for group in result["by_category"]] == ["electronics", "gift", "house_shifting"]
+    assert [(group["key"], group["orders"]) for group in result["by_day"]] == [("2026-03-01", 2), ("2026-03-02", 2)]
+    assert [(group["key"], group["orders"]) for group in result["by_distance_band"]] == [
+        ("0-2 km", 1), ("5-10 km", 1), ("10-25 km", 1), ("50+ km", 1)
+    ]
+
+
+def test_candidate_matches_scalar_pricing(factory):
+    db = factory()
+    rules = pricing_rules.draft(price_per_km=14.0, category_multipliers={"gift": 1.5})
+    result = RepricingSimulator.simulate(db, rules, start_date=date(2026, 3, 1), end_date=date(2026, 3, 1))
+    db.close()
+
+    expected = sum(
+        PricingEngine.calculate_price(category, materials, distance, urgency, rules, surge or 1.0)["final_price"]
+        for category, urgency, materials, distance, surge, day, _ in ORDERS
+        if day == 1
+    )
+    assert result["orders"] == 2
+    assert result["candidate_revenue"] == round(expected, 2)
+    assert result["delta"] > 0
+    assert [group["key"] for group in result["by_category"]] == ["gift"]
+
+
+def test_simulate_endpoint(factory):
+    app.dependency_overrides[get_db] = override_get_db(factory)
+    app.dependency_overrides[get_current_admin] = lambda: factory().get(Admin, 1)
+    try:
+        client = TestClient(app)
+        response = client.post("/api/v1/admin/pricing/simulate", json={"price_per_km": 5.0}, headers=HEADERS)
+        unknown = client.post("/api/v1/admin/pricing/simulate", json={"material_costs": {"x": 1}}, headers=HEADERS)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["base_version"] == 0
+    assert response.json()["delta"] < 0
+    assert unknown.status_code == 400
+    # Simulating publishes nothing
+    assert pricing_rules.current().price_per_km != 5.0
+
+
+def test_simulated_candidate_is_what_publish_puts_in_force(factory):
+    db = factory()
+    db.add(Material(name="packing_tape", unit="units", unit_cost=30))
+    db.commit()
+    changes = {"price_per_km": 12.0, "category_multipliers": {"gift": 1.3}}
+
+    candidate = pricing_rules.build_candidate(db, **changes)
+    simulated = RepricingSimulator.simulate(db, candidate)
+    pricing_rules.publish(db, **changes)
+    published = RepricingSimulator.simulate(db, pricing_rules.current())
+    db.close()
+
+    assert candidate.material_costs["packing_tape"] == 30.0
+    assert simulated["candidate_revenue"] == published["candidate_revenue"]
+
+
+def test_candidate_prices_distances_at_the_live_resolution(factory, monkeypatch):
+    monkeypatch.setattr(settings, "ESTIMATE_DISTANCE_STEP_KM", 1.0)
+    estimate_cache.clear()
+    db = factory()
+    rules = pricing_rules.draft(price_per_km=14.0)
+    result = RepricingSimulator.simulate(db, rules, start_date=date(2026, 3, 1), end_date=date(2026, 3, 1))
+    db.close()
+
+    # What estimate_cache charges once these rules are published
+    expected = sum(
+        estimate_cache.price(category, materials, distance, urgency, rules, surge or 1.0)["final_price"]
+        for category, urgency, materials, distance, surge, day, _ in ORDERS
+        if day == 1
+    )
+    assert result["candidate_revenue"] == round(expected, 2)
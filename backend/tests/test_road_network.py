@@ -0,0 +1,158 @@
+"""Tests for road-network distances."""
+import heapq
+import json
+import random
+
+import numpy as np
+import pytest
+
+from services.dispatcher import Dispatcher
+from services.road_network import (
+    RoadNetwork,
+    DistanceProvider,
+    RoadDistanceProvider,
+    HaversineDistanceProvider,
+    set_distance_provider,
+)
+
+
+def _grid_graph(size, seed=1):
+    """Grid of streets ~110 m apart with random lengths and some one-way streets."""
+    rng = random.Random(seed)
+    lats, lngs, edges = [], [], []
+    for row in range(size):
+        for col in range(size):
+            lats.append(19.0 + row * 0.001)
+            lngs.append(72.8 + col * 0.001)
+    for row in range(size):
+        for col in range(size):
+            node = row * size + col
+            for neighbor in ([node + 1] if col + 1 < size else []) + ([node + size] if row + 1 < size else []):
+                length = rng.uniform(0.1, 0.3)
+                edges.append((node, neighbor, length))
+                if rng.random() > 0.2:
+                    edges.append((neighbor, node, length))
+    return lats, lngs, edges
+
+
+def _dijkstra(node_count, edges, source):
+    graph = [[] for _ in range(node_count)]
+    for u, v, w in edges:
+        graph[u].append((v, w))
+    dist = [float("inf")] * node_count
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for v, w in graph[u]:
+            if d + w < dist[v]:
+                dist[v] = d + w
+                heapq.heappush(heap, (d + w, v))
+    return dist
+
+
+def test_hierarchy_matches_dijkstra():
+    """Point-to-point and matrix queries return true shortest paths."""
+    lats, lngs, edges = _grid_graph(12)
+    network = RoadNetwork(lats, lngs, edges)
+    rng = random.Random(7)
+
+    sources = rng.sample(range(len(lats)), 8)
+    targets = rng.sample(range(len(lats)), 9)
+    matrix = network.node_matrix(sources, targets)
+
+    for row, source in enumerate(sources):
+        expected = _dijkstra(len(lats), edges, source)
+        for column, target in enumerate(targets):
+            assert np.isclose(network.node_distance(source, target), expected[target])
+            assert np.isclose(matrix[row, column], expected[target])
+
+
+def test_one_way_streets():
+    """Distances respect edge direction."""
+    network = RoadNetwork([19.0, 19.001, 19.002], [72.8, 72.8, 72.8], [
+        (0, 1, 1.0), (1, 2, 1.0), (2, 0, 5.0),
+    ])
+
+    assert network.node_distance(0, 2) == 2.0
+    assert network.node_distance(2, 1) == 6.0
+
+
+def test_provider_falls_back_to_haversine():
+    """Points too far from the graph, or disconnected, use straight-line distance."""
+    network = RoadNetwork([19.0, 19.0, 19.2], [72.8, 72.81, 72.8], [(0, 1, 3.0)])
+    provider = RoadDistanceProvider(network, max_snap_km=0.5)
+    haversine = HaversineDistanceProvider()
+
+    assert provider.distance_km(19.0, 72.8, 19.0, 72.81) == 3.0
+    # Node 2 is unreachable and the last point is far from every node
+    assert provider.distance_km(19.0, 72.8, 19.2, 72.8) == haversine.distance_km(19.0, 72.8, 19.2, 72.8)
+    assert provider.distance_km(19.0, 72.8, 25.0, 75.0) == haversine.distance_km(19.0, 72.8, 25.0, 75.0)
+
+    matrix = provider.matrix_km([(19.0, 72.8)], [(19.0, 72.81), (19.2, 72.8)])
+    assert matrix[0, 0] == 3.0
+    assert np.isclose(matrix[0, 1], haversine.distance_km(19.0, 72.8, 19.2, 72.8))
+
+
+CITY = {
+    "nodes": [["a", 19.0, 72.8], ["b", 19.0, 72.81], ["c", 19.01, 72.81]],
+    "edges": [["a", "b", 2500], ["b", "c", 1500, True]],
+}
+
+
+def test_incomplete_provider_cannot_be_created():
+    class StraightLine(DistanceProvider):
+        def distance_km(self, lat1, lng1, lat2, lng2):
+            return 0.0
+
+    with pytest.raises(TypeError):
+        StraightLine()
+
+
+def test_load_extract_and_route_distance(tmp_path):
+    """Extracts are built offline, loaded from the saved hierarchy, and drive Dispatcher.route_distance."""
+    path = tmp_path / "city.json"
+    path.write_text(json.dumps(CITY))
+
+    built = RoadNetwork.build(str(path))
+    assert (tmp_path / "city.json.ch.npz").exists()
+    network = RoadNetwork.load(str(path))
+    assert network.up_out == built.up_out and network.up_in == built.up_in
+    assert network.node_distance(0, 2) == built.node_distance(0, 2) == 4.0
+
+    set_distance_provider(RoadDistanceProvider(network))
+    try:
+        assert Dispatcher.route_distance(19.0, 72.8, 19.01, 72.81) == 4.0
+        # One-way: the trip back is not connected, so it falls back to haversine
+        assert Dispatcher.route_distance(19.01, 72.81, 19.0, 72.8) == Dispatcher.haversine_distance(
+            19.01, 72.81, 19.0, 72.8
+        )
+    finally:
+        set_distance_provider(HaversineDistanceProvider())
+
+
+def test_load_only_accepts_a_hierarchy_of_the_same_extract(tmp_path, monkeypatch):
+    """Loading never contracts, and refuses missing, stale or tampered hierarchies."""
+    path = tmp_path / "city.json"
+    path.write_text(json.dumps(CITY))
+    with pytest.raises(ValueError, match="python -m services.road_network"):
+        RoadNetwork.load(str(path))
+
+    RoadNetwork.build(str(path))
+    monkeypatch.setattr(RoadNetwork, "_contract", lambda *args: pytest.fail("contracted at load"))
+    assert len(RoadNetwork.load(str(path))) == 3
+
+    path.write_text(json.dumps({**CITY, "edges": [["a", "b", 900]]}))
+    with pytest.raises(ValueError, match="another extract"):
+        RoadNetwork.load(str(path))
+
+    path.write_text(json.dumps(CITY))
+    with np.load(tmp_path / "city.json.ch.npz") as data:
+        arrays = dict(data)
+    arrays["out_targets"] = arrays["out_targets"] + 10
+    with open(tmp_path / "city.json.ch.npz", "wb") as f:
+        np.savez(f, **arrays)
+    with pytest.raises(ValueError, match="Malformed"):
+        RoadNetwork.load(str(path))
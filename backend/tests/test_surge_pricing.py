@@ -0,0 +1,134 @@
+"""Tests for per-cell surge pricing."""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from models.order import Order
+from services.estimate_cache import estimate_cache
+from services.geo_index import PackerGeoIndex
+from services.order_pool import OrderPool
+from services.pricing_engine import PricingEngine
+from services.surge_pricing import SurgePricing, surge_pricing
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _surge(clock, **kwargs):
+    return SurgePricing(
+        cell_size_deg=0.05, prior=2.0, sensitivity=0.5, max_multiplier=2.0, half_life_seconds=0, clock=clock,
+        **kwargs
+    )
+
+
+def test_counts_cover_neighbouring_cells(clock):
+    surge = _surge(clock)
+    surge.order_added(19.01, 72.81)
+    surge.packer_added(19.06, 72.86)  # The diagonal neighbour cell
+    surge.packer_added(19.16, 72.81)  # Two cells away
+
+    assert surge.counts(19.01, 72.81) == (1, 1)
+    assert surge.counts(19.06, 72.86) == (1, 1)
+    assert surge.counts(19.16, 72.81) == (0, 1)
+
+    surge.order_removed(19.01, 72.81)
+    assert surge.counts(19.01, 72.81) == (0, 1)
+
+
+def test_multiplier_is_floored_and_capped(clock):
+    surge = _surge(clock)
+    assert surge.multiplier(19.01, 72.81) == 1.0
+
+    # (4 + 2) / (0 + 2) = 3 gives 1 + 0.5 * 2
+    for _ in range(4):
+        surge.order_added(19.01, 72.81)
+    assert surge.multiplier(19.01, 72.81) == 2.0
+
+    for _ in range(100):
+        surge.order_added(19.01, 72.81)
+    assert surge.multiplier(19.01, 72.81) == 2.0
+
+    # More packers than orders never discounts
+    for _ in range(500):
+        surge.packer_added(19.01, 72.81)
+    assert surge.multiplier(19.01, 72.81) == 1.0
+    assert surge.multiplier(None, None) == 1.0
+
+
+def test_multiplier_follows_counts_with_half_life(clock):
+    surge = SurgePricing(prior=2.0, sensitivity=0.5, max_multiplier=2.0, half_life_seconds=60, clock=clock)
+    for _ in range(2):
+        surge.order_added(19.01, 72.81)  # Target 1.5
+
+    assert surge.multiplier(19.01, 72.81) == 1.0
+    clock.now = 60
+    assert surge.multiplier(19.01, 72.81) == 1.25
+    clock.now = 120
+    assert surge.multiplier(19.01, 72.81) == 1.38
+
+    # Demand going away decays the same way
+    for _ in range(2):
+        surge.order_removed(19.01, 72.81)
+    clock.now = 180
+    assert surge.multiplier(19.01, 72.81) == 1.19
+
+
+def test_pool_and_index_report_counts(clock):
+    surge = _surge(clock)
+    pool = OrderPool(surge=surge)
+    index = PackerGeoIndex(surge=surge)
+
+    pool.add(Order(id=1, pickup_lat=19.01, pickup_lng=72.81, pickup_location={}, materials_required={}))
+    index.upsert(1, 19.02, 72.82)
+    index.upsert(2, 19.02, 72.82)
+    assert surge.counts(19.01, 72.81) == (1, 2)
+
+    index.move(2, 19.5, 73.5)
+    pool.remove(1)
+    assert surge.counts(19.01, 72.81) == (0, 1)
+    assert surge.counts(19.5, 73.5) == (0, 1)
+
+    index.clear()
+    assert surge.counts(19.5, 73.5) == (0, 0)
+
+
+def test_price_includes_surge():
+    normal = PricingEngine.calculate_price("gift", {"packing_tape": 1.0}, 5, "normal")
+    surged = PricingEngine.calculate_price("gift", {"packing_tape": 1.0}, 5, "normal", surge_multiplier=1.5)
+    assert normal["surge_multiplier"] == 1.0
+    assert surged["final_price"] == round(normal["final_price"] * 1.5, 2)
+
+
+def test_estimate_uses_pickup_location(monkeypatch):
+    monkeypatch.setattr(surge_pricing, "multiplier", lambda lat, lng: 1.4 if lat == 19.0 else 1.0)
+    estimate_cache.clear()
+    request = {
+        "category": "gift",
+        "item_dimensions": {"length": 10, "width": 10, "height": 10, "weight": 1},
+        "distance_km": 5,
+    }
+    client = TestClient(app)
+
+    base = client.post("/api/v1/orders/estimate/price", json=request, headers=HEADERS).json()
+    surged = client.post(
+        "/api/v1/orders/estimate/price",
+        json={**request, "pickup_location": {"lat": 19.0, "lng": 72.8, "address": "x"}},
+        headers=HEADERS,
+    ).json()
+
+    assert base["surge_multiplier"] == 1.0
+    assert surged["surge_multiplier"] == 1.4
+    assert surged["final_price"] == round(base["final_price"] * 1.4, 2)
@@ -0,0 +1,150 @@
+"""Tests for the denormalized tracking read model."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from api.main import app
+from api.deps import get_current_user
+from core.config import settings
+from core.constants import OrderStatus
+from models.database import get_db
+from models.user import User
+from models.packer import Packer
+from models.order import Order
+from models.tracking import OrderTracking, TrackingEvent
+from schemas.tracking import TrackingTimelineResponse
+from services.packer_locations import packer_locations
+from services.tracking_projection import TrackingProjection
+from services.tracking_stream import build_timeline
+from tests.conftest import add_order, add_packer, add_user, override_get_db
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"}
+
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    add_user(db)
+    add_packer(db, name="P", rating=4.5)
+    add_order(db, category="house_shifting", delivery_otp="123456")
+    db.commit()
+    db.close()
+    packer_locations.clear()
+    yield session_factory
+    packer_locations.clear()
+
+
+def _add_event(db, order, status, message, packer=None):
+    order.status = status
+    tracking_event = TrackingEvent(order_id=order.id, status=status, message=message,
+                                   packer_lat=19.0 if packer else None, packer_lng=72.8 if packer else None)
+    db.add(tracking_event)
+    TrackingProjection.apply(db, order, tracking_event, packer=packer)
+    db.commit()
+
+
+def _dump(timeline):
+    dumped = TrackingTimelineResponse.model_validate(timeline).model_dump(mode="json")
+    for e in dumped["events"]:
+        # SQLite drops the time zone of stored timestamps
+        e["created_at"] = e["created_at"].rstrip("Z")
+    return dumped
+
+
+def test_projection_matches_timeline(factory):
+    db = factory()
+    order = db.get(Order, 1)
+    _add_event(db, order, OrderStatus.CREATED, "Placed")
+    order.packer_id = 1
+    _add_event(db, order, OrderStatus.PACKER_ASSIGNED, "Assigned", packer=db.get(Packer, 1))
+    _add_event(db, order, OrderStatus.ON_THE_WAY, "On the way")
+
+    projection = db.get(OrderTracking, 1)
+    expected = _dump(build_timeline(db, order))
+    assert _dump(TrackingProjection.timeline(db, projection)) == expected
+    assert expected["packer_name"] == "P"
+
+    cursor = expected["events"][1]["id"]
+    assert [e["message"] for e in _dump(TrackingProjection.timeline(db, projection, cursor))["events"]] == ["On the way"]
+    db.close()
+
+
+def test_long_histories_keep_only_recent_events(factory, monkeypatch):
+    monkeypatch.setattr(settings, "TRACKING_PROJECTION_EVENTS", 3)
+    db = factory()
+    order = db.get(Order, 1)
+    for i in range(5):
+        _add_event(db, order, OrderStatus.CREATED, f"Event {i}")
+
+    projection = db.get(OrderTracking, 1)
+    assert [e["message"] for e in projection.recent_events] == ["Event 2", "Event 3", "Event 4"]
+
+    # A full read or an old cursor reaches back to the events table
+    full = TrackingProjection.timeline(db, projection)
+    assert [e["message"] for e in full["events"]] == [f"Event {i}" for i in range(5)]
+    recent = TrackingProjection.timeline(db, projection, after_id=full["events"][0]["id"])
+    assert [e["message"] for e in recent["events"]] == [f"Event {i}" for i in range(1, 5)]
+    db.close()
+
+
+def test_location_flush_moves_active_orders(factory):
+    db = factory()
+    order = db.get(Order, 1)
+    order.packer_id = 1
+    _add_event(db, order, OrderStatus.PACKER_ASSIGNED, "Assigned", packer=db.get(Packer, 1))
+
+    packer_locations.record(1, [(None, 19.05, 72.85)])
+    packer_locations.flush(db)
+    db.expire_all()
+
+    projection = db.get(OrderTracking, 1)
+    assert (projection.packer_lat, projection.packer_lng) == (19.05, 72.85)
+    db.close()
+
+
+def test_tracking_endpoint_reads_only_the_projection(factory):
+    db = factory()
+    order = db.get(Order, 1)
+    order.packer_id = 1
+    _add_event(db, order, OrderStatus.PACKER_ASSIGNED, "Assigned", packer=db.get(Packer, 1))
+    db.close()
+
+    user = factory().get(User, 1)
+    app.dependency_overrides[get_db] = override_get_db(factory)
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    statements = []
+    engine = factory.kw["bind"]
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = TestClient(app).get("/api/v1/orders/1/tracking", headers=HEADERS)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["packer_name"] == "P"
+    assert [e["message"] for e in response.json()["events"]] == ["Assigned"]
+    assert len(statements) == 1
+    assert "order_tracking" in statements[0]
+
+
+def test_concurrent_changes_keep_each_others_events(factory):
+    """The row is read under a lock, so writers racing on one order append in turn."""
+    first, second = factory(), factory()
+    _add_event(first, first.get(Order, 1), OrderStatus.CREATED, "Placed")
+
+    # SQLite ignores FOR UPDATE, so check the lock is asked for
+    locked = []
+    event.listen(first, "do_orm_execute", lambda state: locked.append(state.statement._for_update_arg is not None))
+    _add_event(second, second.get(Order, 1), OrderStatus.PACKER_ASSIGNED, "Assigned by admin")
+    _add_event(first, first.get(Order, 1), OrderStatus.ON_THE_WAY, "On the way")
+
+    row = factory().get(OrderTracking, 1)
+    assert [e["message"] for e in row.recent_events] == ["Placed", "Assigned by admin", "On the way"]
+    assert row.last_event_id == row.recent_events[-1]["id"]
+    assert any(locked)
+    first.close()
+    second.close()
@@ -0,0 +1,110 @@
+"""Tests for order tracking stream events."""
+import asyncio
+
+import pytest
+
+from models.packer import Packer
+from models.order import Order
+from models.tracking import TrackingEvent
+from core.constants import OrderStatus
+from services.event_broker import broker
+from services.packer_locations import packer_locations
+from services.tracking_stream import (
+    ORDER_UPDATE,
+    PACKER_LOCATION,
+    build_timeline,
+    order_topic,
+    packer_topic,
+    publish_order_update,
+    publish_packer_location,
+)
+from tests.conftest import add_order, add_packer, add_user
+
+
+@pytest.fixture
+def db(db):
+    add_user(db)
+    add_packer(db, name="P", rating=4.5)
+    add_order(db, packer_id=1, status=OrderStatus.PACKER_ASSIGNED, delivery_otp="123456")
+    db.add(TrackingEvent(order_id=1, status=OrderStatus.CREATED, message="Placed"))
+    db.add(TrackingEvent(order_id=1, status=OrderStatus.PACKER_ASSIGNED, message="Assigned"))
+    db.commit()
+    return db
+
+
+def _collect(db, publish, topics=None):
+    async def scenario():
+        subscription = broker.subscribe(topics or [order_topic(1)])
+        try:
+            publish()
+            received = []
+            while (event := await subscription.get(0.1)) is not None:
+                received.append(event)
+            return received
+        finally:
+            broker.unsubscribe(subscription)
+
+    return asyncio.run(scenario())
+
+
+def test_timeline_snapshot_includes_packer(db):
+    timeline = build_timeline(db, db.get(Order, 1))
+
+    assert [event.message for event in timeline["events"]] == ["Placed", "Assigned"]
+    assert timeline["packer_name"] == "P"
+    assert timeline["packer_rating"] == 4.5
+    assert timeline["delivery_otp"] == "123456"
+
+
+def test_timeline_cursor_returns_only_newer_events(db):
+    order = db.get(Order, 1)
+    cursor = build_timeline(db, order)["next_cursor"]
+
+    db.add(TrackingEvent(order_id=1, status=OrderStatus.ON_THE_WAY, message="On the way"))
+    db.commit()
+
+    timeline = build_timeline(db, order, after_id=cursor)
+    assert [event.message for event in timeline["events"]] == ["On the way"]
+    assert timeline["packer_name"] == "P"
+
+    # Nothing new: the cursor stays put
+    empty = build_timeline(db, order, after_id=timeline["next_cursor"])
+    assert empty["events"] == []
+    assert empty["next_cursor"] == timeline["next_cursor"]
+
+
+def test_updates_carry_only_the_change(db):
+    """Status updates send the new event; location updates go to the packer's followers."""
+    order = db.get(Order, 1)
+    packer = db.get(Packer, 1)
+
+    order.status = OrderStatus.ON_THE_WAY
+    event = TrackingEvent(order_id=1, status=OrderStatus.ON_THE_WAY, message="On the way")
+    db.add(event)
+    db.commit()
+
+    received = _collect(db, lambda: publish_order_update(order, event))
+    assert len(received) == 1
+    assert received[0]["type"] == ORDER_UPDATE
+    assert received[0]["current_status"] == OrderStatus.ON_THE_WAY
+    assert received[0]["event"]["message"] == "On the way"
+    assert "packer_name" not in received[0]
+
+    packer.lat = 19.01
+    db.commit()
+    received = _collect(db, lambda: publish_packer_location(packer), topics=[packer_topic(1)])
+    assert received == [{"type": PACKER_LOCATION, "packer_lat": 19.01, "packer_lng": 72.8}]
+
+
+def test_locations_are_not_looked_up_without_followers(db, monkeypatch):
+    """Publishing a position reads nothing when no stream follows the packer."""
+    packer = db.get(Packer, 1)
+    monkeypatch.setattr(packer_locations, "position", lambda packer: pytest.fail("position read"))
+    assert _collect(db, lambda: publish_packer_location(packer)) == []
+
+
+def test_assignment_update_names_the_packer_to_follow(db):
+    order, packer = db.get(Order, 1), db.get(Packer, 1)
+    received = _collect(db, lambda: publish_order_update(order, packer=packer))
+    assert received[0]["packer_id"] == 1
+    assert received[0]["packer_name"] == "P"
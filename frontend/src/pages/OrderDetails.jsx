@@ -2,6 +2,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
 import api from '../services/api';
+import { subscribe } from '../services/eventStream';
 import { FiPackage, FiTruck, FiCheckCircle, FiClock } from 'react-icons/fi';
 
 const statusSteps = [
@@ -19,8 +20,20 @@ export default function OrderDetails() {
 
     useEffect(() => {
         fetchOrder();
-        const interval = setInterval(fetchOrder, 5000); // Poll every 5 seconds
-        return () => clearInterval(interval);
+        // Refetch only when the order changes, or after a reconnect
+        let connected = false;
+        const close = subscribe(`/orders/${orderId}/tracking/stream`, {
+            onEvent: (event, data) => {
+                if (event === 'timeline') {
+                    if (connected) fetchOrder();
+                    connected = true;
+                } else if (event === 'order_update' || event === 'resync') {
+                    fetchOrder();
+                }
+                if (['COMPLETED', 'CANCELLED'].includes(data.current_status)) close();
+            },
+        });
+        return close;
     }, [orderId]);
 
     const fetchOrder = async () => {
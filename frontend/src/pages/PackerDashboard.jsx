@@ -1,6 +1,7 @@
 // Packer Dashboard — Separate interface for service providers
 import React, { useState, useEffect } from 'react';
 import api from '../services/api';
+import { subscribe } from '../services/eventStream';
 import { useToast } from '../components/Toast';
 import {
     FiTruck, FiPackage, FiMapPin, FiToggleLeft, FiToggleRight,
@@ -12,6 +13,8 @@ export default function PackerDashboard() {
     const [profile, setProfile] = useState(null);
     const [orders, setOrders] = useState([]);
     const [liveOrders, setLiveOrders] = useState([]);
+    const [liveCursor, setLiveCursor] = useState(null);
+    const [loadingMoreLive, setLoadingMoreLive] = useState(false);
     const [loading, setLoading] = useState(true);
     const [updatingStatus, setUpdatingStatus] = useState(null);
     const [acceptingOrder, setAcceptingOrder] = useState(null);
@@ -31,6 +34,7 @@ export default function PackerDashboard() {
             setProfile(profileRes.data);
             setOrders(ordersRes.data);
             setLiveOrders(liveRes.data);
+            setLiveCursor(liveRes.headers?.['x-next-cursor'] || null);
         } catch (error) {
             if (error.response?.status === 401 || error.response?.status === 403) {
                 window.location.href = '/packer/login';
@@ -40,6 +44,44 @@ export default function PackerDashboard() {
         }
     };
 
+    // Keep the live feed current while online
+    useEffect(() => {
+        if (!profile?.available) return undefined;
+        let opened = false;
+        return subscribe('/packers/live-orders/stream', {
+            onOpen: () => {
+                // Catch up on anything missed while disconnected
+                if (opened) fetchProfileAndOrders();
+                opened = true;
+            },
+            onEvent: (event, data) => {
+                if (event === 'order_added') {
+                    setLiveOrders((prev) =>
+                        prev.some((o) => o.id === data.order.id) ? prev : [data.order, ...prev]
+                    );
+                } else if (event === 'order_claimed' || event === 'order_cancelled') {
+                    setLiveOrders((prev) => prev.filter((o) => o.id !== data.order_id));
+                } else if (event === 'resync') {
+                    fetchProfileAndOrders();
+                }
+            },
+        });
+    }, [profile?.available, profile?.lat, profile?.lng]);
+
+    const loadMoreLiveOrders = async () => {
+        if (!liveCursor) return;
+        setLoadingMoreLive(true);
+        try {
+            const res = await api.get('/packers/live-orders', { params: { cursor: liveCursor } });
+            setLiveOrders((prev) => [...prev, ...res.data]);
+            setLiveCursor(res.headers?.['x-next-cursor'] || null);
+        } catch (error) {
+            showToast('Failed to load more requests', 'error');
+        } finally {
+            setLoadingMoreLive(false);
+        }
+    };
+
     const toggleAvailability = async () => {
         try {
             const res = await api.patch('/packers/me/availability', {
@@ -321,6 +363,15 @@ export default function PackerDashboard() {
                                         </div>
                                     </div>
                                 ))}
+                                {liveCursor && (
+                                    <button
+                                        onClick={loadMoreLiveOrders}
+                                        disabled={loadingMoreLive}
+                                        className="w-full py-3 text-sm font-bold text-emerald-700 bg-emerald-50 hover:bg-emerald-100 rounded-xl transition-all disabled:opacity-50"
+                                    >
+                                        {loadingMoreLive ? 'Loading...' : 'Load more requests'}
+                                    </button>
+                                )}
                             </div>
                         )}
                     </div>
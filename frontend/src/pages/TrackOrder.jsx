@@ -2,6 +2,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import api from '../services/api';
+import { subscribe } from '../services/eventStream';
 import { FiPackage, FiUser, FiPhone, FiStar, FiArrowLeft, FiRefreshCw } from 'react-icons/fi';
 
 const STATUS_STEPS = ['CREATED', 'PACKER_ASSIGNED', 'ON_THE_WAY', 'PACKED', 'COMPLETED'];
@@ -15,6 +16,17 @@ const STATUS_INFO = {
     CANCELLED: { label: 'Cancelled', icon: '❌', color: 'bg-red-500' },
 };
 
+const FINAL_STATUSES = ['COMPLETED', 'CANCELLED'];
+
+// Merge an order_update stream event into the timeline
+const applyUpdate = (tracking, update) => {
+    const { type, event, ...changes } = update;
+    const events = event && !tracking.events.some((e) => e.id === event.id)
+        ? [...tracking.events, event]
+        : tracking.events;
+    return { ...tracking, ...changes, events };
+};
+
 export default function TrackOrder() {
     const { orderId } = useParams();
     const [tracking, setTracking] = useState(null);
@@ -37,11 +49,29 @@ export default function TrackOrder() {
     }, [orderId]);
 
     useEffect(() => {
-        fetchTracking();
-        // Auto-refresh every 10 seconds
-        const interval = setInterval(fetchTracking, 10000);
-        return () => clearInterval(interval);
-    }, [fetchTracking]);
+        // The stream sends the full timeline on every (re)connect, then only changes
+        const close = subscribe(`/orders/${orderId}/tracking/stream`, {
+            onEvent: (event, data) => {
+                if (event === 'timeline') {
+                    setTracking(data);
+                    setError(null);
+                    setLoading(false);
+                } else if (event === 'order_update') {
+                    setTracking((prev) => (prev ? applyUpdate(prev, data) : prev));
+                } else if (event === 'packer_location') {
+                    setTracking((prev) => (prev ? { ...prev, packer_lat: data.packer_lat, packer_lng: data.packer_lng } : prev));
+                } else if (event === 'resync') {
+                    fetchTracking();
+                }
+                setLastRefresh(new Date());
+                if ((event === 'timeline' || event === 'order_update') && FINAL_STATUSES.includes(data.current_status)) {
+                    close();
+                }
+            },
+            onError: fetchTracking,
+        });
+        return close;
+    }, [orderId, fetchTracking]);
 
     const getStepIndex = (status) => STATUS_STEPS.indexOf(status);
     const currentStepIndex = tracking ? getStepIndex(tracking.current_status) : -1;
@@ -0,0 +1,85 @@
+// Server-sent event client
+// EventSource cannot send an Authorization header, so events are read over fetch.
+const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1';
+
+const MAX_RETRY_MS = 30000;
+
+function parseEvent(block) {
+    let event = 'message';
+    const data = [];
+    for (const line of block.split('\n')) {
+        if (line.startsWith(':')) continue; // keep-alive comment
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).trimStart());
+    }
+    if (!data.length) return null;
+    try {
+        return { event, data: JSON.parse(data.join('\n')) };
+    } catch {
+        return null;
+    }
+}
+
+/**
+ * Subscribe to a streaming endpoint.
+ *
+ * Reconnects with exponential backoff when the connection drops; onOpen is
+ * called on every (re)connect so callers can refetch anything they missed.
+ *
+ * @param {string} path - Path below the API base URL
+ * @param {object} handlers - { onEvent(event, data), onOpen(), onError(error) }
+ * @returns {function} Call to close the stream
+ */
+export function subscribe(path, { onEvent, onOpen, onError } = {}) {
+    let closed = false;
+    let controller = null;
+    let retryMs = 1000;
+    let timer = null;
+
+    const connect = async () => {
+        controller = new AbortController();
+        try {
+            const token = localStorage.getItem('access_token');
+            const res = await fetch(`${API_BASE_URL}${path}`, {
+                headers: {
+                    Accept: 'text/event-stream',
+                    ...(token ? { Authorization: `Bearer ${token}` } : {}),
+                },
+                signal: controller.signal,
+            });
+            if (!res.ok || !res.body) {
+                throw new Error(`Stream failed with status ${res.status}`);
+            }
+            retryMs = 1000;
+            onOpen?.();
+
+            const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = '';
+            for (;;) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += value.replace(/\r\n/g, '\n');
+                let end;
+                while ((end = buffer.indexOf('\n\n')) !== -1) {
+                    const parsed = parseEvent(buffer.slice(0, end));
+                    buffer = buffer.slice(end + 2);
+                    if (parsed) onEvent?.(parsed.event, parsed.data);
+                }
+            }
+        } catch (error) {
+            if (closed) return;
+            onError?.(error);
+        }
+        if (closed) return;
+        timer = setTimeout(connect, retryMs);
+        retryMs = Math.min(retryMs * 2, MAX_RETRY_MS);
+    };
+
+    connect();
+
+    return () => {
+        closed = true;
+        clearTimeout(timer);
+        controller?.abort();
+    };
+}